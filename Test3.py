@@ -1,26 +1,15 @@
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLabel, QTextEdit, QFrame, QListWidget, QScrollArea
+    QLabel, QTextEdit, QFrame, QListView, QScrollArea
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont, QTextCursor
 
+from qt_models import AskBridge, BufferListModel, ToolEventBridge
 from pass60 import ClipboardGeminiTool  # <- adjust if file renamed
 
 
-class GeminiWorker(QThread):
-    finished = pyqtSignal(str)
-
-    def __init__(self, tool: ClipboardGeminiTool):
-        super().__init__()
-        self.tool = tool
-
-    def run(self):
-        response = self.tool.send_to_gemini()
-        self.finished.emit(response if response else "❌ Failed to get response from Gemini.")
-
-
 class GeminiGUI(QWidget):
     def __init__(self):
         super().__init__()
@@ -70,7 +59,10 @@ class GeminiGUI(QWidget):
         buffer_title.setAlignment(Qt.AlignmentFlag.AlignCenter)
         buffer_layout.addWidget(buffer_title)
 
-        self.buffer_list = QListWidget()
+        self.buffer_model = BufferListModel(self.tool, preview_length=60, empty_text="No items in buffer")
+        self.buffer_list = QListView()
+        self.buffer_list.setModel(self.buffer_model)
+        self.buffer_list.setUniformItemSizes(True)
         self.buffer_list.setStyleSheet(
             "background-color: #1e1e1e; color: white; border: none; "
             "min-height: 120px; max-height: 120px;"
@@ -241,10 +233,15 @@ class GeminiGUI(QWidget):
         window_layout.addWidget(scroll_area)
         self.setLayout(window_layout)
 
-        # Set up timer to refresh UI periodically
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_ui)
-        self.refresh_timer.start(1000)  # Refresh every second
+        # Refresh when the tool publishes a change instead of polling it
+        self.tool_events = ToolEventBridge(self.tool.events, self)
+        self.tool_events.event.connect(self.on_tool_event)
+
+        # Model requests run on an asyncio loop; only the latest one is shown
+        self.ask_bridge = AskBridge(self.tool, self)
+        self.ask_bridge.chunk.connect(self.append_chunk)
+        self.ask_bridge.finished.connect(self.on_request_finished)
+        self.active_request = None
 
     def start_collecting(self):
         """Start the collecting mode"""
@@ -275,13 +272,28 @@ class GeminiGUI(QWidget):
         self.status_label.setStyleSheet("color: #FFA500; margin: 5px 0px;")
 
         # Run Gemini request in separate thread
-        self.worker = GeminiWorker(self.tool)
-        self.worker.finished.connect(self.show_response)
-        self.worker.start()
+        # A follow-up may be sent while an earlier answer is still generating
+        self.stream_started = False
+        self.active_request = self.ask_bridge.ask()
+
+    def append_chunk(self, request_id, text):
+        """Append a streamed response chunk to the response box"""
+        if request_id != self.active_request:
+            return
+        if not self.stream_started:
+            self.stream_started = True
+            self.response_box.clear()
+        self.response_box.moveCursor(QTextCursor.MoveOperation.End)
+        self.response_box.insertPlainText(text)
+
+    def on_request_finished(self, request_id, response):
+        """A request finished; earlier requests superseded by a follow-up are ignored"""
+        if request_id != self.active_request:
+            return
+        self.show_response(response if response else self.tool.request_failure_message(request_id))
 
     def show_response(self, response):
         """Display the response from Gemini"""
-        self.tool.current_response = response
         self.response_box.setPlainText(response)
         self.status_label.setText("Status: Response ready")
         self.status_label.setStyleSheet("color: #90EE90; margin: 5px 0px;")
@@ -302,34 +314,40 @@ class GeminiGUI(QWidget):
 
     def stop_tool(self):
         """Stop the tool and close the application"""
-        self.refresh_timer.stop()
+        self.tool_events.close()
+        self.ask_bridge.close()
         self.tool.exit_program()
         self.close()
 
+    def on_tool_event(self, event):
+        """Tool state changed (buffer, collecting, response or typing progress)"""
+        self.refresh_ui()
+
     def refresh_ui(self):
         """Refresh the UI with current buffer contents"""
-        self.buffer_list.clear()
-        if self.tool.clipboard_buffer:
-            for i, item in enumerate(self.tool.clipboard_buffer, 1):
-                preview = item[:60] + "..." if len(item) > 60 else item
-                self.buffer_list.addItem(f"{i}. {preview}")
-        else:
-            self.buffer_list.addItem("No items in buffer")
-
-        # Update status based on tool state
+        # Only appended rows are inserted; an unchanged buffer is a no-op
+        self.buffer_model.sync()
+
+        # Update status based on tool state (only touch the label when it changes)
         if self.tool.collecting:
             if not self.status_label.text().startswith("Status: Processing"):
-                self.status_label.setText("Status: Collecting (Auto-copy mode active)")
-                self.status_label.setStyleSheet("color: #90EE90; margin: 5px 0px;")
+                self.set_status("Status: Collecting (Auto-copy mode active)", "#90EE90")
         elif self.tool.typing_in_progress:
             progress = (self.tool.current_char_index / len(
                 self.tool.current_response)) * 100 if self.tool.current_response else 0
-            self.status_label.setText(f"Status: Typing response ({progress:.1f}%)")
-            self.status_label.setStyleSheet("color: #FFA500; margin: 5px 0px;")
+            self.set_status(f"Status: Typing response ({progress:.1f}%)", "#FFA500")
+
+    def set_status(self, text, color):
+        """Update the status label if its text changed"""
+        if self.status_label.text() == text:
+            return
+        self.status_label.setText(text)
+        self.status_label.setStyleSheet(f"color: {color}; margin: 5px 0px;")
 
     def closeEvent(self, event):
         """Handle window close event"""
-        self.refresh_timer.stop()
+        self.tool_events.close()
+        self.ask_bridge.close()
         self.tool.exit_program()
         event.accept()
 
@@ -1,26 +1,15 @@
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLabel, QTextEdit, QFrame, QListWidget, QScrollArea
+    QLabel, QTextEdit, QFrame, QListView, QScrollArea
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont, QTextCursor
 
+from qt_models import AskBridge, BufferListModel, PasteBridge, ToolEventBridge
 from pass60 import ClipboardGeminiTool
 
 
-class GeminiWorker(QThread):
-    finished = pyqtSignal(str)
-
-    def __init__(self, tool: ClipboardGeminiTool):
-        super().__init__()
-        self.tool = tool
-
-    def run(self):
-        response = self.tool.send_to_gemini()
-        self.finished.emit(response if response else "❌ Failed to get response from Gemini.")
-
-
 class GeminiGUI(QWidget):
     def __init__(self):
         super().__init__()
@@ -63,7 +52,11 @@ class GeminiGUI(QWidget):
         )
         buffer_layout = QVBoxLayout()
 
-        self.buffer_list = QListWidget()
+        self.buffer_model = BufferListModel(self.tool, preview_length=80)
+        self._button_state = None
+        self.buffer_list = QListView()
+        self.buffer_list.setModel(self.buffer_model)
+        self.buffer_list.setUniformItemSizes(True)
         self.buffer_list.setStyleSheet("background-color: #1e1e1e; color: white; border: none;")
         self.buffer_list.setMaximumHeight(80)
         buffer_layout.addWidget(self.buffer_list)
@@ -166,10 +159,19 @@ class GeminiGUI(QWidget):
 
         self.setLayout(main_layout)
 
-        # Set up timer to refresh UI periodically
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_ui)
-        self.refresh_timer.start(1000)
+        # Refresh when the tool publishes a change instead of polling it
+        self.tool_events = ToolEventBridge(self.tool.events, self)
+        self.tool_events.event.connect(self.on_tool_event)
+
+        # Model requests run on an asyncio loop; only the latest one is shown
+        self.ask_bridge = AskBridge(self.tool, self)
+        self.ask_bridge.chunk.connect(self.append_chunk)
+        self.ask_bridge.finished.connect(self.on_request_finished)
+
+        # Auto-paste runs on the tool's worker threads; its outcome comes back as a signal
+        self.paste_bridge = PasteBridge(self.tool, parent=self)
+        self.paste_bridge.finished.connect(self.on_paste_finished)
+        self.active_request = None
 
         # Flag to track if we've already pasted for current response
         self.response_pasted = False
@@ -193,13 +195,28 @@ class GeminiGUI(QWidget):
         self.resp_btn.setStyleSheet(
             "background-color: #FF9800; color: white; padding: 8px; border-radius: 12px;")
 
-        self.worker = GeminiWorker(self.tool)
-        self.worker.finished.connect(self.show_response)
-        self.worker.start()
+        # A follow-up may be sent while an earlier answer is still generating
+        self.stream_started = False
+        self.active_request = self.ask_bridge.ask()
+
+    def append_chunk(self, request_id, text):
+        """Append a streamed response chunk to the response box"""
+        if request_id != self.active_request:
+            return
+        if not self.stream_started:
+            self.stream_started = True
+            self.response_box.clear()
+        self.response_box.moveCursor(QTextCursor.MoveOperation.End)
+        self.response_box.insertPlainText(text)
+
+    def on_request_finished(self, request_id, response):
+        """A request finished; earlier requests superseded by a follow-up are ignored"""
+        if request_id != self.active_request:
+            return
+        self.show_response(response if response else self.tool.request_failure_message(request_id))
 
     def show_response(self, response):
         """Handle response from Gemini and auto-paste notification"""
-        self.tool.current_response = response
         self.response_box.setPlainText(response)
         self.update_button_states()
 
@@ -208,24 +225,25 @@ class GeminiGUI(QWidget):
 
     def rsp_ready(self):
         """Auto-paste 'response ready' notification"""
-        import pyautogui, pyperclip
-        try:
-            print("Auto-pasting 'response ready'...")
-            prev_clip = pyperclip.paste()  # Save current clipboard
-            pyperclip.copy("response ready")  # Copy our message
-            pyautogui.hotkey("ctrl", "v")  # Simulate paste (Ctrl+V)
-            pyperclip.copy(prev_clip)  # Restore original clipboard
-            print("Paste complete!")
-        except Exception as e:
-            print("Auto-paste failed:", e)
+        print("Auto-pasting 'response ready'...")
+        # Restores the previous clipboard once the paste has had time to land
+        self.paste_bridge.paste("response ready")
+
+    def on_paste_finished(self, result, error):
+        if error is not None:
+            print("Auto-paste failed:", error)
+        else:
+            print(f"Paste complete in {result.total_ms:.1f} ms!")
 
     def stop_tool(self):
-        self.refresh_timer.stop()
+        self.tool_events.close()
+        self.ask_bridge.close()
         self.tool.exit_program()
         self.close()
 
     def update_button_states(self):
         """Update button colors based on current tool state"""
+        self._button_state = (self.tool.collecting, bool(self.tool.current_response))
         # Update Start button
         if self.tool.collecting:
             self.start_btn.setText("🟢 Active")
@@ -262,17 +280,21 @@ class GeminiGUI(QWidget):
             self.add_btn.setStyleSheet(
                 "background-color: #FFD43B; color: black; padding: 8px; border-radius: 12px;")
 
+    def on_tool_event(self, event):
+        """Tool state changed (buffer, collecting, response or typing progress)"""
+        self.refresh_ui()
+
     def refresh_ui(self):
-        self.buffer_list.clear()
-        for i, item in enumerate(self.tool.clipboard_buffer, 1):
-            preview = item[:80] + "..." if len(item) > 80 else item
-            self.buffer_list.addItem(f"{i}. {preview}")
+        # Only appended rows are inserted; an unchanged buffer is a no-op
+        self.buffer_model.sync()
 
-        # Update button states whenever UI refreshes
-        self.update_button_states()
+        # Restyle buttons only when the state they reflect has changed
+        if (self.tool.collecting, bool(self.tool.current_response)) != self._button_state:
+            self.update_button_states()
 
     def closeEvent(self, event):
-        self.refresh_timer.stop()
+        self.tool_events.close()
+        self.ask_bridge.close()
         self.tool.exit_program()
         event.accept()
 
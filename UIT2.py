@@ -1,12 +1,13 @@
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLabel, QTextEdit, QFrame, QListWidget, QScrollArea, QGraphicsBlurEffect,
+    QLabel, QTextEdit, QFrame, QListView, QScrollArea, QGraphicsBlurEffect,
     QGraphicsOpacityEffect
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve, QPoint
-from PyQt6.QtGui import QFont, QPalette, QColor
+from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QPoint
+from PyQt6.QtGui import QFont, QPalette, QColor, QTextCursor
 
+from qt_models import AskBridge, BufferListModel, ToolEventBridge
 from pass60 import ClipboardGeminiTool  # <- adjust if file renamed
 
 
@@ -51,18 +52,6 @@ class NotificationPopup(QLabel):
         self.hide()
 
 
-class GeminiWorker(QThread):
-    finished = pyqtSignal(str)
-
-    def __init__(self, tool: ClipboardGeminiTool):
-        super().__init__()
-        self.tool = tool
-
-    def run(self):
-        response = self.tool.send_to_gemini()
-        self.finished.emit(response if response else "❌ Failed to get response from Gemini.")
-
-
 class GeminiGUI(QWidget):
     def __init__(self):
         super().__init__()
@@ -150,20 +139,24 @@ class GeminiGUI(QWidget):
         """)
         buffer_layout = QVBoxLayout()
 
-        self.buffer_list = QListWidget()
+        self.buffer_model = BufferListModel(self.tool, preview_length=80)
+        self._button_state = None
+        self.buffer_list = QListView()
+        self.buffer_list.setModel(self.buffer_model)
+        self.buffer_list.setUniformItemSizes(True)
         self.buffer_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background: rgba(0, 0, 0, 0.2);
                 color: white;
                 border: 1px solid rgba(255, 255, 255, 0.1);
                 border-radius: 10px;
                 padding: 8px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 5px;
                 border-radius: 5px;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background: rgba(139, 92, 246, 0.2);
             }
         """)
@@ -358,10 +351,15 @@ class GeminiGUI(QWidget):
 
         self.setLayout(main_layout)
 
-        # Set up timer to refresh UI periodically
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_ui)
-        self.refresh_timer.start(1000)  # Refresh every second
+        # Refresh when the tool publishes a change instead of polling it
+        self.tool_events = ToolEventBridge(self.tool.events, self)
+        self.tool_events.event.connect(self.on_tool_event)
+
+        # Model requests run on an asyncio loop; only the latest one is shown
+        self.ask_bridge = AskBridge(self.tool, self)
+        self.ask_bridge.chunk.connect(self.append_chunk)
+        self.ask_bridge.finished.connect(self.on_request_finished)
+        self.active_request = None
 
         # Create notification popup
         self.notification = NotificationPopup(self)
@@ -396,12 +394,27 @@ class GeminiGUI(QWidget):
                 backdrop-filter: blur(10px);
             }
         """)
-        self.worker = GeminiWorker(self.tool)
-        self.worker.finished.connect(self.show_response)
-        self.worker.start()
+        # A follow-up may be sent while an earlier answer is still generating
+        self.stream_started = False
+        self.active_request = self.ask_bridge.ask()
+
+    def append_chunk(self, request_id, text):
+        """Append a streamed response chunk to the response box"""
+        if request_id != self.active_request:
+            return
+        if not self.stream_started:
+            self.stream_started = True
+            self.response_box.clear()
+        self.response_box.moveCursor(QTextCursor.MoveOperation.End)
+        self.response_box.insertPlainText(text)
+
+    def on_request_finished(self, request_id, response):
+        """A request finished; earlier requests superseded by a follow-up are ignored"""
+        if request_id != self.active_request:
+            return
+        self.show_response(response if response else self.tool.request_failure_message(request_id))
 
     def show_response(self, response):
-        self.tool.current_response = response
         self.response_box.setPlainText(response)
         self.update_button_states()
 
@@ -409,12 +422,14 @@ class GeminiGUI(QWidget):
         self.notification.show_notification("✅ Response ready to paste!", 3000)
 
     def stop_tool(self):
-        self.refresh_timer.stop()
+        self.tool_events.close()
+        self.ask_bridge.close()
         self.tool.exit_program()
         self.close()
 
     def update_button_states(self):
         """Update button colors based on current tool state"""
+        self._button_state = (self.tool.collecting, bool(self.tool.current_response))
         # Update Start button
         if self.tool.collecting:
             self.start_btn.setText("🟢 Active")
@@ -507,17 +522,21 @@ class GeminiGUI(QWidget):
                 }
             """)
 
+    def on_tool_event(self, event):
+        """Tool state changed (buffer, collecting, response or typing progress)"""
+        self.refresh_ui()
+
     def refresh_ui(self):
-        self.buffer_list.clear()
-        for i, item in enumerate(self.tool.clipboard_buffer, 1):
-            preview = item[:80] + "..." if len(item) > 80 else item
-            self.buffer_list.addItem(f"{i}. {preview}")
+        # Only appended rows are inserted; an unchanged buffer is a no-op
+        self.buffer_model.sync()
 
-        # Update button states whenever UI refreshes
-        self.update_button_states()
+        # Restyle buttons only when the state they reflect has changed
+        if (self.tool.collecting, bool(self.tool.current_response)) != self._button_state:
+            self.update_button_states()
 
     def closeEvent(self, event):
-        self.refresh_timer.stop()
+        self.tool_events.close()
+        self.ask_bridge.close()
         self.tool.exit_program()
         event.accept()
 
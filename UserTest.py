@@ -1,29 +1,124 @@
+import os
 import sys
+import time
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-    QLabel, QTextEdit, QFrame, QListWidget, QGraphicsDropShadowEffect
+    QLabel, QTextEdit, QFrame, QListView, QGraphicsDropShadowEffect, QLineEdit
 )
 
 from PyQt6.QtWidgets import QSystemTrayIcon
 from PyQt6.QtGui import QIcon
 
 
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
-from PyQt6.QtGui import QFont, QColor
+from PyQt6.QtCore import Qt, QTimer, QEvent, QRectF
+from PyQt6.QtGui import (QFont, QColor, QTextCursor, QLinearGradient, QBrush, QPainter, QRegion,
+                         QKeySequence, QShortcut)
 
+import events
+from env_settings import env_float
+from qt_models import AskBridge, BufferListModel, SearchResultsModel, ToolEventBridge
 from pass60 import ClipboardGeminiTool  # <- adjust if file renamed
 
 
-class GeminiWorker(QThread):
-    finished = pyqtSignal(str)
-
-    def __init__(self, tool: ClipboardGeminiTool):
-        super().__init__()
-        self.tool = tool
-
-    def run(self):
-        response = self.tool.send_to_gemini()
-        self.finished.emit(response if response else "❌ Failed to get response from Gemini.")
+# Rainbow border: frame budget in frames per second (PASS60_BORDER_FPS) and a
+# static border for terminal-server users (--reduced-motion or
+# PASS60_REDUCED_MOTION=1)
+
+
+BORDER_FPS = env_float("PASS60_BORDER_FPS", 20.0, lambda fps: fps > 0)
+REDUCED_MOTION = "--reduced-motion" in sys.argv or bool(os.getenv("PASS60_REDUCED_MOTION"))
+BORDER_WIDTH = 4
+BORDER_RADIUS = 18
+BORDER_HUE_STEP = 5
+BORDER_HUE_PER_SEC = 100  # 5 degrees every 50 ms
+
+# Button themes are built once. Each stylesheet covers every state of its
+# button through the dynamic "state" property, so state changes only need a
+# property flip and repolish instead of reparsing a new stylesheet.
+ADD_BTN_STYLE = """
+    QPushButton {
+        background: qlineargradient(
+            x1:0, y1:0, x2:1, y2:0,
+            stop:0 #667eea,
+            stop:1 #764ba2
+        );
+        color: white;
+        padding: 8px 16px;
+        border-radius: 10px;
+        border: none;
+    }
+    QPushButton:hover {
+        background: qlineargradient(
+            x1:0, y1:0, x2:1, y2:0,
+            stop:0 #764ba2,
+            stop:1 #667eea
+        );
+    }
+    QPushButton[state="active"], QPushButton[state="active"]:hover {
+        background: qlineargradient(
+            x1:0, y1:0, x2:1, y2:0,
+            stop:0 #4facfe,
+            stop:1 #00f2fe
+        );
+    }
+"""
+
+RESP_BTN_STYLE = """
+    QPushButton {
+        background: rgba(255, 255, 255, 0.1);
+        color: white;
+        padding: 8px 16px;
+        border-radius: 10px;
+        border: 1px solid rgba(255, 255, 255, 0.2);
+    }
+    QPushButton:hover {
+        background: rgba(255, 255, 255, 0.2);
+    }
+    QPushButton[state="pending"], QPushButton[state="pending"]:hover {
+        background: qlineargradient(
+            x1:0, y1:0, x2:1, y2:0,
+            stop:0 #f093fb,
+            stop:1 #f5576c
+        );
+        border: none;
+    }
+    QPushButton[state="ready"], QPushButton[state="ready"]:hover {
+        background: qlineargradient(
+            x1:0, y1:0, x2:1, y2:0,
+            stop:0 #56ab2f,
+            stop:1 #a8e063
+        );
+        border: none;
+    }
+"""
+
+START_BTN_STYLE = """
+    QPushButton {
+        background: qlineargradient(
+            x1:0, y1:0, x2:1, y2:0,
+            stop:0 #11998e,
+            stop:1 #38ef7d
+        );
+        color: white;
+        padding: 12px;
+        border-radius: 12px;
+        border: none;
+    }
+    QPushButton:hover {
+        background: qlineargradient(
+            x1:0, y1:0, x2:1, y2:0,
+            stop:0 #38ef7d,
+            stop:1 #11998e
+        );
+    }
+    QPushButton[state="active"], QPushButton[state="active"]:hover {
+        background: qlineargradient(
+            x1:0, y1:0, x2:1, y2:0,
+            stop:0 #56ab2f,
+            stop:1 #a8e063
+        );
+    }
+"""
 
 
 class GeminiGUI(QWidget):
@@ -35,6 +130,9 @@ class GeminiGUI(QWidget):
         # Initialize border colors
         self.hue = 0
 
+        # Count of stylesheet recomputations (see --style-benchmark)
+        self.style_recomputations = 0
+
         # Main container for border effect
         self.setStyleSheet("background: transparent;")
 
@@ -112,9 +210,13 @@ class GeminiGUI(QWidget):
         buffer_label.setStyleSheet("color: rgba(255, 255, 255, 0.9); padding: 3px;")
         buffer_layout.addWidget(buffer_label)
 
-        self.buffer_list = QListWidget()
+        self.buffer_model = BufferListModel(self.tool, preview_length=60)
+        self._button_state = None
+        self.buffer_list = QListView()
+        self.buffer_list.setModel(self.buffer_model)
+        self.buffer_list.setUniformItemSizes(True)
         self.buffer_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background: rgba(0, 0, 0, 0.3);
                 color: #e0e0e0;
                 border: 1px solid rgba(255, 255, 255, 0.1);
@@ -122,11 +224,11 @@ class GeminiGUI(QWidget):
                 padding: 6px;
                 font-size: 9px;
             }
-            QListWidget::item {
+            QListView::item {
                 padding: 4px;
                 border-radius: 4px;
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background: rgba(102, 126, 234, 0.3);
             }
         """)
@@ -139,26 +241,7 @@ class GeminiGUI(QWidget):
 
         add_btn = QPushButton("Add")
         add_btn.setFont(QFont("Segoe UI", 9, QFont.Weight.Bold))
-        add_btn.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(
-                    x1:0, y1:0, x2:1, y2:0,
-                    stop:0 #667eea,
-                    stop:1 #764ba2
-                );
-                color: white;
-                padding: 8px 16px;
-                border-radius: 10px;
-                border: none;
-            }
-            QPushButton:hover {
-                background: qlineargradient(
-                    x1:0, y1:0, x2:1, y2:0,
-                    stop:0 #764ba2,
-                    stop:1 #667eea
-                );
-            }
-        """)
+        add_btn.setStyleSheet(ADD_BTN_STYLE)
         add_btn.clicked.connect(self.add_to_buffer)
 
         add_shadow = QGraphicsDropShadowEffect()
@@ -170,18 +253,7 @@ class GeminiGUI(QWidget):
 
         resp_btn = QPushButton("Get Response")
         resp_btn.setFont(QFont("Segoe UI", 9, QFont.Weight.Bold))
-        resp_btn.setStyleSheet("""
-            QPushButton {
-                background: rgba(255, 255, 255, 0.1);
-                color: white;
-                padding: 8px 16px;
-                border-radius: 10px;
-                border: 1px solid rgba(255, 255, 255, 0.2);
-            }
-            QPushButton:hover {
-                background: rgba(255, 255, 255, 0.2);
-            }
-        """)
+        resp_btn.setStyleSheet(RESP_BTN_STYLE)
         resp_btn.clicked.connect(self.get_response)
         btn_row.addWidget(resp_btn)
         buffer_layout.addLayout(btn_row)
@@ -191,32 +263,58 @@ class GeminiGUI(QWidget):
         self.resp_btn = resp_btn
         left_column.addWidget(buffer_frame)
 
+        # History search panel, shown with Ctrl+F
+        self.search_frame = QFrame()
+        self.search_frame.setStyleSheet("""
+            QFrame {
+                background: rgba(255, 255, 255, 0.05);
+                border-radius: 12px;
+            }
+        """)
+        search_layout = QVBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search history (Enter to add the top result)")
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                background: rgba(0, 0, 0, 0.3);
+                color: #e0e0e0;
+                border: 1px solid rgba(255, 255, 255, 0.1);
+                border-radius: 6px;
+                padding: 4px;
+                font-size: 9px;
+            }
+        """)
+        self.search_input.textChanged.connect(self.run_search)
+        self.search_input.returnPressed.connect(lambda: self.add_search_result(self.search_model.index(0)))
+        search_layout.addWidget(self.search_input)
+
+        self.search_status = QLabel("")
+        self.search_status.setStyleSheet("color: rgba(255, 255, 255, 0.6); font-size: 8px;")
+        search_layout.addWidget(self.search_status)
+
+        self.search_model = SearchResultsModel(self)
+        self.search_list = QListView()
+        self.search_list.setModel(self.search_model)
+        self.search_list.setUniformItemSizes(True)
+        self.search_list.setStyleSheet(self.buffer_list.styleSheet())
+        self.search_list.setMaximumHeight(100)
+        self.search_list.activated.connect(self.add_search_result)
+        search_layout.addWidget(self.search_list)
+
+        self.search_frame.setLayout(search_layout)
+        self.search_frame.hide()
+        left_column.addWidget(self.search_frame)
+        QShortcut(QKeySequence("Ctrl+F"), self, activated=self.toggle_search)
+        QShortcut(QKeySequence("Escape"), self.search_input, activated=self.search_frame.hide,
+                  context=Qt.ShortcutContext.WidgetShortcut)
+
         # Bottom buttons
         bottom_row = QHBoxLayout()
         bottom_row.setSpacing(8)
 
         self.start_btn = QPushButton("Start")
         self.start_btn.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
-        self.start_btn.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(
-                    x1:0, y1:0, x2:1, y2:0,
-                    stop:0 #11998e,
-                    stop:1 #38ef7d
-                );
-                color: white;
-                padding: 12px;
-                border-radius: 12px;
-                border: none;
-            }
-            QPushButton:hover {
-                background: qlineargradient(
-                    x1:0, y1:0, x2:1, y2:0,
-                    stop:0 #38ef7d,
-                    stop:1 #11998e
-                );
-            }
-        """)
+        self.start_btn.setStyleSheet(START_BTN_STYLE)
         self.start_btn.clicked.connect(self.start_collecting)
 
         start_shadow = QGraphicsDropShadowEffect()
@@ -394,36 +492,87 @@ class GeminiGUI(QWidget):
         outer_layout.addWidget(main_container)
         self.setLayout(outer_layout)
 
-        # Set up timers
-        self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.refresh_ui)
-        self.refresh_timer.start(1000)
-
-        # Rainbow border animation
-        self.border_timer = QTimer()
+        # Refresh when the tool publishes a change instead of polling it
+        self.tool_events = ToolEventBridge(self.tool.events, self)
+        self.tool_events.event.connect(self.on_tool_event)
+
+        # Model requests run on an asyncio loop; only the latest one is shown
+        self.ask_bridge = AskBridge(self.tool, self)
+        self.ask_bridge.chunk.connect(self.append_chunk)
+        self.ask_bridge.finished.connect(self.on_request_finished)
+        self.active_request = None
+
+        # Rainbow border, painted in paintEvent from cached gradients. The
+        # timer only runs while the window is visible and focused.
+        self.reduced_motion = REDUCED_MOTION
+        self.border_frames = 0
+        self._border_brushes = {}
+        self._border_region = None
+        self.border_timer = QTimer(self)
+        self.border_timer.setInterval(int(1000 / max(BORDER_FPS, 1)))
         self.border_timer.timeout.connect(self.animate_border)
-        self.border_timer.start(50)
 
 
 
+    def border_brush(self, hue):
+        """Gradient brush for a hue step, built once and reused"""
+        brush = self._border_brushes.get(hue)
+        if brush is None:
+            gradient = QLinearGradient(0, 0, 1, 1)
+            gradient.setCoordinateMode(QLinearGradient.CoordinateMode.ObjectBoundingMode)
+            gradient.setColorAt(0, QColor.fromHsv(hue, 255, 255))
+            gradient.setColorAt(0.5, QColor.fromHsv((hue + 60) % 360, 255, 255))
+            gradient.setColorAt(1, QColor.fromHsv((hue + 120) % 360, 255, 255))
+            brush = self._border_brushes[hue] = QBrush(gradient)
+        return brush
+
     def animate_border(self):
-        """Animate rainbow border"""
-        self.hue = (self.hue + 5) % 360
-        color1 = QColor.fromHsv(self.hue, 255, 255)
-        color2 = QColor.fromHsv((self.hue + 60) % 360, 255, 255)
-        color3 = QColor.fromHsv((self.hue + 120) % 360, 255, 255)
-
-        self.setStyleSheet(f"""
-            QWidget {{
-                background: qlineargradient(
-                    x1:0, y1:0, x2:1, y2:1,
-                    stop:0 {color1.name()},
-                    stop:0.5 {color2.name()},
-                    stop:1 {color3.name()}
-                );
-                border-radius: 18px;
-            }}
-        """)
+        """Advance the rainbow border and repaint only the border ring"""
+        # Hue follows the clock, so dropped frames never slow the rotation
+        hue = int(time.monotonic() * BORDER_HUE_PER_SEC) // BORDER_HUE_STEP * BORDER_HUE_STEP % 360
+        if hue == self.hue:
+            return
+        self.hue = hue
+        if self._border_region is None:
+            outer = self.rect()
+            inner = outer.adjusted(BORDER_WIDTH, BORDER_WIDTH, -BORDER_WIDTH, -BORDER_WIDTH)
+            self._border_region = QRegion(outer).subtracted(QRegion(inner))
+        self.update(self._border_region)
+
+    def update_border_animation(self):
+        """Run the border timer only while the window is shown, focused and motion is allowed"""
+        animate = (not self.reduced_motion and self.isVisible()
+                   and self.isActiveWindow() and not self.isMinimized())
+        if animate and not self.border_timer.isActive():
+            self.border_timer.start()
+        elif not animate and self.border_timer.isActive():
+            self.border_timer.stop()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(self.border_brush(self.hue))
+        painter.drawRoundedRect(QRectF(self.rect()), BORDER_RADIUS, BORDER_RADIUS)
+        painter.end()
+        self.border_frames += 1
+
+    def resizeEvent(self, event):
+        self._border_region = None
+        super().resizeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_border_animation()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_border_animation()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() in (QEvent.Type.ActivationChange, QEvent.Type.WindowStateChange):
+            self.update_border_animation()
 
     def start_collecting(self):
         self.tool.start_collecting()
@@ -435,6 +584,38 @@ class GeminiGUI(QWidget):
         self.update_button_states()
         self.refresh_ui()
 
+    def toggle_search(self):
+        """Show the history search panel focused, or hide it"""
+        if self.search_frame.isVisible():
+            self.search_frame.hide()
+            return
+        self.search_frame.show()
+        self.search_input.setFocus()
+        self.search_input.selectAll()
+        self.run_search(self.search_input.text())
+
+    def run_search(self, query):
+        """Search history as the query is typed"""
+        # Never build the index on the GUI thread; HISTORY_INDEXED reruns the search when it is ready
+        hits = self.tool.search_history(query, wait=False) if query.strip() else []
+        self.search_model.set_hits(hits)
+        index = self.tool.history_index
+        if query.strip() and not index.built:
+            self.search_status.setText("Indexing history...")
+        elif query.strip():
+            self.search_status.setText(f"{len(hits)} results in {index.last_query_ms:.2f} ms "
+                                       f"· {len(index)} items indexed")
+        else:
+            self.search_status.setText("")
+
+    def add_search_result(self, model_index):
+        """Add the chosen history item to the buffer"""
+        if not model_index.isValid():
+            return
+        self.tool.add_search_hit(self.search_model.hits[model_index.row()])
+        self.update_button_states()
+        self.refresh_ui()
+
     def get_response(self):
         if not self.tool.clipboard_buffer:
             self.response_box.setPlainText("No items in buffer. Add some items first!")
@@ -445,25 +626,28 @@ class GeminiGUI(QWidget):
         # 🔔 Show popup when sending
         self.tray_icon.showMessage("Gemini", "✅ Sent to Gemini", QSystemTrayIcon.MessageIcon.Information)
 
-        self.resp_btn.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(
-                    x1:0, y1:0, x2:1, y2:0,
-                    stop:0 #f093fb,
-                    stop:1 #f5576c
-                );
-                color: white;
-                padding: 8px 16px;
-                border-radius: 10px;
-                border: none;
-            }
-        """)
-        self.worker = GeminiWorker(self.tool)
-        self.worker.finished.connect(self.show_response)
-        self.worker.start()
+        self.set_button_state(self.resp_btn, self.resp_btn.text(), "pending")
+        # A follow-up may be sent while an earlier answer is still generating
+        self.stream_started = False
+        self.active_request = self.ask_bridge.ask()
+
+    def append_chunk(self, request_id, text):
+        """Append a streamed response chunk to the response box"""
+        if request_id != self.active_request:
+            return
+        if not self.stream_started:
+            self.stream_started = True
+            self.response_box.clear()
+        self.response_box.moveCursor(QTextCursor.MoveOperation.End)
+        self.response_box.insertPlainText(text)
+
+    def on_request_finished(self, request_id, response):
+        """A request finished; earlier requests superseded by a follow-up are ignored"""
+        if request_id != self.active_request:
+            return
+        self.show_response(response if response else self.tool.request_failure_message(request_id))
 
     def show_response(self, response):
-        self.tool.current_response = response
         self.response_box.setPlainText(response)
 
         # 🔔 Show popup when response is ready
@@ -472,137 +656,89 @@ class GeminiGUI(QWidget):
         self.update_button_states()
 
     def stop_tool(self):
-        self.refresh_timer.stop()
+        self.tool_events.close()
+        self.ask_bridge.close()
         self.border_timer.stop()
         self.tool.exit_program()
         self.close()
 
+    def set_button_state(self, button, text, state):
+        """Switch a themed button's text and state, touching it only on real changes"""
+        if button.text() != text:
+            button.setText(text)
+        if button.property("state") != state:
+            button.setProperty("state", state)
+            button.style().unpolish(button)
+            button.style().polish(button)
+            self.style_recomputations += 1
+
     def update_button_states(self):
         """Update button colors based on current tool state"""
-        if self.tool.collecting:
-            self.start_btn.setText("🟢 Active")
-            self.start_btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:0,
-                        stop:0 #56ab2f,
-                        stop:1 #a8e063
-                    );
-                    color: white;
-                    padding: 12px;
-                    border-radius: 12px;
-                    border: none;
-                }
-            """)
-        else:
-            self.start_btn.setText("Start")
-            self.start_btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:0,
-                        stop:0 #11998e,
-                        stop:1 #38ef7d
-                    );
-                    color: white;
-                    padding: 12px;
-                    border-radius: 12px;
-                    border: none;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:0,
-                        stop:0 #38ef7d,
-                        stop:1 #11998e
-                    );
-                }
-            """)
-
-        if self.tool.current_response:
-            self.resp_btn.setText("Response Ready")
-            self.resp_btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:0,
-                        stop:0 #56ab2f,
-                        stop:1 #a8e063
-                    );
-                    color: white;
-                    padding: 8px 16px;
-                    border-radius: 10px;
-                    border: none;
-                }
-            """)
-        else:
-            self.resp_btn.setText("Get Response")
-            self.resp_btn.setStyleSheet("""
-                QPushButton {
-                    background: rgba(255, 255, 255, 0.1);
-                    color: white;
-                    padding: 8px 16px;
-                    border-radius: 10px;
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                }
-                QPushButton:hover {
-                    background: rgba(255, 255, 255, 0.2);
-                }
-            """)
-
-        if self.tool.collecting:
-            self.add_btn.setText("Auto-Adding")
-            self.add_btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:0,
-                        stop:0 #4facfe,
-                        stop:1 #00f2fe
-                    );
-                    color: white;
-                    padding: 8px 16px;
-                    border-radius: 10px;
-                    border: none;
-                }
-            """)
-        else:
-            self.add_btn.setText("Add")
-            self.add_btn.setStyleSheet("""
-                QPushButton {
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:0,
-                        stop:0 #667eea,
-                        stop:1 #764ba2
-                    );
-                    color: white;
-                    padding: 8px 16px;
-                    border-radius: 10px;
-                    border: none;
-                }
-                QPushButton:hover {
-                    background: qlineargradient(
-                        x1:0, y1:0, x2:1, y2:0,
-                        stop:0 #764ba2,
-                        stop:1 #667eea
-                    );
-                }
-            """)
+        state = self.tool.state.values()
+        collecting = state["collecting"]
+        has_response = bool(state["current_response"])
+        self._button_state = (collecting, has_response)
+
+        self.set_button_state(self.start_btn, "🟢 Active" if collecting else "Start",
+                              "active" if collecting else "idle")
+        self.set_button_state(self.resp_btn, "Response Ready" if has_response else "Get Response",
+                              "ready" if has_response else "idle")
+        self.set_button_state(self.add_btn, "Auto-Adding" if collecting else "Add",
+                              "active" if collecting else "idle")
+
+    def on_tool_event(self, event):
+        """Tool state changed (buffer, collecting, response or typing progress)"""
+        if event.type == events.HISTORY_INDEXED:
+            if self.search_frame.isVisible():
+                self.run_search(self.search_input.text())
+            return
+        self.refresh_ui()
 
     def refresh_ui(self):
-        self.buffer_list.clear()
-        for i, item in enumerate(self.tool.clipboard_buffer, 1):
-            preview = item[:60] + "..." if len(item) > 60 else item
-            self.buffer_list.addItem(f"{i}. {preview}")
-        self.update_button_states()
+        # Only appended rows are inserted; an unchanged buffer is a no-op
+        self.buffer_model.sync()
+
+        # Restyle buttons only when the state they reflect has changed
+        state = self.tool.state.values()
+        if (state["collecting"], bool(state["current_response"])) != self._button_state:
+            self.update_button_states()
 
     def closeEvent(self, event):
-        self.refresh_timer.stop()
+        self.tool_events.close()
+        self.ask_bridge.close()
         self.border_timer.stop()
         self.tool.exit_program()
         event.accept()
 
 
+def style_benchmark_seconds():
+    """Seconds to run for --style-benchmark[=SECONDS], or None"""
+    for arg in sys.argv[1:]:
+        if arg == "--style-benchmark":
+            return 60
+        if arg.startswith("--style-benchmark="):
+            return int(arg.split("=", 1)[1])
+    return None
+
+
 def main():
     app = QApplication(sys.argv)
     gui = GeminiGUI()
     gui.show()
+
+    # Micro-benchmark: count style recomputations while the window sits idle
+    seconds = style_benchmark_seconds()
+    if seconds:
+        def report():
+            per_minute = gui.style_recomputations * 60 / seconds
+            print(f"⏱️  {gui.style_recomputations} style recomputations in {seconds}s idle "
+                  f"({per_minute:.0f}/min), {gui.border_frames} border frames painted")
+            app.quit()
+
+        gui.style_recomputations = 0
+        gui.border_frames = 0
+        QTimer.singleShot(seconds * 1000, report)
+
     sys.exit(app.exec())
 
 
@@ -0,0 +1,176 @@
+import asyncio
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from env_settings import env_float, env_int
+
+
+# Request states
+PENDING = "pending"
+STREAMING = "streaming"
+DONE = "done"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+
+FINISHED_STATES = (DONE, CANCELLED, TIMED_OUT, FAILED)
+
+
+class RequestCancelled(Exception):
+    """Raised inside a blocking model call that was cancelled between chunks"""
+
+
+class RequestTimedOut(Exception):
+    """Raised inside a blocking model call that ran past its deadline"""
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """Seconds until a time.monotonic() deadline (None for none); raises RequestTimedOut once it has passed"""
+    if deadline is None:
+        return None
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise RequestTimedOut()
+    return left
+
+
+class RequestPolicy:
+    """Deadline and retry settings for model calls.
+
+    Transient errors are retried with full-jitter exponential backoff, but
+    only before the first chunk of the answer has been delivered, since
+    streamed text cannot be taken back.
+    """
+
+    def __init__(self, timeout: float = 60.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @classmethod
+    def from_env(cls) -> "RequestPolicy":
+        """PASS60_REQUEST_TIMEOUT (seconds, 0 = none) and PASS60_MAX_RETRIES"""
+        return cls(timeout=env_float("PASS60_REQUEST_TIMEOUT", 60.0),
+                   max_retries=env_int("PASS60_MAX_RETRIES", 3))
+
+    def deadline(self) -> Optional[float]:
+        """time.monotonic() deadline for a call starting now, or None without a timeout"""
+        return time.monotonic() + self.timeout if self.timeout else None
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+
+class RequestCounters:
+    """Thread-safe tallies of timeouts, retries and cancellations"""
+
+    NAMES = ("timeouts", "retries", "cancellations")
+
+    def __init__(self):
+        self._counts = dict.fromkeys(self.NAMES, 0)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+
+class AskRequest:
+    """One ask: a snapshot of the buffer items and the state of its answer"""
+
+    def __init__(self, request_id: int, items: List[str]):
+        self.id = request_id
+        self.items = items
+        self.status = PENDING
+        self.response = ""
+        self.cached = False
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def attach(self):
+        """Bind the request to the task running it; call from inside that task"""
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        if self.cancel_requested:
+            raise asyncio.CancelledError()
+
+    def cancel(self) -> bool:
+        """Cancel the request. Safe to call from any thread"""
+        if self.finished:
+            return False
+        # attach() checks the flag after binding the task, so a cancel that
+        # races with the request starting is never lost
+        self.cancel_requested = True
+        if self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        return True
+
+    def finish(self, status: str, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+
+    def __repr__(self):
+        return f"AskRequest(#{self.id}, {self.status}, {len(self.items)} items)"
+
+
+class RequestRegistry:
+    """Thread-safe table of ask requests by id.
+
+    Only the most recent `keep` finished requests are remembered; requests
+    that are still running are never dropped.
+    """
+
+    def __init__(self, keep: int = 50):
+        self.keep = keep
+        self._requests: "OrderedDict[int, AskRequest]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(self, items: List[str]) -> AskRequest:
+        request = AskRequest(next(self._ids), items)
+        with self._lock:
+            self._requests[request.id] = request
+            self._forget_finished()
+        return request
+
+    def get(self, request_id: int) -> Optional[AskRequest]:
+        with self._lock:
+            return self._requests.get(request_id)
+
+    def active(self) -> List[AskRequest]:
+        """Requests that have not finished yet, oldest first"""
+        with self._lock:
+            return [r for r in self._requests.values() if not r.finished]
+
+    def cancel(self, request_id: int) -> bool:
+        request = self.get(request_id)
+        return request.cancel() if request else False
+
+    def cancel_all(self) -> int:
+        """Cancel every running request; returns how many were cancelled"""
+        return sum(request.cancel() for request in self.active())
+
+    def _forget_finished(self):
+        finished = [rid for rid, r in self._requests.items() if r.finished]
+        for rid in finished[:max(len(finished) - self.keep, 0)]:
+            del self._requests[rid]
@@ -0,0 +1,271 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from typing import AsyncIterator, Iterator, Optional
+
+from env_settings import env_float, env_int
+from startup import lazy_import, phase
+
+genai = lazy_import("google.generativeai")
+
+
+class BackendError(Exception):
+    """Raised when a model backend cannot be configured"""
+
+
+class TransientBackendError(Exception):
+    """A model call failed in a way that is worth retrying"""
+
+
+# google.api_core exception names for overload, rate limits and server errors;
+# matched by name so the SDK does not have to be imported to classify errors
+TRANSIENT_ERROR_NAMES = {
+    "ServiceUnavailable", "TooManyRequests", "ResourceExhausted",
+    "InternalServerError", "DeadlineExceeded", "GatewayTimeout",
+}
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed model call should be retried"""
+    if isinstance(error, (TransientBackendError, ConnectionError, TimeoutError)):
+        return True
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+class ModelBackend:
+    """Interface every model backend implements.
+
+    generate() returns the full answer, stream() yields text chunks, and
+    generate_async() / stream_async() are their asyncio flavours. If a
+    `usage` dict is passed it is filled with the prompt_tokens and
+    output_tokens the model reports. The blocking calls take a `timeout`
+    in seconds (None = no limit) and raise TimeoutError once it is spent,
+    including while waiting for the first chunk.
+    """
+
+    name = "base"
+    display_name = "Model"
+
+    def __init__(self, model_name: str = ""):
+        self.model_name = model_name
+
+    def warm_up(self):
+        """Do any expensive one-off setup ahead of the first request"""
+
+    def generate(self, prompt: str, usage: Optional[dict] = None, timeout: Optional[float] = None) -> str:
+        return "".join(self.stream(prompt, usage, timeout))
+
+    def stream(self, prompt: str, usage: Optional[dict] = None,
+               timeout: Optional[float] = None) -> Iterator[str]:
+        raise NotImplementedError
+
+    async def generate_async(self, prompt: str, usage: Optional[dict] = None) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, prompt, usage)
+
+    async def stream_async(self, prompt: str, usage: Optional[dict] = None) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        iterator = iter(self.stream(prompt, usage))
+        sentinel = object()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, iterator, sentinel)
+                if chunk is sentinel:
+                    break
+                yield chunk
+        finally:
+            # Stop the blocking stream when the consumer is cancelled
+            close = getattr(iterator, "close", None)
+            if close:
+                try:
+                    close()
+                except ValueError:
+                    pass  # still running in the executor; it is dropped when done
+
+
+class GeminiBackend(ModelBackend):
+    """Google Gemini via google-generativeai.
+
+    The SDK import and GenerativeModel construction are deferred until the
+    model is first needed (or warm_up() is called).
+    """
+
+    name = "gemini"
+    display_name = "Gemini 2.5 Flash"
+
+    def __init__(self, model_name: str = "gemini-2.5-flash", api_key: Optional[str] = None):
+        super().__init__(model_name)
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise BackendError("GEMINI_API_KEY environment variable not set!")
+        self._api_key = api_key
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    with phase("gemini model init"):
+                        genai.configure(api_key=self._api_key)
+                        self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        self.model
+
+    @staticmethod
+    def _record_usage(response, usage: Optional[dict]):
+        metadata = getattr(response, "usage_metadata", None)
+        if usage is not None and metadata:
+            usage["prompt_tokens"] = metadata.prompt_token_count
+            usage["output_tokens"] = metadata.candidates_token_count
+
+    @staticmethod
+    def _request_options(timeout: Optional[float]) -> Optional[dict]:
+        # The SDK enforces this on the underlying RPC, so a stalled call raises DeadlineExceeded
+        return {"timeout": timeout} if timeout else None
+
+    def generate(self, prompt: str, usage: Optional[dict] = None, timeout: Optional[float] = None) -> str:
+        response = self.model.generate_content(prompt, request_options=self._request_options(timeout))
+        self._record_usage(response, usage)
+        return response.text
+
+    def stream(self, prompt: str, usage: Optional[dict] = None,
+               timeout: Optional[float] = None) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True,
+                                                 request_options=self._request_options(timeout)):
+            # Each chunk carries running totals; the last one is final
+            self._record_usage(chunk, usage)
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata)
+                continue
+            if text:
+                yield text
+
+    async def generate_async(self, prompt: str, usage: Optional[dict] = None) -> str:
+        response = await self.model.generate_content_async(prompt)
+        self._record_usage(response, usage)
+        return response.text
+
+    async def stream_async(self, prompt: str, usage: Optional[dict] = None) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            self._record_usage(chunk, usage)
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+
+class LocalEchoBackend(ModelBackend):
+    """Deterministic offline stand-in that echoes the prompt back.
+
+    Simulates model timing with a fixed first-chunk latency and a steady
+    output rate, so the tool's own overhead can be measured in isolation.
+    The first `transient_failures` calls fail with a TransientBackendError
+    to exercise retries. Token usage is counted as words and punctuation.
+    """
+
+    name = "local"
+    display_name = "Local echo"
+
+    def __init__(self, first_chunk_latency: float = 0.0, chars_per_sec: float = 0.0,
+                 chunk_size: int = 32, transient_failures: int = 0):
+        super().__init__("local-echo")
+        self.first_chunk_latency = first_chunk_latency
+        self.chars_per_sec = chars_per_sec
+        self.chunk_size = max(chunk_size, 1)
+        self.transient_failures = transient_failures
+        self._failures_lock = threading.Lock()
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        return len(re.findall(r"\w+|[^\w\s]", text))
+
+    def reply_for(self, prompt: str, usage: Optional[dict] = None) -> str:
+        with self._failures_lock:
+            if self.transient_failures > 0:
+                self.transient_failures -= 1
+                raise TransientBackendError("simulated overload")
+        reply = f"Echo ({len(prompt)} chars):\n{prompt}"
+        if usage is not None:
+            usage["prompt_tokens"] = self.count_tokens(prompt)
+            usage["output_tokens"] = self.count_tokens(reply)
+        return reply
+
+    @staticmethod
+    def _sleep(delay: float, deadline: Optional[float]):
+        """Simulated model time, cut short with TimeoutError at the deadline like a real RPC"""
+        if deadline is not None and time.monotonic() + delay > deadline:
+            time.sleep(max(deadline - time.monotonic(), 0))
+            raise TimeoutError("local echo call timed out")
+        time.sleep(delay)
+
+    def generate(self, prompt: str, usage: Optional[dict] = None, timeout: Optional[float] = None) -> str:
+        deadline = time.monotonic() + timeout if timeout else None
+        reply = self.reply_for(prompt, usage)
+        delay = self.first_chunk_latency
+        if self.chars_per_sec:
+            delay += len(reply) / self.chars_per_sec
+        if delay:
+            self._sleep(delay, deadline)
+        return reply
+
+    def stream(self, prompt: str, usage: Optional[dict] = None,
+               timeout: Optional[float] = None) -> Iterator[str]:
+        deadline = time.monotonic() + timeout if timeout else None
+        reply = self.reply_for(prompt, usage)
+        if self.first_chunk_latency:
+            self._sleep(self.first_chunk_latency, deadline)
+        for start in range(0, len(reply), self.chunk_size):
+            chunk = reply[start:start + self.chunk_size]
+            if self.chars_per_sec and start:
+                self._sleep(len(chunk) / self.chars_per_sec, deadline)
+            yield chunk
+
+    async def generate_async(self, prompt: str, usage: Optional[dict] = None) -> str:
+        reply = self.reply_for(prompt, usage)
+        delay = self.first_chunk_latency
+        if self.chars_per_sec:
+            delay += len(reply) / self.chars_per_sec
+        if delay:
+            await asyncio.sleep(delay)
+        return reply
+
+    async def stream_async(self, prompt: str, usage: Optional[dict] = None) -> AsyncIterator[str]:
+        reply = self.reply_for(prompt, usage)
+        if self.first_chunk_latency:
+            await asyncio.sleep(self.first_chunk_latency)
+        for start in range(0, len(reply), self.chunk_size):
+            chunk = reply[start:start + self.chunk_size]
+            if self.chars_per_sec and start:
+                await asyncio.sleep(len(chunk) / self.chars_per_sec)
+            yield chunk
+
+
+def create_backend(kind: Optional[str] = None) -> ModelBackend:
+    """Build the backend named by kind or PASS60_BACKEND ('gemini' or 'local').
+
+    The local backend reads PASS60_LOCAL_LATENCY (seconds before the first
+    chunk), PASS60_LOCAL_CPS (output chars/sec, 0 = instant) and
+    PASS60_LOCAL_FAILURES (calls that fail transiently before succeeding).
+    """
+    kind = (kind or os.getenv("PASS60_BACKEND") or GeminiBackend.name).lower()
+
+    if kind == LocalEchoBackend.name:
+        return LocalEchoBackend(
+            first_chunk_latency=env_float("PASS60_LOCAL_LATENCY", 0.0),
+            chars_per_sec=env_float("PASS60_LOCAL_CPS", 0.0),
+            transient_failures=env_int("PASS60_LOCAL_FAILURES", 0),
+        )
+    if kind == GeminiBackend.name:
+        return GeminiBackend()
+    raise BackendError(f"Unknown backend '{kind}' (expected 'gemini' or 'local')")
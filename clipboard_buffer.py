@@ -0,0 +1,261 @@
+import atexit
+import hashlib
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from env_settings import env_int
+
+
+# Outcome of ClipboardBuffer.append()
+ADDED = "added"
+DUPLICATE = "duplicate"  # the same text is already in the buffer
+TOO_LARGE = "too_large"  # the item alone is over the byte cap
+
+PREVIEW_CHARS = 200
+
+
+class SpilledItem:
+    """Handle for an item kept in a temp file; only its length and a preview stay in memory.
+
+    The file is removed once the last handle is gone, so a request still
+    holding the item can read it after the buffer has dropped it.
+    """
+
+    __slots__ = ("path", "length", "size", "digest", "preview")
+
+    def __init__(self, path: str, text: str, data: bytes, digest: bytes):
+        with open(path, "wb") as f:
+            f.write(data)
+        self.path = path
+        self.length = len(text)
+        self.size = len(data)
+        self.digest = digest
+        self.preview = text[:PREVIEW_CHARS]
+
+    def read(self) -> str:
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __del__(self):
+        try:
+            os.remove(self.path)
+        except (OSError, TypeError):
+            pass
+
+    def __repr__(self):
+        return f"SpilledItem({self.length} chars, {self.preview[:20]!r}...)"
+
+
+Item = Union[str, SpilledItem]
+
+
+def item_text(item: Item) -> str:
+    """The full text of a buffer item, read back from disk if it was spilled"""
+    return item.read() if isinstance(item, SpilledItem) else item
+
+
+def item_preview(item: Item, length: int) -> str:
+    """The first `length` characters of an item, with "..." if it is longer"""
+    head = item.preview if isinstance(item, SpilledItem) else item
+    return head[:length] + "..." if len(item) > length else head[:length]
+
+
+class ClipboardBuffer:
+    """Ordered buffer of collected items with global dedup and size caps.
+
+    Membership is a dict lookup on the item text, so A/B/A copy patterns
+    are caught wherever the earlier copy sits. Items over `spill_bytes` are
+    written to a temp file and kept as a SpilledItem, deduplicated by
+    SHA-256; read them back with item_text() or texts() when the prompt is
+    assembled. Once `max_items`, `max_bytes` (UTF-8 size of the items kept
+    in memory) or `max_spill_bytes` would be exceeded, the oldest items are
+    evicted first. Reads behave like a list of str and SpilledItem.
+
+    Writers serialise on a lock and publish a new tuple of the items after
+    each change (copy-on-write); reads use the latest tuple without locking,
+    so a reader iterating the buffer never sees it change underneath.
+    """
+
+    def __init__(self, max_items: int = 500, max_bytes: int = 16 * 1024 * 1024,
+                 spill_bytes: int = 256 * 1024, max_spill_bytes: int = 512 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.spill_bytes = spill_bytes
+        self.max_spill_bytes = max_spill_bytes
+        self.evicted = 0
+        self._items: "deque[Item]" = deque()
+        self._snapshot: Tuple[Item, ...] = ()
+        self._sizes: Dict[Union[str, bytes], int] = {}
+        self._total_bytes = 0
+        self._spilled_bytes = 0
+        self._memory_bytes = 0
+        self._spill_dir: Optional[str] = None
+        self._spill_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ClipboardBuffer":
+        """PASS60_BUFFER_MAX_ITEMS, PASS60_BUFFER_MAX_BYTES, PASS60_SPILL_BYTES (0 = never spill)
+        and PASS60_SPILL_MAX_BYTES"""
+        return cls(max_items=env_int("PASS60_BUFFER_MAX_ITEMS", 500),
+                   max_bytes=env_int("PASS60_BUFFER_MAX_BYTES", 16 * 1024 * 1024),
+                   spill_bytes=env_int("PASS60_SPILL_BYTES", 256 * 1024),
+                   max_spill_bytes=env_int("PASS60_SPILL_MAX_BYTES", 512 * 1024 * 1024))
+
+    def append(self, text: str) -> str:
+        """Add an item, evicting the oldest as needed; returns ADDED, DUPLICATE or TOO_LARGE.
+
+        A spilled item's file is written before the lock is taken, so readers
+        and other writers never wait on the disk.
+        """
+        data = text.encode("utf-8")
+        size = len(data)
+        spill = self._spills(size)
+        key = hashlib.sha256(data).digest() if spill else text
+        if spill:
+            if size > self.max_spill_bytes:
+                return TOO_LARGE
+            with self._lock:
+                if key in self._sizes:
+                    return DUPLICATE
+                path = self._spill_path()
+            item = SpilledItem(path, text, data, key)
+        del data
+        with self._lock:
+            if key in self._sizes:
+                return DUPLICATE  # added by another writer meanwhile; the handle removes our file
+            if size > (self.max_spill_bytes if spill else self.max_bytes):
+                return TOO_LARGE
+            while self._items and (len(self._items) >= self.max_items or self._over_caps(size, spill)):
+                self._remove_oldest()
+            if spill:
+                self._spilled_bytes += size
+            else:
+                item = text
+                self._total_bytes += size
+            self._items.append(item)
+            self._sizes[key] = size
+            self._memory_bytes += sys.getsizeof(item) + (sys.getsizeof(item.preview) if spill else 0)
+            self._snapshot = tuple(self._items)
+            return ADDED
+
+    def _spills(self, size: int) -> bool:
+        return 0 < self.spill_bytes < size
+
+    def _over_caps(self, size: int, spill: bool) -> bool:
+        if spill:
+            return self._spilled_bytes + size > self.max_spill_bytes
+        return self._total_bytes + size > self.max_bytes
+
+    def _spill_path(self) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="pass60-spill-")
+            atexit.register(shutil.rmtree, self._spill_dir, True)
+        return os.path.join(self._spill_dir, f"item-{next(self._spill_ids)}.txt")
+
+    def _remove_oldest(self):
+        self._forget(self._items.popleft())
+        self.evicted += 1
+
+    def _forget(self, item: Item):
+        if isinstance(item, SpilledItem):
+            self._spilled_bytes -= self._sizes.pop(item.digest)
+            self._memory_bytes -= sys.getsizeof(item) + sys.getsizeof(item.preview)
+        else:
+            self._total_bytes -= self._sizes.pop(item)
+            self._memory_bytes -= sys.getsizeof(item)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+            self._spilled_bytes = 0
+            self._memory_bytes = 0
+            self._snapshot = ()
+
+    def __contains__(self, text) -> bool:
+        if self._spills(len(text.encode("utf-8"))):
+            return hashlib.sha256(text.encode("utf-8")).digest() in self._sizes
+        return text in self._sizes
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self._snapshot)
+
+    def __getitem__(self, index):
+        return self._snapshot[index]
+
+    def snapshot(self) -> Tuple[Item, ...]:
+        """The items as of the last change; never modified afterwards"""
+        return self._snapshot
+
+    def texts(self) -> List[str]:
+        """Full text of every item, reading spilled items back from disk"""
+        return [item_text(item) for item in self]
+
+    @property
+    def total_bytes(self) -> int:
+        """UTF-8 size of the items kept in memory, as counted against max_bytes"""
+        return self._total_bytes
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held in memory: the item strings and handles plus the containers"""
+        with self._lock:
+            return (self._memory_bytes + sys.getsizeof(self._items) + sys.getsizeof(self._snapshot)
+                    + sys.getsizeof(self._sizes))
+
+    def stats(self) -> dict:
+        spilled = sum(isinstance(item, SpilledItem) for item in self)
+        return {"items": len(self._snapshot), "bytes": self._total_bytes, "memory": self.memory_usage(),
+                "spilled": spilled, "spilled_bytes": self._spilled_bytes, "evicted": self.evicted,
+                "max_items": self.max_items, "max_bytes": self.max_bytes}
+
+    def describe(self) -> str:
+        stats = self.stats()
+        summary = (f"{stats['items']}/{stats['max_items']} items, {stats['bytes'] / 1024:.1f} KB of "
+                   f"{stats['max_bytes'] / 1024 / 1024:.1f} MB, ~{stats['memory'] / 1024:.1f} KB in memory, "
+                   f"{stats['evicted']} evicted")
+        if stats["spilled"]:
+            summary += f", {stats['spilled']} spilled to disk ({stats['spilled_bytes'] / 1024 / 1024:.1f} MB)"
+        return summary
+
+    def to_list(self) -> List[Item]:
+        return list(self._snapshot)
+
+    def __repr__(self):
+        return f"ClipboardBuffer({self.to_list()!r})"
+
+
+if __name__ == "__main__":
+    # Resident memory check: copying large items should not grow the heap
+    import time
+    import tracemalloc
+
+    buffer = ClipboardBuffer()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for n in range(20):
+        text = f"{n} " + "log line with some detail\n" * 200_000  # ~5 MB
+        buffer.append(text)
+        del text
+    start = time.perf_counter()
+    prompt_chars = sum(len(text) for text in buffer.texts())
+    read_ms = (time.perf_counter() - start) * 1000
+    resident = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    print(f"📋 {buffer.describe()}")
+    print(f"{'✅' if resident < 1024 * 1024 else '❌'} {resident / 1024:.0f} KB resident after 20 x 5 MB copies; "
+          f"read back {prompt_chars / 1024 / 1024:.0f} MB in {read_ms:.0f} ms")
+    raise SystemExit(0 if resident < 1024 * 1024 else 1)
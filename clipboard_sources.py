@@ -0,0 +1,269 @@
+import os
+import select
+import threading
+import time
+from typing import Callable, Optional
+
+from env_settings import env_float
+from startup import lazy_import
+
+pyperclip = lazy_import("pyperclip")
+
+
+class ClipboardSource:
+    """Base class for clipboard change sources used by the auto-collect monitor"""
+
+    name = "base"
+
+    def __init__(self):
+        self._callback: Optional[Callable[[str], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped: Optional[threading.Event] = None  # stop signal of the current watcher thread
+        self.running = False
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Whether this source can be used on the current machine"""
+        return True
+
+    def read(self) -> str:
+        """Read the current clipboard text"""
+        return pyperclip.paste() or ""
+
+    def start(self, callback: Callable[[str], None]):
+        """Subscribe callback to clipboard changes.
+
+        Each watcher thread gets its own stop event, so a thread that was
+        stopped exits even if start() runs again before it wakes up.
+        """
+        self._callback = callback
+        if self.running and self._thread and self._thread.is_alive():
+            return
+        self.running = True
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stopped,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Unsubscribe and wake the watcher thread so it exits"""
+        self.running = False
+        if self._stopped is not None:
+            self._stopped.set()
+
+    def _emit(self, content: str):
+        callback = self._callback
+        if callback and content:
+            try:
+                callback(content)
+            except Exception as e:
+                print(f"⚠️  Clipboard handler failed: {e}")
+
+    def _run(self, stopped: threading.Event):
+        raise NotImplementedError
+
+
+def content_digest(content: str) -> int:
+    """Cheap digest used to detect clipboard changes without full-string compares"""
+    return hash(content)
+
+
+class PollingClipboardSource(ClipboardSource):
+    """Fallback source that polls the clipboard with adaptive backoff.
+
+    Polls at `floor` seconds right after a change, then multiplies the delay
+    by `backoff` on every idle tick up to `ceiling`. Change detection compares
+    a digest of the content rather than the previous string.
+    """
+
+    name = "poll"
+
+    def __init__(self, floor: float = 0.1, ceiling: float = 2.0, backoff: float = 1.5):
+        super().__init__()
+        self.floor = floor
+        self.ceiling = max(ceiling, floor)
+        self.backoff = max(backoff, 1.0)
+        self.interval = floor
+        self._last_digest: Optional[int] = None
+
+    def start(self, callback: Callable[[str], None]):
+        self.interval = self.floor
+        super().start(callback)
+
+    def _run(self, stopped: threading.Event):
+        try:
+            self._last_digest = content_digest(self.read())
+        except Exception:
+            self._last_digest = None
+
+        while not stopped.is_set():
+            try:
+                content = self.read()
+                digest = content_digest(content)
+                if digest != self._last_digest:
+                    self._last_digest = digest
+                    self.interval = self.floor
+                    self._emit(content)
+                else:
+                    self.interval = min(self.interval * self.backoff, self.ceiling)
+            except Exception:
+                # Silently continue if there's a clipboard error
+                self.interval = self.ceiling
+            stopped.wait(self.interval)
+
+
+class XFixesClipboardSource(ClipboardSource):
+    """Event-driven source using X11 XFixes selection-owner notifications.
+
+    The watcher thread blocks in select() on the X connection and only wakes
+    when another client takes ownership of CLIPBOARD, so idle cost is zero.
+    Requires python-xlib and a running X server.
+    """
+
+    name = "xfixes"
+
+    def __init__(self):
+        super().__init__()
+        self._wake_w: Optional[int] = None  # write end of the current watcher's wake-up pipe
+        self._wake_lock = threading.Lock()
+
+    @classmethod
+    def is_available(cls) -> bool:
+        if not os.environ.get("DISPLAY"):
+            return False
+        try:
+            from Xlib import display as xdisplay
+            from Xlib.ext import xfixes  # noqa: F401
+        except ImportError:
+            return False
+        try:
+            d = xdisplay.Display()
+            ok = d.has_extension("XFIXES")
+            d.close()
+            return ok
+        except Exception:
+            return False
+
+    def stop(self):
+        super().stop()
+        with self._wake_lock:
+            if self._wake_w is not None:
+                try:
+                    os.write(self._wake_w, b"x")
+                except OSError:
+                    pass
+
+    def _run(self, stopped: threading.Event):
+        from Xlib import display as xdisplay
+        from Xlib.ext import xfixes
+
+        # A pipe per watcher thread, so a stop always wakes the thread it stops. stop() sets
+        # the event before taking the lock, so a thread registering after it sees the event
+        with self._wake_lock:
+            if stopped.is_set():
+                return
+            wake_r, wake_w = os.pipe()
+            self._wake_w = wake_w
+        d = None
+        try:
+            d = xdisplay.Display()
+            d.xfixes_query_version()
+            selection = d.get_atom("CLIPBOARD")
+            d.xfixes_select_selection_input(
+                d.screen().root, selection, xfixes.XFixesSetSelectionOwnerNotifyMask
+            )
+            d.flush()
+
+            while not stopped.is_set():
+                readable, _, _ = select.select([d.fileno(), wake_r], [], [])
+                if wake_r in readable:
+                    os.read(wake_r, 64)
+                    continue
+
+                changed = False
+                while d.pending_events():
+                    event = d.next_event()
+                    if (event.type, getattr(event, "sub_code", 0)) == d.extension_event.SetSelectionOwnerNotify:
+                        changed = True
+
+                if changed and not stopped.is_set():
+                    try:
+                        self._emit(self.read())
+                    except Exception:
+                        pass
+        finally:
+            with self._wake_lock:
+                if self._wake_w == wake_w:
+                    self._wake_w = None
+                os.close(wake_w)
+            os.close(wake_r)
+            if d is not None:
+                d.close()
+
+
+class LocalClipboardSource(ClipboardSource):
+    """In-process source: changes are pushed explicitly, no thread or polling.
+
+    Useful for tests, benchmarks and platforms without a native change
+    notification API.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self._content = ""
+
+    def read(self) -> str:
+        return self._content
+
+    def start(self, callback: Callable[[str], None]):
+        self._callback = callback
+        self.running = True
+
+    def push(self, content: str):
+        """Simulate a copy: store content and notify the subscriber"""
+        self._content = content
+        if self.running:
+            self._emit(content)
+
+
+SOURCES = {
+    XFixesClipboardSource.name: XFixesClipboardSource,
+    PollingClipboardSource.name: PollingClipboardSource,
+    LocalClipboardSource.name: LocalClipboardSource,
+}
+
+
+def _poll_settings() -> dict:
+    """Read adaptive polling bounds from PASS60_POLL_FLOOR / PASS60_POLL_CEILING"""
+    settings = {}
+    for key, env in (("floor", "PASS60_POLL_FLOOR"), ("ceiling", "PASS60_POLL_CEILING")):
+        value = env_float(env, None)
+        if value is not None:
+            settings[key] = value
+    return settings
+
+
+def create_clipboard_source(kind: Optional[str] = None) -> ClipboardSource:
+    """Pick a clipboard source.
+
+    kind (or PASS60_CLIPBOARD_SOURCE) may be 'auto', 'xfixes', 'poll' or
+    'local'. 'auto' prefers event notification and falls back to adaptive
+    polling.
+    """
+    kind = (kind or os.getenv("PASS60_CLIPBOARD_SOURCE") or "auto").lower()
+
+    if kind != "auto":
+        source_cls = SOURCES.get(kind)
+        if source_cls is None:
+            print(f"⚠️  Unknown clipboard source '{kind}', using auto")
+        elif source_cls is PollingClipboardSource:
+            return PollingClipboardSource(**_poll_settings())
+        elif source_cls.is_available():
+            return source_cls()
+        else:
+            print(f"⚠️  Clipboard source '{kind}' not available, using auto")
+
+    if XFixesClipboardSource.is_available():
+        return XFixesClipboardSource()
+    return PollingClipboardSource(**_poll_settings())
@@ -0,0 +1,329 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from clipboard_sources import _poll_settings, content_digest
+from env_settings import env_float
+from startup import lazy_import
+
+pyperclip = lazy_import("pyperclip")
+keyboard = lazy_import("keyboard")
+pyautogui = lazy_import("pyautogui")
+
+
+class ClipboardNotOwned(Exception):
+    """Our write did not read back from the clipboard in time, so pasting would paste something else"""
+
+
+def send_paste_keys() -> str:
+    """Inject Ctrl+V; returns the method that worked"""
+    try:
+        pyautogui.hotkey("ctrl", "v")
+        return "pyautogui"
+    except Exception as e:
+        print(f"⚠️  pyautogui paste failed: {e}")
+    keyboard.send("ctrl+v")
+    return "keyboard"
+
+
+class PasteResult:
+    """Timings of one paste, in milliseconds from the start of paste()"""
+
+    __slots__ = ("method", "readback_ms", "total_ms", "restore_delay")
+
+    def __init__(self, method: str, readback_ms: float, total_ms: float, restore_delay: Optional[float]):
+        self.method = method
+        self.readback_ms = readback_ms  # until our text read back from the clipboard
+        self.total_ms = total_ms        # until Ctrl+V was injected
+        self.restore_delay = restore_delay  # seconds until the original comes back, None if not restored
+
+
+class _PendingRestore:
+    __slots__ = ("original", "texts", "delay", "changed", "cancelled")
+
+    def __init__(self, original: str, texts: tuple, delay: float):
+        self.original = original
+        self.texts = texts  # what we pasted since saving original; any of them may still be on the clipboard
+        self.delay = delay
+        self.changed = threading.Event()
+        self.cancelled = False
+
+
+class ClipboardTransactions:
+    """Pastes text through the clipboard and then gives the user's clipboard back.
+
+    paste() saves the clipboard, writes the text, waits until it reads back
+    (so Ctrl+V cannot paste the old content), injects Ctrl+V and returns
+    without sleeping. The original is restored on a background thread after
+    an adaptive delay, ten times the clipboard round trip averaged over
+    recent pastes, within [restore_min, restore_max]. When something else
+    takes the clipboard first (clipboard_changed()), the user's new content
+    is kept. A paste while a restore is pending inherits that restore's
+    original instead of saving our own text as the original, and hands it
+    back if it fails.
+
+    Every text we write is remembered for own_ttl seconds, so the
+    auto-collect monitor can skip it with is_own_write(). Once a restore is
+    done, the texts it covered are forgotten after own_grace seconds
+    (longer than the poller's slowest interval, so it still sees the last
+    write as ours), and a real copy of the same text later on is collected.
+    """
+
+    def __init__(self, read: Optional[Callable[[], str]] = None, write: Optional[Callable[[str], None]] = None,
+                 send_paste: Callable[[], str] = send_paste_keys, restore_min: float = 0.3,
+                 restore_max: float = 2.0, confirm_timeout: float = 0.5, own_ttl: float = 10.0,
+                 own_grace: float = 2.5):
+        self._read = read or (lambda: pyperclip.paste() or "")
+        self._write = write or (lambda text: pyperclip.copy(text))
+        self._send_paste = send_paste
+        self.restore_min = restore_min
+        self.restore_max = max(restore_max, restore_min)
+        self.confirm_timeout = confirm_timeout
+        self.own_ttl = own_ttl
+        self.own_grace = min(own_grace, own_ttl)
+        self._lock = threading.Lock()  # one paste, copy or restore at a time
+        self._pending: Optional[_PendingRestore] = None
+        self._own: Dict[int, float] = {}  # digest of text we wrote -> expiry (monotonic)
+        self._own_lock = threading.Lock()
+        self._round_trip = 0.0  # moving average of write -> readback -> Ctrl+V, seconds
+        self.latencies: "deque[float]" = deque(maxlen=200)  # total_ms of recent pastes
+        self.readbacks: "deque[float]" = deque(maxlen=200)
+        self.counts = dict.fromkeys(("pastes", "failed", "restored", "kept", "own_skipped"), 0)
+
+    @classmethod
+    def from_env(cls) -> "ClipboardTransactions":
+        """PASS60_PASTE_RESTORE_MIN, PASS60_PASTE_RESTORE_MAX and PASS60_PASTE_CONFIRM_TIMEOUT (seconds);
+        own_grace follows PASS60_POLL_CEILING"""
+        return cls(restore_min=env_float("PASS60_PASTE_RESTORE_MIN", 0.3),
+                   restore_max=env_float("PASS60_PASTE_RESTORE_MAX", 2.0),
+                   confirm_timeout=env_float("PASS60_PASTE_CONFIRM_TIMEOUT", 0.5),
+                   own_grace=_poll_settings().get("ceiling", 2.0) + 0.5)
+
+    def paste(self, text: str) -> PasteResult:
+        """Paste text into the focused window and schedule the restore.
+
+        Raises ClipboardNotOwned if the text never read back, or whatever
+        the key injection raised; in both cases the text is left on the
+        clipboard for a manual Ctrl+V. If an earlier paste's restore was
+        pending, its original still comes back, after restore_max.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            pending = self._take_pending()
+            original = pending.original if pending else self._read_or_none()
+            texts = (pending.texts if pending else ()) + (text,)
+            try:
+                self._write_own(text)
+                if not self._confirm(text):
+                    raise ClipboardNotOwned(f"clipboard did not take the text within "
+                                            f"{self.confirm_timeout * 1000:.0f} ms")
+                readback = time.perf_counter()
+                method = self._send_paste()
+            except Exception:
+                self.counts["failed"] += 1
+                if pending is not None:
+                    # Don't lose the user's clipboard that the earlier paste saved
+                    self._schedule_restore(original, texts, self.restore_max)
+                raise
+            injected = time.perf_counter()
+
+            self._round_trip = 0.8 * self._round_trip + 0.2 * (injected - start) if self.counts["pastes"] \
+                else injected - start
+            self.counts["pastes"] += 1
+            result = PasteResult(method, (readback - start) * 1000, (injected - start) * 1000, None)
+            self.latencies.append(result.total_ms)
+            self.readbacks.append(result.readback_ms)
+            if original is not None and original != text:
+                result.restore_delay = self.restore_delay()
+                self._schedule_restore(original, texts, result.restore_delay)
+            return result
+
+    def copy(self, text: str):
+        """Put text on the clipboard to stay (no restore), marked as our own write"""
+        with self._lock:
+            self._take_pending()
+            self._write_own(text)
+
+    def restore_delay(self) -> float:
+        """Seconds to leave pasted text on the clipboard: ten round trips, within the bounds"""
+        return min(max(self.restore_min, 10 * self._round_trip), self.restore_max)
+
+    def clipboard_changed(self):
+        """Another application wrote the clipboard; keep its content instead of restoring"""
+        pending = self._pending
+        if pending is not None:
+            pending.changed.set()
+
+    def is_own_write(self, content: str) -> bool:
+        """Whether content is something we wrote in the last own_ttl seconds (each write matches once)"""
+        now = time.monotonic()
+        with self._own_lock:
+            expires = self._own.pop(content_digest(content), None)
+            if len(self._own) > 64:
+                self._own = {digest: t for digest, t in self._own.items() if t > now}
+            if expires is not None and expires > now:
+                self.counts["own_skipped"] += 1
+                return True
+            return False
+
+    def _take_pending(self) -> Optional[_PendingRestore]:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            pending.cancelled = True
+            pending.changed.set()
+        return pending
+
+    def _schedule_restore(self, original: str, texts: tuple, delay: float):
+        self._pending = _PendingRestore(original, texts, delay)
+        threading.Thread(target=self._restore_later, args=(self._pending,),
+                         name="clipboard-restore", daemon=True).start()
+
+    def _read_or_none(self) -> Optional[str]:
+        try:
+            return self._read()
+        except Exception:
+            return None
+
+    def _write_own(self, text: str):
+        with self._own_lock:
+            self._own[content_digest(text)] = time.monotonic() + self.own_ttl
+        self._write(text)
+
+    def _forget_own(self, texts):
+        """Let own-write marks for texts expire after own_grace instead of own_ttl"""
+        expires = time.monotonic() + self.own_grace
+        with self._own_lock:
+            for text in texts:
+                digest = content_digest(text)
+                if digest in self._own:
+                    self._own[digest] = min(self._own[digest], expires)
+
+    def _confirm(self, text: str) -> bool:
+        """Poll until the clipboard reads back text, backing off from 1 ms to 20 ms"""
+        deadline = time.perf_counter() + self.confirm_timeout
+        pause = 0.001
+        while True:
+            if self._read_or_none() == text:
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(pause)
+            pause = min(pause * 2, 0.02)
+
+    def _restore_later(self, pending: _PendingRestore):
+        pending.changed.wait(pending.delay)
+        with self._lock:
+            if pending.cancelled:
+                return
+            self._pending = None
+            try:
+                if self._read_or_none() not in pending.texts:
+                    # The user copied something after the paste; keep it
+                    self.counts["kept"] += 1
+                    return
+                self._write_own(pending.original)
+                self.counts["restored"] += 1
+            except Exception as e:
+                print(f"⚠️  Could not restore the clipboard: {e}")
+            finally:
+                # A poller that never saw these writes must not skip a later real copy of them
+                self._forget_own(pending.texts + (pending.original,))
+
+    def describe(self) -> str:
+        counts = dict(self.counts)
+        if not self.latencies:
+            return "no pastes yet"
+        latencies = sorted(self.latencies)
+        readbacks = sorted(self.readbacks)
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+        return (f"{counts['pastes']} pastes, p50 {p50:.1f} ms, p95 {p95:.1f} ms "
+                f"(readback p50 {readbacks[len(readbacks) // 2]:.1f} ms); restore after "
+                f"{self.restore_delay() * 1000:.0f} ms; {counts['restored']} restored, {counts['kept']} kept "
+                f"newer copies, {counts['own_skipped']} own writes ignored, {counts['failed']} failed")
+
+
+if __name__ == "__main__":
+    # Simulated clipboard that takes 0-5 ms to show a write, a target app that
+    # reads it 1-30 ms after Ctrl+V, a 1 ms polling monitor and a user who
+    # sometimes copies between or right after pastes
+    import random
+
+    rng = random.Random(7)
+    clipboard = {"text": "user text 0"}
+    pasted, ingested = [], []
+
+    def write(text):
+        threading.Timer(rng.uniform(0, 0.005), clipboard.__setitem__, ("text", text)).start()
+
+    def send_paste():
+        threading.Timer(rng.uniform(0.001, 0.03), lambda: pasted.append(clipboard["text"])).start()
+        return "simulated"
+
+    transactions = ClipboardTransactions(read=lambda: clipboard["text"], write=write, send_paste=send_paste,
+                                         restore_min=0.1, restore_max=0.5, confirm_timeout=0.05,
+                                         own_grace=0.05)
+    stop = threading.Event()
+
+    def monitor():
+        last = clipboard["text"]
+        while not stop.is_set():
+            content = clipboard["text"]
+            if content != last:
+                last = content
+                if not transactions.is_own_write(content):
+                    ingested.append(content)
+                    transactions.clipboard_changed()
+            time.sleep(0.001)
+
+    watcher = threading.Thread(target=monitor, daemon=True)
+    watcher.start()
+    expected_pastes, user_copies = [], []
+    for n in range(80):
+        text = f"response {n}"
+        transactions.paste(text)
+        expected_pastes.append(text)
+        roll = rng.random()
+        if roll < 0.2:
+            time.sleep(0.04)  # the next paste comes before the restore
+        elif roll < 0.3:
+            time.sleep(0.045)  # the user copies something before the restore
+            user_copies.append(f"user text {n + 1}")
+            clipboard["text"] = user_copies[-1]
+            time.sleep(0.3)
+        else:
+            time.sleep(0.3)
+    time.sleep(0.6)
+    final = user_copies[-1] if user_copies else "user text 0"
+
+    # A paste whose write never lands, while the previous paste's restore is pending
+    transactions.paste("response 80")
+    expected_pastes.append("response 80")
+    time.sleep(0.04)
+    transactions._write = lambda text: None
+    try:
+        transactions.paste("lost response")
+        lost_failed = False
+    except ClipboardNotOwned:
+        lost_failed = True
+    transactions._write = write
+    time.sleep(0.6)
+    failed_restored = lost_failed and clipboard["text"] == final
+
+    # The user copies the text that never reached the clipboard, after the restore is done
+    clipboard["text"] = "lost response"
+    user_copies.append("lost response")
+    time.sleep(0.05)
+    stop.set()
+    watcher.join()
+
+    checks = {
+        "every paste pasted its own text": pasted == expected_pastes,
+        "only the user's copies were ingested": ingested == user_copies,
+        "the user's last clipboard came back": failed_restored,
+    }
+    print(f"📋 {transactions.describe()}")
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    raise SystemExit(0 if all(checks.values()) else 1)
@@ -0,0 +1,28 @@
+import os
+from typing import Callable, Optional
+
+
+def env_number(name: str, default, convert: Callable = float,
+               check: Optional[Callable[[float], bool]] = None):
+    """A numeric PASS60_* setting: default when unset, or with a warning when it
+    does not parse (or fails check), so one typo never stops the tool starting"""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        number = convert(value)
+        if check is None or check(number):
+            return number
+    except ValueError:
+        pass
+    print(f"⚠️  Ignoring invalid {name}={value!r}" + (f", using {default}" if default is not None else ""))
+    return default
+
+
+def env_int(name: str, default: Optional[int], check: Optional[Callable[[int], bool]] = None) -> Optional[int]:
+    return env_number(name, default, int, check)
+
+
+def env_float(name: str, default: Optional[float],
+              check: Optional[Callable[[float], bool]] = None) -> Optional[float]:
+    return env_number(name, default, float, check)
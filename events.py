@@ -0,0 +1,111 @@
+import itertools
+import json
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+
+# Event types published by ClipboardGeminiTool
+ITEM_ADDED = "item_added"                  # index, item, evicted (oldest items dropped first)
+BUFFER_CLEARED = "buffer_cleared"          # (buffer and current response were reset)
+COLLECTING_CHANGED = "collecting_changed"  # collecting
+RESPONSE_READY = "response_ready"          # response, cached, request_id
+TYPING_PROGRESS = "typing_progress"        # in_progress, index, total, chars_per_sec
+REQUEST_UPDATED = "request_updated"        # request_id, status
+HISTORY_INDEXED = "history_indexed"        # items (the history search index is ready)
+
+EVENT_TYPES = (ITEM_ADDED, BUFFER_CLEARED, COLLECTING_CHANGED, RESPONSE_READY, TYPING_PROGRESS,
+               REQUEST_UPDATED, HISTORY_INDEXED)
+ALL_EVENTS = "*"
+
+
+class Event:
+    """A published event: a type name plus keyword data"""
+
+    __slots__ = ("type", "data", "timestamp")
+
+    def __init__(self, type: str, data: dict):
+        self.type = type
+        self.data = data
+        self.timestamp = time.time()
+
+    def to_dict(self) -> dict:
+        return {"type": self.type, "timestamp": self.timestamp, **self.data}
+
+    def __repr__(self):
+        return f"Event({self.type!r}, {self.data!r})"
+
+
+class EventBus:
+    """Thread-safe publish/subscribe bus.
+
+    Callbacks run synchronously on the publishing thread, outside the bus
+    lock; GUIs should marshal onto their own thread (see
+    qt_models.ToolEventBridge). A failing subscriber never breaks the
+    publisher.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Tuple[int, Callable[[Event], None]]]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_type: str, callback: Callable[[Event], None]) -> int:
+        """Call callback for every event of event_type ("*" for all). Returns a token"""
+        token = next(self._ids)
+        with self._lock:
+            self._subscribers.setdefault(event_type, []).append((token, callback))
+        return token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            for event_type, subscribers in self._subscribers.items():
+                self._subscribers[event_type] = [(t, cb) for t, cb in subscribers if t != token]
+
+    def subscribe_queue(self, event_type: str = ALL_EVENTS, maxsize: int = 1000) -> Tuple[int, "queue.Queue[Event]"]:
+        """Deliver events into a queue (e.g. for a server-sent events stream).
+
+        Events are dropped rather than blocking the publisher if the consumer
+        falls behind.
+        """
+        events: "queue.Queue[Event]" = queue.Queue(maxsize=maxsize)
+
+        def enqueue(event: Event):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass
+
+        return self.subscribe(event_type, enqueue), events
+
+    def publish(self, event_type: str, **data) -> Event:
+        event = Event(event_type, data)
+        with self._lock:
+            callbacks = [cb for _, cb in self._subscribers.get(event_type, ())]
+            callbacks += [cb for _, cb in self._subscribers.get(ALL_EVENTS, ())]
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"⚠️  Event handler for {event_type} failed: {e}")
+        return event
+
+
+def sse_stream(bus: EventBus, keepalive: float = 15.0):
+    """Yield a server-sent events stream of bus events for a web front end.
+
+    Each event is sent as one JSON `data:` message; a comment line is sent
+    every `keepalive` seconds so proxies keep the connection open.
+    """
+    token, events = bus.subscribe_queue()
+    try:
+        while True:
+            try:
+                event = events.get(timeout=keepalive)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield f"data: {json.dumps(event.to_dict())}\n\n"
+    finally:
+        bus.unsubscribe(token)
@@ -0,0 +1,294 @@
+import bisect
+import itertools
+import os
+import pickle
+import random
+import re
+import threading
+import time
+from array import array
+from typing import Callable, Dict, List, Optional
+
+from history_store import ITEM
+
+TOKEN_PATTERN = re.compile(r"\w{2,}")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words of two or more characters"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchHit:
+    """A matching clipboard item"""
+
+    __slots__ = ("doc", "session", "timestamp", "preview")
+
+    def __init__(self, doc: int, session: int, timestamp: float, preview: str):
+        self.doc = doc
+        self.session = session
+        self.timestamp = timestamp
+        self.preview = preview
+
+    def __repr__(self):
+        return f"SearchHit(#{self.session}, {self.preview!r})"
+
+
+class HistoryIndex:
+    """Inverted index (token -> posting list of item ids) over clipboard items.
+
+    Built once from the history store, then kept current by add() as items
+    enter the buffer. Posting lists are append-only arrays of increasing
+    ids, so a query walks the rarest term's list from the newest end in
+    blocks and stops after `limit` hits. Each block is intersected with
+    the same id range of the other lists: as a set when that range is
+    short, by binary search per candidate when it is long. Terms match
+    whole words; all terms must match.
+
+    The index is saved next to the history (index.pickle) with the
+    location of the last item it covers, so a later build loads it and
+    only reads the items recorded since. A build fills a separate index
+    and swaps it in at the end, so add() and search() never wait for it;
+    items added meanwhile are queued and applied at the swap.
+    """
+
+    PREVIEW_LENGTH = 100
+    QUERY_BLOCK = 512
+    FORMAT_VERSION = 1
+
+    def __init__(self, history=None, path: Optional[str] = None, on_built: Optional[Callable[[], None]] = None):
+        self.history = history
+        self.path = path or (os.path.join(history.directory, "index.pickle") if history is not None else None)
+        self.on_built = on_built
+        self._postings: Dict[str, array] = {}
+        self._sessions = array("I")
+        self._timestamps = array("d")
+        self._sources: list = []  # history location, or the text itself without a history store
+        self._previews: List[str] = []
+        self._last_location = None  # newest history location indexed; locations only grow
+        self._lock = threading.Lock()
+        self._building: Optional[threading.Event] = None
+        self._pending: list = []  # add() arguments that arrived during a build
+        self._dirty = False
+        self.built = history is None
+        self.build_seconds = 0.0
+        self.loaded_items = 0
+        self.last_query_ms = 0.0
+
+    def __len__(self):
+        return len(self._previews)
+
+    def ensure_built(self):
+        """Index everything already in the history store (once); waits for a build in progress"""
+        with self._lock:
+            if self.built:
+                return
+            building = self._building
+            if building is None:
+                self._building = threading.Event()
+        if building is not None:
+            building.wait()
+            return
+
+        try:
+            start = time.perf_counter()
+            fresh = self._load() or HistoryIndex()
+            loaded = len(fresh)
+            for record in self.history.items(after=fresh._last_location):
+                fresh._add(record.data.get("text", ""), record.session, record.timestamp, record.location)
+            with self._lock:
+                for args in self._pending:
+                    fresh._add(*args)
+                self._pending = []
+                self._postings, self._sessions, self._timestamps = fresh._postings, fresh._sessions, fresh._timestamps
+                self._sources, self._previews = fresh._sources, fresh._previews
+                self._last_location = fresh._last_location
+                self._dirty = len(fresh) > loaded
+                self.loaded_items = loaded
+                self.built = True
+                self.build_seconds = time.perf_counter() - start
+        finally:
+            with self._lock:
+                building, self._building = self._building, None
+            building.set()
+        print(f"🔎 History index ready: {self.describe()} ({self.loaded_items} loaded from disk)")
+        self.save()
+        if self.on_built:
+            self.on_built()
+
+    def build_in_background(self):
+        """Start ensure_built() on a daemon thread unless the index is built or being built"""
+        with self._lock:
+            if self.built or self._building is not None:
+                return
+        threading.Thread(target=self.ensure_built, name="history-index", daemon=True).start()
+
+    def add(self, text: str, session: int = 0, timestamp: Optional[float] = None, location=None):
+        """Index an item as it enters the buffer.
+
+        Before the build, items are left for the build to read from history;
+        during it they are queued. An item seen twice is indexed once, by its
+        history location.
+        """
+        with self._lock:
+            if self.built:
+                self._add(text, session, timestamp or time.time(), location)
+                self._dirty = True
+            elif self._building is not None:
+                self._pending.append((text, session, timestamp or time.time(), location))
+
+    def _add(self, text: str, session: int, timestamp: float, location):
+        if location is not None:
+            if self._last_location is not None and tuple(location) <= self._last_location:
+                return
+            self._last_location = tuple(location)
+        doc = len(self._previews)
+        self._sessions.append(session)
+        self._timestamps.append(timestamp)
+        self._sources.append(location if location is not None else text)
+        preview = text[:self.PREVIEW_LENGTH].replace("\n", " ")
+        self._previews.append(preview + "..." if len(text) > self.PREVIEW_LENGTH else preview)
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = array("I")
+            postings.append(doc)
+
+    def search(self, query: str, limit: int = 50, wait: bool = True) -> List[SearchHit]:
+        """Newest items containing every word of query.
+
+        Builds the index first if needed; with wait=False (e.g. on a GUI
+        thread) the build is started in the background instead and the
+        search covers only what is indexed so far.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        if wait:
+            self.ensure_built()
+        elif not self.built:
+            self.build_in_background()
+
+        start = time.perf_counter()
+        hits = []
+        with self._lock:
+            lists = [self._postings.get(term) for term in terms]
+            if all(postings is not None for postings in lists):
+                lists.sort(key=len)
+                rarest, others = lists[0], lists[1:]
+                end = len(rarest)
+                while end > 0 and len(hits) < limit:
+                    block = rarest[max(end - self.QUERY_BLOCK, 0):end]
+                    end -= len(block)
+                    matches = set(block)
+                    for postings in others:
+                        lo = bisect.bisect_left(postings, block[0])
+                        hi = bisect.bisect_right(postings, block[-1], lo)
+                        if hi - lo <= 8 * len(matches):
+                            matches.intersection_update(postings[lo:hi])
+                        else:
+                            matches = {doc for doc in matches if _contains(postings, doc, lo, hi)}
+                    for doc in sorted(matches, reverse=True)[:limit - len(hits)]:
+                        hits.append(SearchHit(doc, self._sessions[doc], self._timestamps[doc],
+                                              self._previews[doc]))
+        self.last_query_ms = (time.perf_counter() - start) * 1000
+        return hits
+
+    def text(self, hit: SearchHit) -> Optional[str]:
+        """The full text of a hit's item; None if it is no longer stored"""
+        source = self._sources[hit.doc]
+        if isinstance(source, str):
+            return source
+        record = self.history.read(source) if self.history else None
+        return self.history.item_text(record.data) if record else None
+
+    def save(self):
+        """Write the index to self.path if items were added since it was loaded or saved"""
+        if not self.path:
+            return
+        with self._lock:
+            if not (self.built and self._dirty):
+                return
+            # Copies are cheap (flat arrays); pickling happens outside the lock
+            state = {"version": self.FORMAT_VERSION, "last_location": self._last_location,
+                     "postings": {term: array("I", postings) for term, postings in self._postings.items()},
+                     "sessions": array("I", self._sessions), "timestamps": array("d", self._timestamps),
+                     "sources": list(self._sources), "previews": list(self._previews)}
+            self._dirty = False
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️  Could not save the history index: {e}")
+
+    def _load(self) -> Optional["HistoryIndex"]:
+        """The saved index, or None if it is missing, unreadable or no longer matches the history"""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                state = pickle.load(f)
+            if state.get("version") != self.FORMAT_VERSION:
+                return None
+            index = HistoryIndex()
+            index._postings, index._sessions, index._timestamps = (state["postings"], state["sessions"],
+                                                                   state["timestamps"])
+            index._sources, index._previews = state["sources"], state["previews"]
+            index._last_location = state["last_location"]
+        except Exception as e:
+            print(f"⚠️  Rebuilding the history index ({e})")
+            return None
+        # The newest indexed item must still be where the index says, or history was rewritten
+        last = index._last_location
+        record = self.history.read(last) if last is not None else None
+        if last is not None and (record is None or record.kind != ITEM):
+            print("⚠️  History changed since the index was saved; rebuilding it")
+            return None
+        return index
+
+    def stats(self) -> dict:
+        with self._lock:
+            postings = sum(len(p) for p in self._postings.values())
+            size = (sum(p.buffer_info()[1] * p.itemsize for p in self._postings.values())
+                    + sum(len(term) + 49 for term in self._postings)
+                    + len(self._sessions) * (4 + 8)
+                    + sum(len(preview) + 49 for preview in self._previews))
+            return {"items": len(self._previews), "terms": len(self._postings), "postings": postings,
+                    "bytes": size, "build_ms": self.build_seconds * 1000, "last_query_ms": self.last_query_ms}
+
+    def describe(self) -> str:
+        stats = self.stats()
+        return (f"{stats['items']} items, {stats['terms']} terms, {stats['postings']} postings, "
+                f"~{stats['bytes'] / 1024 / 1024:.1f} MB, built in {stats['build_ms']:.0f} ms")
+
+
+def _contains(postings: array, doc: int, lo: int, hi: int) -> bool:
+    i = bisect.bisect_left(postings, doc, lo, hi)
+    return i < hi and postings[i] == doc
+
+
+if __name__ == "__main__":
+    # Benchmark: 100k synthetic items with a Zipf-like vocabulary
+    rng = random.Random(60)
+    vocabulary = [f"w{n}" for n in range(20000)]
+    cum_weights = list(itertools.accumulate(1 / (n + 1) for n in range(len(vocabulary))))
+    texts = [" ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=30)) for _ in range(100_000)]
+    index = HistoryIndex()
+
+    start = time.perf_counter()
+    for i, text in enumerate(texts):
+        index.add(text, session=i // 10)
+    index.build_seconds = time.perf_counter() - start
+    print(f"🔎 {index.describe()}")
+
+    timings = []
+    for _ in range(2000):
+        index.search(" ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(1, 3))))
+        timings.append(index.last_query_ms)
+    timings.sort()
+    p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+    ok = p50 < 1.0
+    print(f"{'✅' if ok else '❌'} query p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {timings[-1]:.3f} ms")
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,459 @@
+import argparse
+import contextlib
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+
+DEFAULT_HISTORY_DIR = os.path.join(os.path.expanduser("~"), ".pass60", "history")
+
+# Record kinds
+SESSION_START = 1  # {}
+ITEM = 2           # {"text"}, or {"text" (a preview), "length", "sha256"} for an item spilled to disk,
+                   #  whose full text is kept in blobs/<sha256>.txt
+PROMPT = 3         # {"prompt", "strategy", "estimated_tokens", "prompt_tokens", "output_tokens",
+                   #  "prepare_seconds", "answer_seconds"}
+RESPONSE = 4       # {"text", "cached", "request_id"}
+SESSION_END = 5    # {}
+
+KIND_NAMES = {SESSION_START: "start", ITEM: "item", PROMPT: "prompt", RESPONSE: "response",
+              SESSION_END: "end"}
+
+# Record header: magic, kind, reserved, session id, payload length, payload crc32, timestamp
+HEADER = struct.Struct("<2sBxIIId")
+MAGIC = b"P6"
+
+SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.log$")
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class Record:
+    """One history record; the JSON payload is only decoded when asked for.
+
+    location is (segment number, offset) and can be passed to HistoryStore.read().
+    """
+
+    __slots__ = ("kind", "session", "timestamp", "location", "_raw")
+
+    def __init__(self, kind: int, session: int, timestamp: float, location: Tuple[int, int], raw):
+        self.kind = kind
+        self.session = session
+        self.timestamp = timestamp
+        self.location = location
+        self._raw = raw
+
+    @property
+    def data(self) -> dict:
+        return json.loads(bytes(self._raw).decode("utf-8")) if len(self._raw) else {}
+
+    def raw_contains(self, needle: bytes) -> bool:
+        """Case-insensitive (ASCII) substring test on the undecoded payload"""
+        return needle in bytes(self._raw).lower()
+
+    def detached(self) -> "Record":
+        """A copy that owns its payload, safe to keep after the segment is unmapped"""
+        return Record(self.kind, self.session, self.timestamp, self.location, bytes(self._raw))
+
+
+class SessionSummary:
+    """What `history list` shows for a session, built from record headers"""
+
+    def __init__(self, session: int, started: float):
+        self.session = session
+        self.started = started
+        self.ended: Optional[float] = None
+        self.items = 0
+        self.responses = 0
+        self.first_item: Optional[Record] = None
+
+    @property
+    def preview(self) -> str:
+        if self.first_item is None:
+            return ""
+        text = self.first_item.data.get("text", "").replace("\n", " ")
+        return text[:60] + "..." if len(text) > 60 else text
+
+
+class Session:
+    """A session read back in full"""
+
+    def __init__(self, session: int):
+        self.session = session
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+        self.items: List[str] = []
+        self.missing: List[str] = []  # previews of spilled items whose full text is no longer stored
+        self.prompts: List[dict] = []
+        self.responses: List[dict] = []
+
+
+class _Segment:
+    """A segment file, mapped read-only only while a read is walking it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.number = int(SEGMENT_PATTERN.match(os.path.basename(path)).group(1))
+
+    @contextlib.contextmanager
+    def mapped(self) -> Iterator[Optional[memoryview]]:
+        """The segment's bytes (None if empty), unmapped again when the block exits"""
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    yield None
+                    return
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            yield None
+            return
+        view = memoryview(mapping)
+        try:
+            yield view
+        finally:
+            view.release()
+            try:
+                mapping.close()
+            except BufferError:
+                pass  # a record taken from the walk still references it; freed with that record
+
+
+class HistoryStore:
+    """Append-only session history in segment files under `directory`.
+
+    Each record is a fixed header followed by a JSON payload. Segments are
+    read through mmap and records are walked by header, so listing sessions
+    or searching never loads the whole history into memory, and a torn
+    record at the end of a segment (e.g. after a crash) is ignored. Each
+    segment is mapped only while a read walks it, so no file handles are
+    held between reads however many segments there are. Reads take the
+    lock only to list the segments, never while walking them.
+    """
+
+    def __init__(self, directory: str = DEFAULT_HISTORY_DIR, max_segment_bytes: int = 8 * 1024 * 1024):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.current_session: Optional[int] = None
+        self._segments: List[_Segment] = []
+        self._writer = None
+        self._writer_number = 0
+        self._next_session: Optional[int] = None
+        self._lock = threading.Lock()
+
+    # Writing
+
+    def start_session(self) -> int:
+        """Begin a new session; later records belong to it"""
+        with self._lock:
+            return self._start_session()
+
+    def _start_session(self) -> int:
+        if self._next_session is None:
+            self._next_session = self._last_session() + 1
+        self.current_session = self._next_session
+        self._next_session += 1
+        self._append(SESSION_START, {})
+        return self.current_session
+
+    def _last_session(self) -> int:
+        """Highest session id on disk, read from the newest segment that has a valid record.
+
+        Session ids only grow and each writer starts a new segment, so the
+        newest segment holds the highest id; older segments are only read
+        if it is empty or torn from its first record.
+        """
+        self._load_segments()
+        for segment in reversed(self._segments):
+            last = max((record.session for record in self._walk(segment)), default=None)
+            if last is not None:
+                return last
+        return 0
+
+    def end_session(self):
+        with self._lock:
+            if self.current_session is not None:
+                self._append(SESSION_END, {})
+                self.current_session = None
+
+    def record_item(self, text: str, length: Optional[int] = None, sha256: Optional[str] = None) -> Tuple[int, int]:
+        """Record a buffer item; returns its location.
+
+        For an item too large to keep in memory, pass its preview as text
+        with the full length and digest, and keep its full text with
+        save_blob(); item_text() reads it back from there.
+        """
+        if length is None:
+            return self._record(ITEM, {"text": text})
+        return self._record(ITEM, {"text": text, "length": length, "sha256": sha256})
+
+    def save_blob(self, source_path: str, sha256: str):
+        """Copy a spilled item's file into the history (once per digest)"""
+        path = self._blob_path(sha256)
+        if path is None or os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _blob_path(self, sha256: str) -> Optional[str]:
+        if not SHA256_PATTERN.match(sha256 or ""):
+            return None
+        return os.path.join(self.directory, "blobs", f"{sha256}.txt")
+
+    def record_prompt(self, prompt: str, **details):
+        self._record(PROMPT, {"prompt": prompt, **details})
+
+    def record_response(self, text: str, cached: bool = False, request_id: Optional[int] = None):
+        self._record(RESPONSE, {"text": text, "cached": cached, "request_id": request_id})
+
+    def _record(self, kind: int, data: dict) -> Tuple[int, int]:
+        with self._lock:
+            if self.current_session is None:
+                self._start_session()
+            return self._append(kind, data)
+
+    def _append(self, kind: int, data: dict) -> Tuple[int, int]:
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8") if data else b""
+        header = HEADER.pack(MAGIC, kind, self.current_session, len(payload), zlib.crc32(payload), time.time())
+        writer = self._writable_segment(len(header) + len(payload))
+        location = (self._writer_number, writer.tell())
+        writer.write(header + payload)
+        writer.flush()
+        return location
+
+    def _writable_segment(self, record_size: int):
+        if self._writer is not None and self._writer.tell() + record_size <= self.max_segment_bytes:
+            return self._writer
+        if self._writer is not None:
+            self._writer.close()
+        self._load_segments()
+        number = self._segments[-1].number + 1 if self._segments else 1
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"segment-{number:06d}.log")
+        # Every writer starts a fresh segment, so nothing is ever appended after a torn record
+        self._writer = open(path, "ab")
+        self._writer_number = number
+        self._segments.append(_Segment(path))
+        return self._writer
+
+    # Reading
+
+    def _load_segments(self):
+        known = {segment.path for segment in self._segments}
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if SEGMENT_PATTERN.match(name) and path not in known:
+                    self._segments.append(_Segment(path))
+        self._segments.sort(key=lambda segment: segment.number)
+
+    def _records(self, after: Optional[Tuple[int, int]] = None) -> Iterator[Record]:
+        """Every valid record (after a location, if given), oldest first; use each record before
+        the next one is taken"""
+        with self._lock:
+            self._load_segments()
+            segments = list(self._segments)
+        for segment in segments:
+            if after is None or segment.number > after[0]:
+                yield from self._walk(segment)
+            elif segment.number == after[0]:
+                records = self._walk(segment, after[1])
+                if next(records, None) is not None:  # the record at `after` itself
+                    yield from records
+
+    def _walk(self, segment: _Segment, start: int = 0) -> Iterator[Record]:
+        """Records of one segment from offset start, read from a mapping that is closed when the walk ends"""
+        with segment.mapped() as view:
+            if view is None:
+                return
+            offset = start
+            while True:
+                record = self._read_at(segment.number, view, offset)
+                if record is None:
+                    break
+                yield record
+                offset += HEADER.size + len(record._raw)
+                record._raw.release()
+
+    @staticmethod
+    def _read_at(number: int, view: memoryview, offset: int) -> Optional[Record]:
+        if offset + HEADER.size > len(view):
+            return None
+        magic, kind, session, length, crc, timestamp = HEADER.unpack_from(view, offset)
+        start = offset + HEADER.size
+        if magic != MAGIC or start + length > len(view):
+            return None
+        raw = view[start:start + length]
+        if zlib.crc32(raw) != crc:
+            return None
+        return Record(kind, session, timestamp, (number, offset), raw)
+
+    def read(self, location: Tuple[int, int]) -> Optional[Record]:
+        """The record at a location from record_item() or Record.location"""
+        number, offset = location
+        with self._lock:
+            self._load_segments()
+            segment = next((segment for segment in self._segments if segment.number == number), None)
+        if segment is None:
+            return None
+        with segment.mapped() as view:
+            record = self._read_at(number, view, offset) if view is not None else None
+            return record.detached() if record is not None else None
+
+    def item_text(self, data: dict) -> Optional[str]:
+        """The full text of an ITEM record's data; None if it was spilled and its copy is gone"""
+        if "sha256" not in data:
+            return data.get("text", "")
+        path = self._blob_path(data["sha256"])
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                return f.read()
+        except (OSError, TypeError):
+            return None
+
+    def items(self, after: Optional[Tuple[int, int]] = None) -> Iterator[Record]:
+        """Every recorded buffer item (after a location, if given), oldest first; a record is only
+        valid until the next one is taken (keep record.detached() to hold on to it)"""
+        return (record for record in self._records(after) if record.kind == ITEM)
+
+    def sessions(self) -> List[SessionSummary]:
+        """Summaries of every session, oldest first"""
+        summaries = {}
+        for record in self._records():
+            summary = summaries.get(record.session)
+            if summary is None:
+                summary = summaries[record.session] = SessionSummary(record.session, record.timestamp)
+            if record.kind == ITEM:
+                summary.items += 1
+                if summary.first_item is None:
+                    summary.first_item = record.detached()
+            elif record.kind == RESPONSE:
+                summary.responses += 1
+            elif record.kind == SESSION_END:
+                summary.ended = record.timestamp
+        return list(summaries.values())
+
+    def load(self, session: int) -> Optional[Session]:
+        """Read one session back in full"""
+        result = None
+        for record in self._records():
+            if record.session != session:
+                continue
+            if result is None:
+                result = Session(session)
+                result.started = record.timestamp
+            data = record.data
+            if record.kind == ITEM:
+                text = self.item_text(data)
+                if text is None:
+                    result.missing.append(data.get("text", ""))
+                else:
+                    result.items.append(text)
+            elif record.kind == PROMPT:
+                result.prompts.append(data)
+            elif record.kind == RESPONSE:
+                result.responses.append(data)
+            elif record.kind == SESSION_END:
+                result.ended = record.timestamp
+        return result
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[int, str, str]]:
+        """(session, kind, snippet) for items and responses containing query, newest first"""
+        needle = query.lower()
+        raw_needle = needle.encode("utf-8")
+        hits = []
+        for record in self._records():
+            if record.kind not in (ITEM, RESPONSE) or not record.raw_contains(raw_needle):
+                continue
+            text = record.data.get("text", "")
+            position = text.lower().find(needle)
+            if position < 0:
+                continue  # matched JSON escaping, not the text itself
+            start = max(position - 30, 0)
+            snippet = text[start:position + len(query) + 30].replace("\n", " ")
+            hits.append((record.session, KIND_NAMES[record.kind], snippet))
+        return hits[::-1][:limit]
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+def format_time(timestamp: Optional[float]) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp)) if timestamp else "-"
+
+
+def main(argv: Optional[List[str]] = None):
+    """history CLI: list, search, show and restore sessions"""
+    parser = argparse.ArgumentParser(prog="history_store", description="60Pass session history")
+    parser.add_argument("--dir", default=DEFAULT_HISTORY_DIR, help="history directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_cmd = commands.add_parser("list", help="list sessions")
+    list_cmd.add_argument("--limit", type=int, default=20)
+    search_cmd = commands.add_parser("search", help="search items and responses")
+    search_cmd.add_argument("query")
+    show_cmd = commands.add_parser("show", help="print a session")
+    show_cmd.add_argument("session", type=int)
+    restore_cmd = commands.add_parser("restore", help="copy a session's items or last response to the clipboard")
+    restore_cmd.add_argument("session", type=int)
+    restore_cmd.add_argument("--response", action="store_true", help="copy the last response instead")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.dir)
+    try:
+        if args.command == "list":
+            sessions = store.sessions()
+            for summary in sessions[-args.limit:][::-1]:
+                print(f"#{summary.session:<5} {format_time(summary.started)}  {summary.items:3} items  "
+                      f"{summary.responses:2} responses  {summary.preview}")
+            if not sessions:
+                print("📭 No sessions recorded yet")
+        elif args.command == "search":
+            hits = store.search(args.query)
+            for session, kind, snippet in hits:
+                print(f"#{session:<5} {kind:<8} ...{snippet}...")
+            if not hits:
+                print(f"🔍 No matches for '{args.query}'")
+        else:
+            session = store.load(args.session)
+            if session is None:
+                print(f"❌ No session #{args.session}")
+                return 1
+            if args.command == "show":
+                print(f"📜 Session #{session.session}: {format_time(session.started)} - {format_time(session.ended)}")
+                for i, item in enumerate(session.items, 1):
+                    print(f"--- Item {i} ---\n{item}")
+                for preview in session.missing:
+                    print(f"--- Missing item (full text no longer stored; preview only) ---\n{preview}...")
+                for response in session.responses:
+                    print(f"--- Response{' (cached)' if response.get('cached') else ''} ---\n{response['text']}")
+            else:
+                import pyperclip
+                if args.response:
+                    if not session.responses:
+                        print(f"❌ Session #{session.session} has no response")
+                        return 1
+                    pyperclip.copy(session.responses[-1]["text"])
+                    print(f"📋 Copied the last response of session #{session.session}")
+                else:
+                    pyperclip.copy("\n\n".join(session.items))
+                    print(f"📋 Copied {len(session.items)} items of session #{session.session}")
+                    if session.missing:
+                        print(f"⚠️  Skipped {len(session.missing)} large item(s) whose full text is no longer stored")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
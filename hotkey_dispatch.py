@@ -0,0 +1,186 @@
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+
+from env_settings import env_int
+
+
+# Lanes: control commands get their own thread so they never wait behind slow work
+CONTROL = "control"  # pause, stop, speed changes: only set flags, must run within milliseconds
+STATE = "state"      # buffer and mode changes (clear, typing mode, exit): quick, but may print or join
+WORK = "work"        # anything that may block: model calls, countdowns, clipboard reads
+LANES = (CONTROL, STATE, WORK)
+
+_STOP = object()
+
+
+class Command:
+    """A hotkey action and its dispatch rules.
+
+    coalesce: a press while the same command is still queued is dropped.
+    exclusive: at most one instance runs at a time. With rerun, presses
+    that arrive while it runs are run after it finishes, on the same worker
+    (once in all, if coalescing); without, they are dropped.
+    """
+
+    def __init__(self, name: str, func: Callable[[], None], lane: str = WORK,
+                 coalesce: bool = True, exclusive: bool = True, rerun: bool = True):
+        if lane not in LANES:
+            raise ValueError(f"Unknown command lane '{lane}' (expected one of {', '.join(LANES)})")
+        self.name = name
+        self.func = func
+        self.lane = lane
+        self.coalesce = coalesce
+        self.exclusive = exclusive
+        self.rerun = rerun
+        self.queued = 0
+        self.running = 0
+        self.reruns = 0
+
+
+class CommandDispatcher:
+    """Runs hotkey commands off the keyboard listener thread.
+
+    Hotkey callbacks only call submit(), which never blocks: it applies the
+    command's coalescing rule and puts it on its lane's bounded queue, or
+    drops it when the queue is full. The control and state lanes each have
+    a dedicated thread; the work lane has a small pool of threads.
+    """
+
+    def __init__(self, workers: int = 3, max_queue: int = 32):
+        self.workers = max(workers, 1)
+        self.commands: Dict[str, Command] = {}
+        self._queues = {lane: queue.Queue(max_queue) for lane in LANES}
+        self._lock = threading.Lock()
+        self._threads: List[tuple] = []  # (thread, lane)
+        self.counts = dict.fromkeys(("submitted", "coalesced", "dropped", "executed", "failed"), 0)
+        self.max_wait = dict.fromkeys(LANES, 0.0)
+
+    @classmethod
+    def from_env(cls) -> "CommandDispatcher":
+        """PASS60_HOTKEY_WORKERS and PASS60_HOTKEY_QUEUE"""
+        return cls(workers=env_int("PASS60_HOTKEY_WORKERS", 3),
+                   max_queue=env_int("PASS60_HOTKEY_QUEUE", 32))
+
+    def register(self, name: str, func: Callable[[], None], lane: str = WORK,
+                 coalesce: bool = True, exclusive: bool = True, rerun: bool = True) -> Callable[[], None]:
+        """Add a command; returns a callback that submits it, for keyboard.add_hotkey"""
+        self.commands[name] = Command(name, func, lane, coalesce, exclusive, rerun)
+        return lambda: self.submit(name)
+
+    def start(self):
+        if self._threads:
+            return
+        lanes = [CONTROL, STATE] + [WORK] * self.workers
+        for n, lane in enumerate(lanes):
+            thread = threading.Thread(target=self._worker, args=(lane,), name=f"hotkey-{lane}-{n}", daemon=True)
+            thread.start()
+            self._threads.append((thread, lane))
+
+    def submit(self, name: str) -> bool:
+        """Queue a command; returns False if it was coalesced or dropped"""
+        command = self.commands[name]
+        with self._lock:
+            self.counts["submitted"] += 1
+            if command.coalesce and command.queued:
+                self.counts["coalesced"] += 1
+                return False
+            command.queued += 1
+        try:
+            self._queues[command.lane].put_nowait((command, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                command.queued -= 1
+                self.counts["dropped"] += 1
+            print(f"⚠️  Too many pending hotkey commands, ignored {name}")
+            return False
+        return True
+
+    def _worker(self, lane: str):
+        commands = self._queues[lane]
+        while True:
+            entry = commands.get()
+            if entry is _STOP:
+                return
+            command, submitted = entry
+            wait = time.perf_counter() - submitted
+            with self._lock:
+                command.queued -= 1
+                self.max_wait[lane] = max(self.max_wait[lane], wait)
+                if command.exclusive and command.running:
+                    # The running instance picks it up when it finishes
+                    if not command.rerun or (command.reruns and command.coalesce):
+                        self.counts["coalesced"] += 1
+                    else:
+                        command.reruns += 1
+                    continue
+                command.running += 1
+            self._run(command)
+
+    def _run(self, command: Command):
+        while True:
+            try:
+                command.func()
+            except Exception as e:
+                with self._lock:
+                    self.counts["failed"] += 1
+                print(f"❌ Hotkey command {command.name} failed: {e}")
+            with self._lock:
+                self.counts["executed"] += 1
+                if not command.reruns:
+                    command.running -= 1
+                    return
+                command.reruns -= 1
+
+    def shutdown(self, timeout: float = 1.0):
+        """Stop the workers; commands still running are left to finish on their daemon threads"""
+        for thread, lane in self._threads:
+            try:
+                self._queues[lane].put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+        deadline = time.monotonic() + timeout
+        for thread, _ in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=max(deadline - time.monotonic(), 0))
+        self._threads = []
+
+    def describe(self) -> str:
+        with self._lock:
+            counts = dict(self.counts)
+            waits = dict(self.max_wait)
+        return (f"{counts['executed']} run, {counts['coalesced']} coalesced, {counts['dropped']} dropped, "
+                f"{counts['failed']} failed; longest wait {waits[CONTROL] * 1000:.1f} ms control, "
+                f"{waits[STATE] * 1000:.1f} ms state, {waits[WORK] * 1000:.1f} ms work")
+
+
+if __name__ == "__main__":
+    # Slow work or state commands must not delay control commands, and repeated presses coalesce
+    dispatcher = CommandDispatcher(workers=2)
+    finished = []
+    stop_latencies = []
+    finish = dispatcher.register("finish", lambda: (time.sleep(0.5), finished.append(1)))
+    clear = dispatcher.register("clear", lambda: time.sleep(0.3), lane=STATE)
+    stop_pressed = [0.0]
+    stop = dispatcher.register("stop", lambda: stop_latencies.append(time.perf_counter() - stop_pressed[0]),
+                               lane=CONTROL, coalesce=False, exclusive=False)
+    dispatcher.start()
+
+    for _ in range(10):
+        finish()
+        time.sleep(0.01)
+    clear()
+    for _ in range(20):
+        stop_pressed[0] = time.perf_counter()
+        stop()
+        time.sleep(0.02)
+    time.sleep(1.2)
+    dispatcher.shutdown()
+
+    worst = max(stop_latencies) * 1000
+    ok = len(finished) == 2 and len(stop_latencies) == 20 and worst < 5
+    print(f"🎛️  {dispatcher.describe()}")
+    print(f"{'✅' if ok else '❌'} 10 slow presses ran {len(finished)}x (once, plus one rerun); "
+          f"stop handled 20/{len(stop_latencies)}, worst {worst:.2f} ms while the slow commands ran")
+    raise SystemExit(0 if ok else 1)
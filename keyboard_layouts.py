@@ -0,0 +1,225 @@
+import os
+import string
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+
+# Modifier key names as reported by the keyboard package
+SHIFT_KEYS = frozenset({"shift", "left shift", "right shift"})
+ALTGR_KEYS = frozenset({"alt gr", "altgr", "right alt"})
+CTRL_KEYS = frozenset({"ctrl", "left ctrl", "right ctrl"})
+ALT_KEYS = frozenset({"alt", "left alt"})
+WINDOWS_KEYS = frozenset({"windows", "left windows", "right windows", "command"})
+CAPS_LOCK = "caps lock"
+
+# Dead key character -> combining mark it puts on the next character
+DEAD_COMBINING = {"´": "\u0301", "`": "\u0300", "^": "\u0302", "¨": "\u0308", "~": "\u0303", "¸": "\u0327"}
+# Names some platforms use for dead keys
+DEAD_KEY_ALIASES = {"dead acute": "´", "dead grave": "`", "dead circumflex": "^", "dead diaeresis": "¨",
+                    "dead tilde": "~", "dead cedilla": "¸"}
+
+
+def _build_compose() -> Dict[Tuple[str, str], str]:
+    """(dead key, base character) -> precomposed character"""
+    compose = {}
+    for dead, mark in DEAD_COMBINING.items():
+        for base in string.ascii_letters:
+            composed = unicodedata.normalize("NFC", base + mark)
+            if len(composed) == 1:
+                compose[(dead, base)] = composed
+    return compose
+
+
+COMPOSE = _build_compose()
+
+# Keys every layout shares; keypad operators are reported by name
+_COMMON_KEYS = {
+    "space": (" ", " "), "enter": ("\n", "\n"), "tab": ("\t", "\t"),
+    "decimal": (".", "."), "add": ("+", "+"), "subtract": ("-", "-"),
+    "multiply": ("*", "*"), "divide": ("/", "/"),
+}
+
+# Layout specs: key name (the key's label) -> (plain, shift, altgr, altgr+shift).
+# Letters a-z are added with their upper case unless the layout overrides them.
+LAYOUT_SPECS = {
+    "us": {
+        "keys": dict(zip("1234567890-=[]\\;',./`", zip("1234567890-=[]\\;',./`", "!@#$%^&*()_+{}|:\"<>?~"))),
+        "dead": "",
+    },
+    "uk": {
+        "keys": {
+            **dict(zip("1234567890-=[];,./", zip("1234567890-=[];,./", "!\"£$%^&*()_+{}:<>?"))),
+            "4": ("4", "$", "€"), "'": ("'", "@"), "#": ("#", "~"), "\\": ("\\", "|"), "`": ("`", "¬", "¦"),
+            "a": ("a", "A", "á", "Á"), "e": ("e", "E", "é", "É"), "i": ("i", "I", "í", "Í"),
+            "o": ("o", "O", "ó", "Ó"), "u": ("u", "U", "ú", "Ú"),
+        },
+        "dead": "",
+    },
+    "de": {
+        "keys": {
+            **dict(zip("1234567890", zip("1234567890", "!\"§$%&/()="))),
+            "2": ("2", "\"", "²"), "3": ("3", "§", "³"), "7": ("7", "/", "{"), "8": ("8", "(", "["),
+            "9": ("9", ")", "]"), "0": ("0", "=", "}"), "ß": ("ß", "?", "\\"), "´": ("´", "`"),
+            "^": ("^", "°"), "+": ("+", "*", "~"), "#": ("#", "'"), "-": ("-", "_"), ",": (",", ";"),
+            ".": (".", ":"), "<": ("<", ">", "|"), "ä": ("ä", "Ä"), "ö": ("ö", "Ö"), "ü": ("ü", "Ü"),
+            "q": ("q", "Q", "@"), "e": ("e", "E", "€"), "m": ("m", "M", "µ"), "decimal": (",", ","),
+        },
+        "dead": "^´`",
+    },
+    "fr": {
+        "keys": {
+            **dict(zip("&é\"'(-è_çà)=", zip("&é\"'(-è_çà)=", "1234567890°+"))),
+            "é": ("é", "2", "~"), "\"": ("\"", "3", "#"), "'": ("'", "4", "{"), "(": ("(", "5", "["),
+            "-": ("-", "6", "|"), "è": ("è", "7", "`"), "_": ("_", "8", "\\"), "ç": ("ç", "9", "^"),
+            "à": ("à", "0", "@"), ")": (")", "°", "]"), "=": ("=", "+", "}"), "^": ("^", "¨"),
+            "$": ("$", "£", "¤"), "ù": ("ù", "%"), "*": ("*", "µ"), ",": (",", "?"), ";": (";", "."),
+            ":": (":", "/"), "!": ("!", "§"), "<": ("<", ">"), "²": ("²", "²"), "e": ("e", "E", "€"),
+        },
+        "dead": "^¨~`",
+    },
+}
+
+
+class CompiledLayout:
+    """A layout's translation tables, compiled once for constant-time lookups.
+
+    keys maps a key name to a 5-tuple (plain, shift, altgr, altgr+shift,
+    caps) where missing levels are None and caps says whether Caps Lock
+    swaps the plain and shifted characters.
+    """
+
+    __slots__ = ("name", "keys", "dead_keys")
+
+    def __init__(self, name: str, spec: dict):
+        self.name = name
+        keys = {}
+        for letter in string.ascii_lowercase:
+            keys[letter] = (letter, letter.upper())
+        keys.update(_COMMON_KEYS)
+        keys.update(spec["keys"])
+        self.keys: Dict[str, tuple] = {}
+        for key, levels in keys.items():
+            plain, shifted, altgr, altgr_shift = (tuple(levels) + (None,) * 4)[:4]
+            caps = plain.isalpha() and shifted == plain.upper()
+            self.keys[key] = (plain, shifted, altgr, altgr_shift, caps)
+        # Some platforms report the shifted character as the key name
+        for plain, shifted, *_ in list(self.keys.values()):
+            if shifted not in self.keys:
+                self.keys[shifted] = (shifted, shifted, None, None, False)
+        self.dead_keys = frozenset(spec["dead"])
+
+    def __repr__(self):
+        return f"CompiledLayout({self.name!r}, {len(self.keys)} keys)"
+
+
+_compiled: Dict[str, CompiledLayout] = {}
+
+
+def load_layout(name: Optional[str] = None) -> CompiledLayout:
+    """Compiled tables for a layout (default PASS60_KEYBOARD_LAYOUT, else "us"), built once per process"""
+    name = (name or os.getenv("PASS60_KEYBOARD_LAYOUT", "us")).lower()
+    if name not in LAYOUT_SPECS:
+        raise ValueError(f"Unknown keyboard layout '{name}' (expected one of {', '.join(LAYOUT_SPECS)})")
+    layout = _compiled.get(name)
+    if layout is None:
+        layout = _compiled[name] = CompiledLayout(name, LAYOUT_SPECS[name])
+    return layout
+
+
+class KeyDecoder:
+    """Turns key-down/key-up names into text for one layout in constant time per event.
+
+    Handles Shift, Caps Lock, AltGr (or Ctrl+Alt), keypad keys and dead
+    keys. A single printable key name the layout does not know (another
+    script, an unlisted symbol) is taken as the character itself. Keys
+    pressed with Ctrl, Alt or Windows held are shortcuts and produce no text.
+    """
+
+    def __init__(self, layout: CompiledLayout):
+        self.layout = layout
+        self.reset()
+
+    def reset(self):
+        self._shift = set()
+        self._altgr = set()
+        self._ctrl = set()
+        self._alt = set()
+        self._windows = set()
+        self.caps_lock = False
+        self.pending_dead: Optional[str] = None
+
+    def release(self, name: str):
+        self._shift.discard(name)
+        self._altgr.discard(name)
+        self._ctrl.discard(name)
+        self._alt.discard(name)
+        self._windows.discard(name)
+
+    def press(self, name: Optional[str], is_keypad: bool = False) -> Optional[str]:
+        """Text produced by a key-down, or None"""
+        if name in SHIFT_KEYS:
+            self._shift.add(name)
+            return None
+        if name in ALTGR_KEYS:
+            self._altgr.add(name)
+            return None
+        if name in CTRL_KEYS:
+            self._ctrl.add(name)
+            return None
+        if name in ALT_KEYS:
+            self._alt.add(name)
+            return None
+        if name in WINDOWS_KEYS:
+            self._windows.add(name)
+            return None
+        if name == CAPS_LOCK:
+            self.caps_lock = not self.caps_lock
+            return None
+
+        altgr = bool(self._altgr) or bool(self._ctrl and self._alt)
+        if self._windows or (not altgr and (self._ctrl or self._alt)):
+            return None
+
+        char = DEAD_KEY_ALIASES.get(name)
+        if char is not None:
+            return self._compose(char, True)
+        char = self._lookup(name, altgr, is_keypad)
+        if char is None:
+            return None
+        return self._compose(char, char in self.layout.dead_keys)
+
+    def _lookup(self, name: Optional[str], altgr: bool, is_keypad: bool) -> Optional[str]:
+        entry = self.layout.keys.get(name)
+        if entry is not None:
+            if is_keypad:
+                return entry[0]
+            shifted = bool(self._shift) != (entry[4] and self.caps_lock)
+            return entry[2 + shifted] if altgr else entry[shifted]
+        if name and len(name) == 1 and name.isprintable() and not altgr:
+            return name.upper() if name.isalpha() and bool(self._shift) != self.caps_lock else name
+        return None
+
+    def _compose(self, char: str, dead: bool) -> Optional[str]:
+        pending = self.pending_dead
+        if pending is not None:
+            self.pending_dead = None
+            if char == " ":
+                return pending
+            composed = COMPOSE.get((pending, char))
+            if composed is not None:
+                return composed
+            if dead:
+                # Two dead keys in a row: the first is typed as itself
+                self.pending_dead = char
+                return pending
+            return pending + char
+        if dead:
+            self.pending_dead = char
+            return None
+        return char
+
+    def cancel_dead(self) -> bool:
+        """Drop a pending dead key (backspace); returns whether there was one"""
+        pending = self.pending_dead is not None
+        self.pending_dead = None
+        return pending
@@ -0,0 +1,184 @@
+import json
+import os
+import sys
+import time
+from typing import List, Optional
+
+from keyboard_layouts import CompiledLayout, KeyDecoder, load_layout
+
+
+# keyboard.KEY_DOWN / keyboard.KEY_UP, without importing keyboard here
+KEY_DOWN = "down"
+KEY_UP = "up"
+
+BACKSPACE = "backspace"
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keystroke_corpus.jsonl")
+
+
+class KeystrokeCapture:
+    """Turns typing-mode key events into text in O(1) per key.
+
+    Characters go into a list (backspace pops) and a KeyDecoder turns key
+    names into characters from the layout's precompiled tables, tracking
+    modifiers from the key events themselves rather than querying them per
+    key. Only the hook thread writes; text() can be read from any thread.
+    """
+
+    def __init__(self, layout: Optional[CompiledLayout] = None):
+        self.decoder = KeyDecoder(layout or load_layout())
+        self._chars: List[str] = []
+        self.keys = 0
+        self.handle_ns = 0
+        self.max_handle_ns = 0
+
+    @property
+    def layout(self) -> CompiledLayout:
+        return self.decoder.layout
+
+    def handle(self, event) -> bool:
+        """Process a hook event; returns False for key-downs, which typing mode swallows"""
+        start = time.perf_counter_ns()
+        name = getattr(event, "name", None)
+        if event.event_type == KEY_UP:
+            self.decoder.release(name)
+            return True
+        if event.event_type != KEY_DOWN:
+            return True
+
+        if name == BACKSPACE:
+            if not self.decoder.cancel_dead() and self._chars:
+                self._chars.pop()
+        else:
+            text = self.decoder.press(name, getattr(event, "is_keypad", False))
+            if text:
+                if len(text) == 1:
+                    self._chars.append(text)
+                else:
+                    self._chars.extend(text)
+
+        elapsed = time.perf_counter_ns() - start
+        self.keys += 1
+        self.handle_ns += elapsed
+        if elapsed > self.max_handle_ns:
+            self.max_handle_ns = elapsed
+        return False
+
+    def text(self) -> str:
+        return "".join(self._chars)
+
+    def reset(self):
+        self._chars = []
+        self.decoder.reset()
+        self.keys = 0
+        self.handle_ns = 0
+        self.max_handle_ns = 0
+
+    def __len__(self) -> int:
+        return len(self._chars)
+
+    def describe(self) -> str:
+        average = self.handle_ns / self.keys / 1000 if self.keys else 0.0
+        return (f"{self.keys} keys, {len(self._chars)} chars, {self.layout.name} layout, "
+                f"{average:.1f} µs per key (max {self.max_handle_ns / 1000:.1f} µs)")
+
+
+class KeyEvent:
+    """Minimal stand-in for keyboard.KeyboardEvent"""
+
+    __slots__ = ("event_type", "name", "is_keypad")
+
+    def __init__(self, event_type: str, name: str, is_keypad: bool = False):
+        self.event_type = event_type
+        self.name = name
+        self.is_keypad = is_keypad
+
+
+def parse_events(steps: List[str]) -> List[KeyEvent]:
+    """Corpus steps to events: "+name" key down, "-name" key up, "*name" keypad
+    key down and "=text" a key down per character of text"""
+    events = []
+    for step in steps:
+        kind, name = step[0], step[1:]
+        if kind == "=":
+            events.extend(KeyEvent(KEY_DOWN, char) for char in name)
+        elif kind in "+*":
+            events.append(KeyEvent(KEY_DOWN, name, kind == "*"))
+        elif kind == "-":
+            events.append(KeyEvent(KEY_UP, name))
+        else:
+            raise ValueError(f"Bad corpus step {step!r}")
+    return events
+
+
+def load_corpus(path: str = DEFAULT_CORPUS) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay(recording: dict) -> str:
+    """Text captured from a recording's events, decoded with its layout"""
+    capture = KeystrokeCapture(load_layout(recording["layout"]))
+    for event in parse_events(recording["events"]):
+        capture.handle(event)
+    return capture.text()
+
+
+def record(layout: str):
+    """Record a typing-mode event stream from the real keyboard until Esc and print it as a corpus line"""
+    import keyboard
+
+    steps, capture = [], KeystrokeCapture(load_layout(layout))
+
+    def on_event(e):
+        if e.name == "esc":
+            return
+        steps.append(("*" if e.is_keypad else "+" if e.event_type == KEY_DOWN else "-") + e.name)
+        capture.handle(e)
+
+    print(f"⌨️  Recording with the {layout} layout; press Esc to finish", file=sys.stderr)
+    hook = keyboard.hook(on_event)
+    keyboard.wait("esc")
+    keyboard.unhook(hook)
+    print(json.dumps({"name": "recorded", "layout": layout, "events": steps, "expected": capture.text()},
+                     ensure_ascii=False))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Replay the event corpus offline: check every recording, then measure throughput"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["--record"]:
+        record(argv[1] if len(argv) > 1 else "us")
+        return 0
+
+    corpus = load_corpus(argv[0] if argv else DEFAULT_CORPUS)
+    failures = 0
+    for recording in corpus:
+        got, expected = replay(recording), recording["expected"]
+        if got == expected:
+            print(f"✅ [{recording['layout']}] {recording['name']}")
+        else:
+            failures += 1
+            print(f"❌ [{recording['layout']}] {recording['name']}: expected {expected!r}, got {got!r}")
+
+    # Throughput: replay every recording into one long-lived capture per layout
+    streams = [(load_layout(r["layout"]), parse_events(r["events"])) for r in corpus]
+    captures = {layout.name: KeystrokeCapture(layout) for layout, _ in streams}
+    events = 0
+    start = time.perf_counter()
+    while events < 500_000:
+        for layout, stream in streams:
+            handle = captures[layout.name].handle
+            for event in stream:
+                handle(event)
+            events += len(stream)
+    seconds = time.perf_counter() - start
+    worst = max(capture.max_handle_ns for capture in captures.values()) / 1000
+    print(f"⚡ {events} events in {seconds:.2f}s: {events / seconds:,.0f} events/s, "
+          f"{seconds / events * 1e6:.2f} µs per event (max {worst:.0f} µs)")
+    print(f"{'✅' if not failures else '❌'} {len(corpus) - failures}/{len(corpus)} recordings decoded correctly")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+import os
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+from env_settings import env_float, env_int
+
+
+# When map-reduce is used
+MODE_AUTO = "auto"      # only when the prompt is over the token budget with the map_reduce strategy
+MODE_ITEMS = "items"    # always, one map call per item
+MODE_GROUPS = "groups"  # always, items packed into groups that fit the token budget
+
+MODES = (MODE_AUTO, MODE_ITEMS, MODE_GROUPS)
+
+# What to do when some map calls fail
+ON_FAILURE_SKIP = "skip"  # reduce over the parts that succeeded
+ON_FAILURE_FAIL = "fail"  # fail the whole request
+
+
+class MapReduceConfig:
+    """Settings for the parallel map stage"""
+
+    def __init__(self, mode: str = MODE_AUTO, max_workers: int = 4,
+                 on_failure: str = ON_FAILURE_SKIP, stage_timeout: float = 0.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown map-reduce mode '{mode}' (expected one of {', '.join(MODES)})")
+        if on_failure not in (ON_FAILURE_SKIP, ON_FAILURE_FAIL):
+            raise ValueError(f"Unknown map failure policy '{on_failure}' (expected 'skip' or 'fail')")
+        self.mode = mode
+        self.max_workers = max(max_workers, 1)
+        self.on_failure = on_failure
+        self.stage_timeout = stage_timeout
+
+    @classmethod
+    def from_env(cls) -> "MapReduceConfig":
+        """PASS60_MAP_REDUCE (auto, items, groups), PASS60_MAP_WORKERS,
+        PASS60_MAP_ON_FAILURE (skip, fail) and PASS60_MAP_TIMEOUT (seconds, 0 = none)"""
+        return cls(mode=os.getenv("PASS60_MAP_REDUCE", MODE_AUTO).lower(),
+                   max_workers=env_int("PASS60_MAP_WORKERS", 4),
+                   on_failure=os.getenv("PASS60_MAP_ON_FAILURE", ON_FAILURE_SKIP).lower(),
+                   stage_timeout=env_float("PASS60_MAP_TIMEOUT", 0.0))
+
+
+class MapStageError(Exception):
+    """Raised when the map stage cannot produce anything to reduce"""
+
+
+class MapStageResult:
+    """Outputs, errors and timings of one map stage, in prompt order"""
+
+    def __init__(self, stage: str, count: int, workers: int):
+        self.stage = stage
+        self.workers = workers
+        self.outputs: List[Optional[str]] = [None] * count
+        self.errors: List[Optional[str]] = [None] * count
+        self.call_seconds: List[float] = [0.0] * count
+        self.wall_seconds = 0.0
+
+    @property
+    def failed(self) -> List[int]:
+        return [i for i, error in enumerate(self.errors) if error is not None]
+
+    def describe(self) -> str:
+        calls = len(self.outputs)
+        longest = max(self.call_seconds, default=0.0)
+        summary = (f"{calls} {self.stage} calls on {self.workers} workers in {self.wall_seconds:.2f}s "
+                   f"(longest call {longest:.2f}s, sum {sum(self.call_seconds):.2f}s)")
+        if self.failed:
+            summary += f", {len(self.failed)} failed"
+        return summary
+
+
+# How often a waiting stage checks should_stop()
+STOP_POLL_SECONDS = 0.1
+
+
+def run_map_stage(stage: str, prompts: List[str], generate: Callable[[str], str],
+                  config: MapReduceConfig, should_stop: Callable[[], bool] = lambda: False,
+                  deadline: Optional[float] = None) -> MapStageResult:
+    """Run generate(prompt) for every prompt on a bounded worker pool.
+
+    Wall time tracks the slowest call rather than the sum as long as there
+    are enough workers. The stage stops waiting at the stage timeout, at
+    `deadline` (time.monotonic()) or as soon as should_stop() returns True;
+    calls still running then are recorded as failures and left to finish in
+    the background. Failures are recorded, not raised, unless the config
+    says to fail the whole stage.
+    """
+    workers = min(config.max_workers, len(prompts)) or 1
+    result = MapStageResult(stage, len(prompts), workers)
+
+    def call(index: int):
+        if should_stop():
+            raise MapStageError("cancelled")
+        start = time.perf_counter()
+        try:
+            return generate(prompts[index])
+        finally:
+            result.call_seconds[index] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    futures = {pool.submit(call, i): i for i in range(len(prompts))}
+    return_when = FIRST_EXCEPTION if config.on_failure == ON_FAILURE_FAIL else ALL_COMPLETED
+    if config.stage_timeout:
+        stage_deadline = time.monotonic() + config.stage_timeout
+        deadline = stage_deadline if deadline is None else min(deadline, stage_deadline)
+    while True:
+        # Wait in short slices so cancellation and the deadline are noticed promptly
+        left = STOP_POLL_SECONDS if deadline is None else min(STOP_POLL_SECONDS, deadline - time.monotonic())
+        done, not_done = wait(futures, timeout=max(left, 0), return_when=return_when)
+        if (not not_done or should_stop() or (deadline is not None and time.monotonic() >= deadline)
+                or (return_when == FIRST_EXCEPTION and any(f.exception() for f in done))):
+            break
+    pool.shutdown(wait=False, cancel_futures=True)
+    result.wall_seconds = time.perf_counter() - start
+
+    for future in done:
+        i = futures[future]
+        error = future.exception()
+        if error is None:
+            result.outputs[i] = future.result()
+        else:
+            result.errors[i] = str(error) or type(error).__name__
+    for future in not_done:
+        result.errors[futures[future]] = "timed out" if not future.cancelled() else "not started"
+
+    if result.failed and (config.on_failure == ON_FAILURE_FAIL or len(result.failed) == len(prompts)):
+        first = result.failed[0]
+        raise MapStageError(f"{stage} call {first + 1} failed: {result.errors[first]}")
+    return result
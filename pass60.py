@@ -1,59 +1,286 @@
+import asyncio
+import importlib.util
 import os
 import sys
 import time
 import threading
-import pyperclip
-import keyboard
-import pyautogui
-import google.generativeai as genai
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import startup
+from startup import lazy_import, phase
+
+# Heavy dependencies are imported on first use to keep GUI cold start fast
+pyperclip = lazy_import("pyperclip")
+keyboard = lazy_import("keyboard")
+win10toast = lazy_import("win10toast")
+
+import clipboard_buffer
+from clipboard_buffer import ClipboardBuffer, SpilledItem, item_preview, item_text
+from clipboard_sources import ClipboardSource, content_digest, create_clipboard_source
+from clipboard_transaction import ClipboardNotOwned, ClipboardTransactions
+from response_cache import ResponseCache
+from backends import BackendError, ModelBackend, create_backend, is_transient
+from hotkey_dispatch import CONTROL, STATE, CommandDispatcher
+from keystroke_capture import KeystrokeCapture
+from typing_engine import TypingEngine
+from tool_state import StateSnapshot, ToolState, shared_field
+from prompt_budget import (MAP_REDUCE, PromptBudgeter, PromptPlan, build_items_prompt, build_map_prompt,
+                           build_reduce_prompt, build_summary_prompt, truncate_text)
+import prompt_budget
+from history_index import HistoryIndex, SearchHit
+from history_store import HistoryStore
+from map_reduce import MapReduceConfig, MapStageError, MapStageResult, run_map_stage
+import map_reduce
+from ask_requests import (AskRequest, RequestCancelled, RequestCounters, RequestPolicy,
+                          RequestRegistry, RequestTimedOut, time_left)
+import ask_requests
+import events
+from events import EventBus
 
-from win10toast import ToastNotifier
 
 class ClipboardGeminiTool:
+    # Fields the hotkey, hook, typing and GUI threads share live in self.state;
+    # read several at once with snapshot()
+    current_response: Optional[str] = shared_field("current_response")
+    last_response_cached: bool = shared_field("last_response_cached")
+    response_streaming: bool = shared_field("response_streaming")
+    collecting: bool = shared_field("collecting")
+    typing_mode: bool = shared_field("typing_mode")
+    typing_in_progress: bool = shared_field("typing_in_progress")
+
     def __init__(self):
-        self.clipboard_buffer: List[str] = []
-        self.current_response: Optional[str] = None
-        self.collecting = False
+        self.state = ToolState()
+        # Deduplicated, capped buffer (PASS60_BUFFER_MAX_ITEMS, PASS60_BUFFER_MAX_BYTES); items over
+        # PASS60_SPILL_BYTES live in temp files and are read back when the prompt is assembled
+        self.clipboard_buffer = ClipboardBuffer.from_env()
+        # Serialises appends so the buffer, history and ITEM_ADDED events agree on order
+        self._append_lock = threading.Lock()
+        self.events = EventBus()
+        self.stream_responses = True
+        self._response_chunk_event = threading.Event()
+
+        # Concurrent asyncio requests (see ask()); the newest finished one
+        # becomes current_response
+        self.requests = RequestRegistry()
+        self._latest_response_id = 0
+        self._response_lock = threading.Lock()
+
+        # Deadlines and retries for model calls (PASS60_REQUEST_TIMEOUT,
+        # PASS60_MAX_RETRIES); Clear and Exit cancel calls in progress
+        self.request_policy = RequestPolicy.from_env()
+        self.request_counters = RequestCounters()
+        self._cancel_blocking = threading.Event()
+
+        # Token budget for prompts (PASS60_TOKEN_BUDGET, PASS60_BUDGET_STRATEGY)
+        self.prompt_budgeter = PromptBudgeter.from_env()
+
+        # Parallel map-reduce over items (PASS60_MAP_REDUCE, PASS60_MAP_WORKERS, ...)
+        self.map_reduce = MapReduceConfig.from_env()
+        self.last_map_stage: Optional[MapStageResult] = None
         self.running = True
-        self.last_clipboard_content = ""
-        self.clipboard_monitor_thread = None
+        self.last_clipboard_digest: Optional[int] = None
+        self.clipboard_source: Optional[ClipboardSource] = None
+        # Ctrl+L pastes through a clipboard transaction (PASS60_PASTE_RESTORE_MIN/MAX); the monitor
+        # skips whatever it writes
+        self.paste_transactions = ClipboardTransactions.from_env()
         self.monitor_clipboard = False
 
-        # New attributes for keyboard input feature
-        self.typing_mode = False
-        self.typed_input = ""
+        # Hotkeys only enqueue; commands run on the dispatcher's threads
+        # (PASS60_HOTKEY_WORKERS, PASS60_HOTKEY_QUEUE)
+        self.hotkeys = CommandDispatcher.from_env()
+
+        # Layout tables (PASS60_KEYBOARD_LAYOUT) are compiled here, once
+        self.keystroke_capture = KeystrokeCapture()
         self.typing_hook = None
         self._blocked_keys = set()
 
-        # New attributes for typing control
-        self.typing_in_progress = False
-        self.typing_paused = False
-        self.typing_stopped = False
+        # New attributes for typing control (pause/stop/position live on the engine)
+        self.typing_engine = TypingEngine()
         self.typing_thread = None
-        self.current_char_index = 0
-        self.typing_speed_multiplier = 1.0  # Speed multiplier (1.0 = normal, 2.0 = double speed)
-
-        # Configure Gemini API
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            print("❌ Error: GEMINI_API_KEY environment variable not set!")
-            print("Please set it with: export GEMINI_API_KEY='your_api_key_here'")
-            sys.exit(1)
 
-        genai.configure(api_key=api_key)
+        # Configure the model backend (PASS60_BACKEND=local for an offline stand-in).
+        # The model itself is built lazily on first request or by the warm-up thread.
         try:
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
-            print("✅ Gemini 2.5 Flash API configured successfully")
+            with phase("backend config"):
+                self.backend: ModelBackend = create_backend()
+            self.model_name = self.backend.model_name
+            print(f"✅ {self.backend.display_name} backend configured successfully")
+        except BackendError as e:
+            print(f"❌ Error: {e}")
+            print("Set your key with: export GEMINI_API_KEY='your_api_key_here'")
+            print("Or run offline with: export PASS60_BACKEND=local")
+            sys.exit(1)
         except Exception as e:
             print(f"❌ Error configuring Gemini API: {e}")
             sys.exit(1)
-        self.notifier = ToastNotifier()
-
-
-
+        self._notifier = None
+
+        # Response cache keyed on the assembled prompt (PASS60_NO_CACHE=1 disables it)
+        self.use_response_cache = not os.getenv("PASS60_NO_CACHE")
+        with phase("response cache load"):
+            self.response_cache = ResponseCache()
+
+        # Session history on disk, opened on first use (PASS60_NO_HISTORY=1 disables it)
+        self.history: Optional[HistoryStore] = None if os.getenv("PASS60_NO_HISTORY") else HistoryStore()
+        # Word index over history items, saved next to the history; brought up to date in the
+        # background warm-up or on the first search
+        self.history_index = HistoryIndex(
+            self.history, on_built=lambda: self.events.publish(events.HISTORY_INDEXED, items=len(self.history_index)))
+
+        # Build the model in the background unless PASS60_WARMUP=0
+        self.warm_up_thread = None
+        if os.getenv("PASS60_WARMUP", "1") != "0":
+            self.start_warm_up()
+
+        if startup.REPORT_ENABLED:
+            startup.print_startup_report()
+
+    @property
+    def notifier(self):
+        """Toast notifier, created on first notification"""
+        if self._notifier is None:
+            with phase("toast notifier init"):
+                self._notifier = win10toast.ToastNotifier()
+        return self._notifier
+
+    def start_warm_up(self):
+        """Import the model SDK, construct the model and build the history index on a background thread"""
+        if self.warm_up_thread and self.warm_up_thread.is_alive():
+            return
 
+        def warm_up():
+            try:
+                with phase("background warm-up"):
+                    self.backend.warm_up()
+            except Exception as e:
+                print(f"⚠️  Model warm-up failed: {e}")
+            else:
+                if startup.REPORT_ENABLED:
+                    startup.print_startup_report("STARTUP REPORT (after warm-up)")
+            try:
+                self.history_index.ensure_built()
+            except Exception as e:
+                print(f"⚠️  History index build failed: {e}")
+
+        self.warm_up_thread = threading.Thread(target=warm_up, daemon=True)
+        self.warm_up_thread.start()
+
+    @property
+    def typing_paused(self) -> bool:
+        return self.typing_engine.paused
+
+    @typing_paused.setter
+    def typing_paused(self, value: bool):
+        self.typing_engine.paused = value
+
+    @property
+    def typing_stopped(self) -> bool:
+        return self.typing_engine.stopped
+
+    @typing_stopped.setter
+    def typing_stopped(self, value: bool):
+        self.typing_engine.stopped = value
+
+    @property
+    def current_char_index(self) -> int:
+        return self.typing_engine.index
+
+    @property
+    def typing_target_cps(self) -> float:
+        """Target typing rate in characters per second"""
+        return self.typing_engine.target_cps
+
+    @typing_target_cps.setter
+    def typing_target_cps(self, value: float):
+        self.typing_engine.target_cps = value
+
+    @property
+    def typing_speed_multiplier(self) -> float:
+        """Target rate relative to normal speed (1.0 = ~67 chars/sec)"""
+        return self.typing_target_cps / TypingEngine.BASE_CHARS_PER_SEC
+
+    @typing_speed_multiplier.setter
+    def typing_speed_multiplier(self, value: float):
+        self.typing_target_cps = TypingEngine.BASE_CHARS_PER_SEC * value
+
+    def _append_item(self, content: str) -> str:
+        """Append an item to the buffer and notify subscribers.
+
+        Returns clipboard_buffer.ADDED, DUPLICATE or TOO_LARGE; only added
+        items are recorded and published. A spilled item's file is copied
+        into the history after the append lock is released.
+        """
+        spilled = None
+        with self._append_lock:
+            evicted = self.clipboard_buffer.evicted
+            outcome = self.clipboard_buffer.append(content)
+            if outcome == clipboard_buffer.DUPLICATE:
+                print("⚠️  Item already in buffer, skipping duplicate")
+                return outcome
+            if outcome == clipboard_buffer.TOO_LARGE:
+                print(f"⚠️  Item is larger than the buffer cap "
+                      f"({self.clipboard_buffer.max_bytes // 1024} KB), skipping it")
+                return outcome
+            if self.clipboard_buffer.evicted > evicted:
+                print(f"🧹 Buffer full, dropped the {self.clipboard_buffer.evicted - evicted} oldest item(s)")
+            items = self.clipboard_buffer.snapshot()
+            entry = items[-1]
+            if isinstance(entry, SpilledItem):
+                # Keep the multi-MB text out of the history JSON and the tokenizer: record and
+                # index the preview with the item's length and digest
+                spilled = entry
+                indexed = entry.preview
+                location = (self.history.record_item(entry.preview, length=entry.length,
+                                                     sha256=entry.digest.hex()) if self.history else None)
+            else:
+                indexed = content
+                location = self.history.record_item(content) if self.history else None
+            self.history_index.add(indexed, session=self.history.current_session if self.history else 0,
+                                   location=location)
+            self.events.publish(events.ITEM_ADDED, index=len(items) - 1, item=indexed,
+                                evicted=self.clipboard_buffer.evicted - evicted)
+        if spilled is not None and self.history:
+            try:
+                self.history.save_blob(spilled.path, spilled.digest.hex())
+            except OSError as e:
+                print(f"⚠️  Could not keep the large item in history ({e}); only its preview is saved")
+        return outcome
+
+    def _clear_items(self):
+        """Empty the buffer and current response and notify subscribers"""
+        with self._append_lock:
+            self.clipboard_buffer.clear()
+            self.current_response = None
+            if self.history:
+                self.history.end_session()
+        self.events.publish(events.BUFFER_CLEARED)
+
+    def _set_collecting(self, collecting: bool):
+        if self.collecting != collecting:
+            self.collecting = collecting
+            self.events.publish(events.COLLECTING_CHANGED, collecting=collecting)
+
+    def set_response(self, response: Optional[str], cached: bool = False,
+                     request_id: Optional[int] = None):
+        """Store a finished response and notify subscribers"""
+        self.current_response = response
+        if self.history and response:
+            self.history.record_response(response, cached=cached, request_id=request_id)
+        self.events.publish(events.RESPONSE_READY, response=response, cached=cached,
+                            request_id=request_id)
+
+    def _announce_response(self, answer: str):
+        """Toast and print a freshly generated response"""
+        # ✅ Show toast when response is ready
+        self.notifier.show_toast(
+            "Gemini Assistant",
+            "✅ Response ready! Choose output method (Paste or Type).",
+            duration=5,
+            threaded=True
+        )
 
+        print("✅ Response received from Gemini!")
+        print(f"📄 Response preview: {answer[:100]}{'...' if len(answer) > 100 else ''}")
 
     def add_to_buffer(self):
         """Add current clipboard content to buffer"""
@@ -62,150 +289,516 @@ class ClipboardGeminiTool:
             time.sleep(0.1)
             content = pyperclip.paste()
             if content and content.strip():
-                # Avoid duplicates
-                if not self.clipboard_buffer or content != self.clipboard_buffer[-1]:
-                    self.clipboard_buffer.append(content.strip())
+                content = content.strip()
+                if self._append_item(content) == clipboard_buffer.ADDED:
                     print(
                         f"📋 Added item {len(self.clipboard_buffer)}: {content[:50]}{'...' if len(content) > 50 else ''}")
-                else:
-                    print("⚠️  Item already in buffer, skipping duplicate")
             else:
                 print("⚠️  Clipboard is empty or contains only whitespace")
         except Exception as e:
             print(f"❌ Error reading clipboard: {e}")
 
-    def monitor_clipboard_changes(self):
-        """Monitor clipboard for changes and auto-add when in collecting mode"""
-        while self.running:
-            try:
-                if self.monitor_clipboard and self.collecting:
-                    current_content = pyperclip.paste()
+    def monitor_clipboard_changes(self, current_content: str):
+        """Handle a clipboard change notification and auto-add when in collecting mode"""
+        try:
+            if not (self.monitor_clipboard and self.collecting):
+                return
 
-                    # Check if clipboard content has changed
-                    if (current_content and
-                            current_content.strip() and
-                            current_content != self.last_clipboard_content):
+            # Check if clipboard content has changed (digest compare, no full-string compare)
+            digest = content_digest(current_content)
+            if not current_content or digest == self.last_clipboard_digest:
+                return
+            self.last_clipboard_digest = digest
 
-                        self.last_clipboard_content = current_content
+            # Our own paste or restore, not a copy by the user
+            if self.paste_transactions.is_own_write(current_content):
+                return
+            self.paste_transactions.clipboard_changed()
 
-                        # Auto-add to buffer if collecting
-                        if not self.clipboard_buffer or current_content.strip() != self.clipboard_buffer[-1]:
-                            self.clipboard_buffer.append(current_content.strip())
-                            print(
-                                f"🔄 Auto-detected copy! Added item {len(self.clipboard_buffer)}: {current_content[:50]}{'...' if len(current_content) > 50 else ''}")
+            content = current_content.strip()
+            if not content:
+                return
 
-                time.sleep(0.2)  # Check every 200ms
+            # Auto-add to buffer if collecting
+            if self._append_item(content) == clipboard_buffer.ADDED:
+                print(
+                    f"🔄 Auto-detected copy! Added item {len(self.clipboard_buffer)}: {content[:50]}{'...' if len(content) > 50 else ''}")
 
-            except Exception as e:
-                # Silently continue if there's a clipboard error
-                time.sleep(0.5)
+        except Exception as e:
+            # Silently continue if there's a clipboard error
+            pass
 
     def start_clipboard_monitoring(self):
-        """Start monitoring clipboard changes"""
-        if not self.clipboard_monitor_thread or not self.clipboard_monitor_thread.is_alive():
-            self.monitor_clipboard = True
-            self.last_clipboard_content = pyperclip.paste() if pyperclip.paste() else ""
-            self.clipboard_monitor_thread = threading.Thread(target=self.monitor_clipboard_changes, daemon=True)
-            self.clipboard_monitor_thread.start()
+        """Subscribe to clipboard change notifications"""
+        if self.clipboard_source is None:
+            self.clipboard_source = create_clipboard_source()
+            print(f"👀 Clipboard watcher: {self.clipboard_source.name}")
+
+        self.monitor_clipboard = True
+        try:
+            self.last_clipboard_digest = content_digest(self.clipboard_source.read())
+        except Exception:
+            self.last_clipboard_digest = None
+        self.clipboard_source.start(self.monitor_clipboard_changes)
 
     def stop_clipboard_monitoring(self):
         """Stop monitoring clipboard changes"""
         self.monitor_clipboard = False
+        if self.clipboard_source:
+            self.clipboard_source.stop()
+
+    def build_prompt(self, items: Optional[List[str]] = None) -> str:
+        """Assemble the prompt sent to Gemini from items (default: the collected buffer)"""
+        items = self.clipboard_buffer if items is None else items
+        return build_items_prompt([item_text(item) for item in items])
+
+    def prepare_prompt(self, items: List[str], should_stop: Callable[[], bool] = lambda: False,
+                       deadline: Optional[float] = None) -> Tuple[str, PromptPlan]:
+        """Fit items into the token budget and return the prompt to send with its plan.
+
+        Blocks while the plan's summary or map calls run, until they finish,
+        should_stop() returns True (RequestCancelled) or the time.monotonic()
+        deadline passes (RequestTimedOut). Spilled items are read back here.
+        """
+        items = [item_text(item) for item in items]
+        budgeter = self.prompt_budgeter
+        start = time.perf_counter()
+        if self.map_reduce.mode == map_reduce.MODE_AUTO:
+            plan = budgeter.plan(items)
+        else:
+            plan = budgeter.plan_map_reduce(items, per_item=self.map_reduce.mode == map_reduce.MODE_ITEMS)
+        print(f"🧮 Token budget: {plan.describe()}")
+
+        if plan.strategy is None:
+            prompt = build_items_prompt(items)
+        elif plan.strategy == MAP_REDUCE:
+            parts = len(plan.groups)
+            notes = self._run_stage(
+                "map", [build_map_prompt(group, k, parts) for k, group in enumerate(plan.groups, 1)],
+                should_stop, deadline).outputs
+            prompt = build_reduce_prompt(notes)
+            if budgeter.estimate(prompt) > budgeter.max_tokens:
+                share = (budgeter.max_tokens - prompt_budget.PROMPT_OVERHEAD_TOKENS) // parts
+                keep_chars = int((share - prompt_budget.ITEM_OVERHEAD_TOKENS) * budgeter.chars_per_token)
+                prompt = build_reduce_prompt([truncate_text(note, keep_chars) if note is not None else None
+                                              for note in notes])
+        else:
+            sent = list(plan.items)
+            if plan.summarize:
+                keep_chars = int((budgeter.max_tokens - prompt_budget.PROMPT_OVERHEAD_TOKENS)
+                                 * budgeter.chars_per_token)
+                max_words = plan.summary_tokens * 3 // 4
+                prompts = [build_summary_prompt(truncate_text(items[i], keep_chars), max_words)
+                           for i in plan.summarize]
+                try:
+                    summaries = self._run_stage("summary", prompts, should_stop, deadline).outputs
+                except MapStageError as e:
+                    if self.map_reduce.on_failure == map_reduce.ON_FAILURE_FAIL:
+                        raise
+                    print(f"⚠️  Summaries failed ({e}); truncating those items instead")
+                    summaries = [None] * len(prompts)
+                summary_chars = int(plan.summary_tokens * budgeter.chars_per_token)
+                for i, summary in zip(plan.summarize, summaries):
+                    if summary is None:
+                        sent[i] = truncate_text(items[i], summary_chars)
+                    else:
+                        summary = truncate_text(summary, summary_chars)
+                        sent[i] = f"[Summary of a {len(items[i])}-char item]\n{summary}"
+            prompt = build_items_prompt(sent)
+
+        plan.estimated_tokens = budgeter.estimate(prompt)
+        plan.prepare_seconds = time.perf_counter() - start
+        return prompt, plan
 
-    def send_to_gemini(self) -> Optional[str]:
-        """Send collected items to Gemini 2.5 Flash"""
+    def _run_stage(self, stage: str, prompts: List[str], should_stop: Callable[[], bool],
+                   deadline: Optional[float] = None) -> MapStageResult:
+        """Run independent model calls (map steps, summaries) on the bounded worker pool"""
+        try:
+            result = run_map_stage(stage, prompts, lambda prompt: self._generate_with_retries(prompt, deadline),
+                                   self.map_reduce, should_stop, deadline)
+        except MapStageError:
+            if should_stop():
+                raise RequestCancelled()
+            time_left(deadline)
+            raise
+        if should_stop():
+            raise RequestCancelled()
+        time_left(deadline)
+        self.last_map_stage = result
+        print(f"🧩 {result.describe()}")
+        for i in result.failed:
+            print(f"⚠️  {stage} call {i + 1} failed: {result.errors[i]}")
+        return result
+
+    def _generate_with_retries(self, prompt: str, deadline: Optional[float] = None) -> str:
+        """Blocking generate() with the request policy's retries, given the time left before deadline"""
+        attempt = 0
+        while True:
+            try:
+                return self.backend.generate(prompt, timeout=time_left(deadline))
+            except Exception as e:
+                time_left(deadline)
+                if not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                time.sleep(self._note_retry(e, attempt))
+
+    def _report_tokens(self, prompt: str, plan: PromptPlan, usage: dict, answer_seconds: float):
+        """Print stage timings and estimated vs reported tokens, and refine the estimator"""
+        print(f"⏱️  Stages: prepare {plan.prepare_seconds:.2f}s, answer {answer_seconds:.2f}s")
+        actual = usage.get("prompt_tokens")
+        output = usage.get("output_tokens")
+        print(f"🧮 Tokens: ~{plan.estimated_tokens} estimated, "
+              f"{actual if actual is not None else '?'} actual prompt, "
+              f"{output if output is not None else '?'} output")
+        if actual:
+            self.prompt_budgeter.observe(len(prompt), actual)
+        if self.history:
+            self.history.record_prompt(prompt, strategy=plan.strategy, estimated_tokens=plan.estimated_tokens,
+                                       prompt_tokens=actual, output_tokens=output,
+                                       prepare_seconds=round(plan.prepare_seconds, 3),
+                                       answer_seconds=round(answer_seconds, 3))
+
+    def restore_session(self, session_id: int) -> bool:
+        """Load a past session's items and last response from history into the buffer"""
+        session = self.history.load(session_id) if self.history else None
+        if session is None:
+            print(f"❌ No history session #{session_id}")
+            return False
+        self._clear_items()
+        for item in session.items:
+            self._append_item(item)
+        if session.responses:
+            self.set_response(session.responses[-1]["text"])
+        print(f"📜 Restored session #{session_id}: {len(session.items)} items"
+              f"{' and its last response' if session.responses else ''}")
+        if session.missing:
+            print(f"⚠️  Skipped {len(session.missing)} large item(s) whose full text is no longer stored")
+        return True
+
+    def search_history(self, query: str, limit: int = 50, wait: bool = True) -> List[SearchHit]:
+        """Newest history items containing every word of query (wait=False: don't block on the index build)"""
+        return self.history_index.search(query, limit, wait)
+
+    def add_search_hit(self, hit: SearchHit) -> bool:
+        """Add a search result's full text to the buffer"""
+        text = self.history_index.text(hit)
+        if not text:
+            print("❌ That history item is no longer available")
+            return False
+        if self._append_item(text) != clipboard_buffer.ADDED:
+            return False
+        print(f"✅ Added history item to buffer (Total: {len(self.clipboard_buffer)} items)")
+        return True
+
+    def search_clipboard_history(self):
+        """Search history for the words currently on the clipboard and print the matches"""
+        query = (pyperclip.paste() or "").strip()
+        if not query:
+            print("⚠️  Copy some words to search history for first")
+            return
+        hits = self.search_history(query, limit=10)
+        print(f"\n🔎 {len(hits)} history matches for '{query[:40]}' "
+              f"({self.history_index.last_query_ms:.2f} ms):")
+        for hit in hits:
+            print(f"  #{hit.session} {time.strftime('%Y-%m-%d %H:%M', time.localtime(hit.timestamp))}  "
+                  f"{hit.preview}")
+
+    def stream_from_gemini(self, prompt: str, deadline: Optional[float] = None,
+                           usage: Optional[dict] = None) -> Iterator[str]:
+        """Yield response text chunks as the model backend generates them.
+
+        current_response grows as chunks arrive, so type_response can start
+        typing before the full answer is ready. The time left before the
+        time.monotonic() deadline is passed to the backend as its request
+        timeout, so a stalled first chunk times out too; cancellation and
+        the deadline are also checked between chunks.
+        """
+        self.current_response = ""
+        self.response_streaming = True
+        try:
+            for text in self.backend.stream(prompt, usage, time_left(deadline)):
+                if self._cancel_blocking.is_set():
+                    raise RequestCancelled()
+                if deadline is not None and time.monotonic() > deadline:
+                    raise RequestTimedOut()
+                # _clear_items() drops the response under the same lock; the answer is for items
+                # that are gone, so stop instead of appending to None
+                with self._append_lock:
+                    if self.current_response is None:
+                        raise RequestCancelled()
+                    self.current_response += text
+                self._response_chunk_event.set()
+                yield text
+        finally:
+            self.response_streaming = False
+            self._response_chunk_event.set()
+
+    def send_to_gemini(self, stream: Optional[bool] = None,
+                       on_chunk: Optional[Callable[[str], None]] = None,
+                       use_cache: Optional[bool] = None) -> Optional[str]:
+        """Send collected items to the model backend (Gemini 2.5 Flash by default).
+
+        With stream=True (default: self.stream_responses) chunks are passed to
+        on_chunk as they arrive and the full answer is returned at the end.
+        use_cache=False bypasses the response cache for this call.
+        Transient errors are retried, and the whole call (budgeting, map
+        stages and the answer) gives up at the request deadline.
+        """
         if not self.clipboard_buffer:
             print("⚠️  No items in buffer to send")
             return None
 
-        # Create prompt with all collected items
-        prompt_parts = []
-        prompt_parts.append("Please analyze and respond to the following collected items:")
-        prompt_parts.append("")
-
-        for i, item in enumerate(self.clipboard_buffer, 1):
-            prompt_parts.append(f"--- Item {i} ---")
-            prompt_parts.append(item)
-            prompt_parts.append("")
-
-        prompt_parts.append("Please provide a helpful response based on these items.")
-
-        prompt = "\n".join(prompt_parts)
-
-        print(f"🤖 Sending {len(self.clipboard_buffer)} items to Gemini 2.5 Flash...")
-        print(f"📝 Total prompt length: {len(prompt)} characters")
-
+        if stream is None:
+            stream = self.stream_responses
+        if use_cache is None:
+            use_cache = self.use_response_cache
+        self.last_response_cached = False
+
+        # Create prompt with all collected items; the cache is keyed on it
+        # whatever the token budget does to what is actually sent
+        items = self.clipboard_buffer.texts()
+        full_prompt = self.build_prompt(items)
+
+        print(f"🤖 Sending {len(items)} items to {self.backend.display_name}...")
+        print(f"📝 Total prompt length: {len(full_prompt)} characters")
+
+        cache_key = ResponseCache.make_key(full_prompt, self.model_name)
+        if use_cache:
+            start = time.perf_counter()
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.last_response_cached = True
+                if on_chunk:
+                    on_chunk(cached)
+                self.set_response(cached, cached=True)
+                print(f"⚡ Cache hit! Response served in {elapsed_ms:.1f} ms")
+                return cached
+
+        self._cancel_blocking.clear()
+        timeout = self.request_policy.timeout
+        deadline = self.request_policy.deadline()
         try:
-            response = self.model.generate_content(prompt)
-            answer = response.text
-            # ✅ Show toast when response is ready
-            self.notifier.show_toast(
-                "Gemini Assistant",
-                "✅ Response ready! Choose output method (Paste or Type).",
-                duration=5,
-                threaded=True
-            )
-
-            print("✅ Response received from Gemini!")
-            print(f"📄 Response preview: {answer[:100]}{'...' if len(answer) > 100 else ''}")
+            prompt, plan = self.prepare_prompt(items, self._cancel_blocking.is_set, deadline)
+            answer_start = time.perf_counter()
+            usage = {}
+            attempt = 0
+            parts = []
+            while True:
+                try:
+                    if stream:
+                        start = time.perf_counter()
+                        first_chunk_at = None
+                        for text in self.stream_from_gemini(prompt, deadline, usage):
+                            if first_chunk_at is None:
+                                first_chunk_at = time.perf_counter() - start
+                                print(f"⚡ First chunk after {first_chunk_at:.2f}s")
+                            parts.append(text)
+                            if on_chunk:
+                                on_chunk(text)
+                        answer = "".join(parts)
+                    else:
+                        answer = self.backend.generate(prompt, usage, time_left(deadline))
+                    break
+                except RequestCancelled:
+                    raise
+                except Exception as e:
+                    # A call cut off by its timeout is the request running out of time
+                    time_left(deadline)
+                    # Streamed text cannot be taken back, so only retry before the first chunk
+                    if parts or not self._should_retry(e, attempt):
+                        raise
+                    attempt += 1
+                    delay = self._note_retry(e, attempt)
+                    if self._cancel_blocking.wait(delay):
+                        raise RequestCancelled()
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise RequestTimedOut()
+            self._report_tokens(prompt, plan, usage, time.perf_counter() - answer_start)
+            if answer:
+                self.response_cache.put(cache_key, answer)
+            self.set_response(answer)
+            self._announce_response(answer)
             return answer
+        except RequestCancelled:
+            self.request_counters.add("cancellations")
+            print("🛑 Gemini request cancelled")
+            self.current_response = None
+            return None
+        except RequestTimedOut:
+            self.request_counters.add("timeouts")
+            print(f"⏱️  Gemini request timed out after {timeout:.0f}s")
+            self.current_response = None
+            return None
         except Exception as e:
             print(f"❌ Error communicating with Gemini: {e}")
+            if stream:
+                # Drop any partially streamed answer
+                self.current_response = None
             return None
 
-    def paste_response(self):
-        """Paste response via clipboard (Ctrl+L) - instant paste"""
-        if not self.current_response:
-            print("⚠️  No response available to paste")
-            return
-
+    def new_request(self, items: Optional[List[str]] = None) -> AskRequest:
+        """Register a request over a snapshot of items (default: the current buffer)"""
+        return self.requests.create(list(self.clipboard_buffer.snapshot() if items is None else items))
+
+    async def ask(self, items: Optional[List[str]] = None,
+                  on_chunk: Optional[Callable[[int, str], None]] = None,
+                  use_cache: Optional[bool] = None) -> Optional[str]:
+        """Ask the model about items (default: a snapshot of the buffer).
+
+        Any number of asks can run at once. Each is tracked by id in
+        self.requests and can be cancelled with cancel_request() from any
+        thread. on_chunk(request_id, text) receives the answer as it streams.
+        Returns the answer, or None if the request failed.
+        """
+        return await self.run_request(self.new_request(items), on_chunk, use_cache)
+
+    async def run_request(self, request: AskRequest,
+                          on_chunk: Optional[Callable[[int, str], None]] = None,
+                          use_cache: Optional[bool] = None) -> Optional[str]:
+        """Run a request from new_request() on the current event loop"""
+        if use_cache is None:
+            use_cache = self.use_response_cache
+        timeout = self.request_policy.timeout
         try:
-            print("📋 Pasting response via clipboard...")
-            # Save current clipboard content
-            original_clipboard = pyperclip.paste()
-
-            # Copy response to clipboard
-            pyperclip.copy(self.current_response)
-            time.sleep(0.1)
-
-            # Try multiple paste methods
-            paste_success = False
+            # Raises CancelledError if the request was cancelled before it started
+            request.attach()
+            if not request.items:
+                print(f"⚠️  Request #{request.id}: no items to send")
+                self._update_request(request, ask_requests.FAILED, "no items")
+                return None
+
+            full_prompt = self.build_prompt(request.items)
+            cache_key = ResponseCache.make_key(full_prompt, self.model_name)
+            print(f"🤖 Request #{request.id}: sending {len(request.items)} items "
+                  f"({len(full_prompt)} chars) to {self.backend.display_name}...")
+
+            cached = self.response_cache.get(cache_key) if use_cache else None
+            if cached is not None:
+                request.response = cached
+                request.cached = True
+                if on_chunk:
+                    on_chunk(request.id, cached)
+            else:
+                self._update_request(request, ask_requests.STREAMING)
+                await asyncio.wait_for(self._stream_request(request, on_chunk), timeout or None)
+        except (asyncio.TimeoutError, RequestTimedOut):
+            # RequestTimedOut: the deadline ran out in a budgeting stage before wait_for fired
+            self.request_counters.add("timeouts")
+            print(f"⏱️  Request #{request.id} timed out after {timeout:.0f}s")
+            self._update_request(request, ask_requests.TIMED_OUT, "timed out")
+            return None
+        except asyncio.CancelledError:
+            self.request_counters.add("cancellations")
+            print(f"🛑 Request #{request.id} cancelled")
+            self._update_request(request, ask_requests.CANCELLED)
+            raise
+        except Exception as e:
+            print(f"❌ Request #{request.id} failed: {e}")
+            self._update_request(request, ask_requests.FAILED, str(e))
+            return None
 
-            # Method 1: pyautogui hotkey
+        if request.cached:
+            print(f"⚡ Request #{request.id}: cache hit")
+        elif request.response:
+            self.response_cache.put(cache_key, request.response)
+        self._update_request(request, ask_requests.DONE)
+
+        with self._response_lock:
+            newest = request.id > self._latest_response_id
+            if newest:
+                self._latest_response_id = request.id
+        if newest:
+            self.last_response_cached = request.cached
+            self.set_response(request.response, cached=request.cached, request_id=request.id)
+            if not request.cached:
+                self._announce_response(request.response)
+        else:
+            print(f"ℹ️  Request #{request.id} finished after a newer response; kept on the request only")
+        return request.response
+
+    async def _stream_request(self, request: AskRequest,
+                              on_chunk: Optional[Callable[[int, str], None]]):
+        """Budget the prompt, then stream an answer into request.response, retrying transient errors"""
+        loop = asyncio.get_running_loop()
+        # Bounds the budgeting stages on the executor thread, which wait_for cannot interrupt
+        prompt, plan = await loop.run_in_executor(None, self.prepare_prompt, request.items,
+                                                  lambda: request.cancel_requested, self.request_policy.deadline())
+        answer_start = time.perf_counter()
+        usage = {}
+        attempt = 0
+        while True:
             try:
-                pyautogui.hotkey('ctrl', 'v')
-                paste_success = True
-                print("✅ Response pasted instantly!")
+                async for text in self.backend.stream_async(prompt, usage):
+                    request.response += text
+                    if on_chunk:
+                        on_chunk(request.id, text)
+                self._report_tokens(prompt, plan, usage, time.perf_counter() - answer_start)
+                return
             except Exception as e:
-                print(f"⚠️  pyautogui paste failed: {e}")
-
-            if not paste_success:
-                # Method 2: keyboard library
-                try:
-                    keyboard.send('ctrl+v')
-                    paste_success = True
-                    print("✅ Response pasted via keyboard!")
-                except Exception as e:
-                    print(f"⚠️  keyboard paste failed: {e}")
-
-            if not paste_success:
-                print("❌ Clipboard paste failed. Response is in clipboard - use Ctrl+V manually")
-
-            # Restore original clipboard after a delay
-            def restore_clipboard():
-                time.sleep(2)
-                try:
-                    pyperclip.copy(original_clipboard)
-                except:
-                    pass
+                # Streamed text cannot be taken back, so only retry before the first chunk
+                if request.response or not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                await asyncio.sleep(self._note_retry(e, attempt, request.id))
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        return attempt < self.request_policy.max_retries and is_transient(error)
+
+    def _note_retry(self, error: Exception, attempt: int, request_id: Optional[int] = None) -> float:
+        """Count a retry and return the jittered delay before it"""
+        self.request_counters.add("retries")
+        delay = self.request_policy.backoff_delay(attempt)
+        label = f"Request #{request_id}" if request_id else "Gemini request"
+        print(f"🔁 {label} failed ({error}); retry {attempt}/{self.request_policy.max_retries} "
+              f"in {delay:.1f}s")
+        return delay
+
+    def cancel_request(self, request_id: int) -> bool:
+        """Cancel a running ask() by id. Safe to call from any thread"""
+        return self.requests.cancel(request_id)
+
+    def cancel_all_requests(self) -> int:
+        """Cancel every model call in progress, async or blocking"""
+        self._cancel_blocking.set()
+        return self.requests.cancel_all()
+
+    def request_failure_message(self, request_id: int) -> str:
+        """Text to show for a request that ended without an answer"""
+        request = self.requests.get(request_id)
+        status = request.status if request else ask_requests.FAILED
+        if status == ask_requests.CANCELLED:
+            return "🛑 Request cancelled."
+        if status == ask_requests.TIMED_OUT:
+            return f"⏱️ No response from Gemini within {self.request_policy.timeout:.0f}s."
+        return "❌ Failed to get response from Gemini."
+
+    def _update_request(self, request: AskRequest, status: str, error: Optional[str] = None):
+        if status in ask_requests.FINISHED_STATES:
+            request.finish(status, error)
+        else:
+            request.status = status
+        self.events.publish(events.REQUEST_UPDATED, request_id=request.id, status=status)
 
-            threading.Thread(target=restore_clipboard, daemon=True).start()
+    def paste_response(self):
+        """Paste response via clipboard (Ctrl+L) - instant paste, then the previous clipboard comes back"""
+        response = self.current_response
+        if not response:
+            print("⚠️  No response available to paste")
+            return
 
+        try:
+            result = self.paste_transactions.paste(response)
+            print(f"✅ Response pasted in {result.total_ms:.1f} ms "
+                  f"(clipboard ready after {result.readback_ms:.1f} ms, via {result.method})")
+        except ClipboardNotOwned as e:
+            print(f"❌ Nothing pasted: {e}. Use Ctrl+V manually once it arrives")
         except Exception as e:
             print(f"❌ Paste failed: {e}")
             print("📋 Trying to copy to clipboard for manual paste...")
             try:
-                pyperclip.copy(self.current_response)
+                self.paste_transactions.copy(response)
                 print("✅ Response copied to clipboard - paste manually with Ctrl+V")
             except Exception as e2:
                 print(f"❌ Even clipboard copy failed: {e2}")
@@ -216,12 +809,14 @@ class ClipboardGeminiTool:
             print("⚠️  No response available to type")
             return
 
-        if self.typing_in_progress:
+        # Test-and-set, so two presses racing on different workers cannot both start typing
+        if not self.state.claim("typing_in_progress"):
             print("⚠️  Already typing! Use Ctrl+Shift+P to pause or Ctrl+Shift+Z to stop")
             return
+        self.typing_engine.reset()
 
         print("⌨️  Starting to type response...")
-        print(f"⚡ Current speed: {self.typing_speed_multiplier}x normal")
+        print(f"⚡ Current speed: {self.typing_target_cps:.0f} chars/sec ({self.typing_speed_multiplier:.1f}x normal)")
         print("📍 Position your cursor and wait 3 seconds...")
         print("⏸️  Press Ctrl+Shift+P to pause/resume")
         print("🛑 Press Ctrl+Shift+Z to stop typing")
@@ -233,12 +828,13 @@ class ClipboardGeminiTool:
         for i in range(3, 0, -1):
             print(f"⏳ Starting in {i}...")
             time.sleep(1)
+            if self.typing_stopped:
+                print("🛑 Typing cancelled before it started")
+                self.typing_in_progress = False
+                return
 
-        # Reset typing state
-        self.typing_in_progress = True
-        self.typing_paused = False
-        self.typing_stopped = False
-        self.current_char_index = 0
+        self.events.publish(events.TYPING_PROGRESS, in_progress=True, index=0,
+                            total=len(self.current_response), chars_per_sec=0.0)
 
         # Start typing in a separate thread
         self.typing_thread = threading.Thread(target=self._type_text_thread, daemon=True)
@@ -246,46 +842,39 @@ class ClipboardGeminiTool:
 
     def _type_text_thread(self):
         """Thread function to handle the actual typing with pause/stop support"""
-        try:
-            total_chars = len(self.current_response)
-
-            while self.current_char_index < total_chars and not self.typing_stopped:
-                # Check if paused
-                while self.typing_paused and not self.typing_stopped:
-                    time.sleep(0.1)
-
-                if self.typing_stopped:
-                    break
+        def report_progress(index, total_chars, chars_per_sec):
+            self.events.publish(events.TYPING_PROGRESS, in_progress=True, index=index,
+                                total=total_chars, chars_per_sec=chars_per_sec)
+            progress = (index / total_chars) * 100 if total_chars else 0
+            print(
+                f"📝 Progress: {progress:.1f}% ({index}/{total_chars} chars) - Speed: {chars_per_sec:.0f} chars/sec")
 
-                # Type current character
-                char = self.current_response[self.current_char_index]
-                pyautogui.write(char, interval=0)
-
-                self.current_char_index += 1
-
-                # Show progress every 100 characters
-                if self.current_char_index % 100 == 0:
-                    progress = (self.current_char_index / total_chars) * 100
-                    chars_per_sec = 67 * self.typing_speed_multiplier
-                    print(
-                        f"📝 Progress: {progress:.1f}% ({self.current_char_index}/{total_chars} chars) - Speed: {chars_per_sec:.0f} chars/sec")
-
-                # Calculate delay based on speed multiplier
-                base_delay = 0.015  # ~67 chars per second at 1x speed
-                actual_delay = base_delay / self.typing_speed_multiplier
-                time.sleep(actual_delay)
+        try:
+            self.typing_engine.run(
+                text_source=lambda: self.current_response,
+                streaming=lambda: self.response_streaming,
+                wake=self._response_chunk_event,
+                on_progress=report_progress,
+            )
 
             # Typing completed
             self.typing_in_progress = False
+            total_chars = len(self.current_response or "")
+            achieved = self.typing_engine.achieved_rate()
+            self.events.publish(events.TYPING_PROGRESS, in_progress=False, index=self.current_char_index,
+                                total=total_chars, chars_per_sec=achieved)
 
             if self.typing_stopped:
                 print(f"🛑 Typing stopped at character {self.current_char_index}/{total_chars}")
             else:
                 print("✅ Response typed successfully!")
+            print(f"⚡ Achieved speed: {achieved:.0f} chars/sec")
 
         except Exception as e:
             print(f"❌ Typing failed: {e}")
             self.typing_in_progress = False
+            self.events.publish(events.TYPING_PROGRESS, in_progress=False, index=self.current_char_index,
+                                total=len(self.current_response or ""), chars_per_sec=0.0)
 
     def pause_typing(self):
         """Pause or resume typing"""
@@ -303,18 +892,16 @@ class ClipboardGeminiTool:
             print("▶️  Typing RESUMED")
 
     def increase_typing_speed(self):
-        """Double the typing speed (Shift+F)"""
+        """Double the typing speed (Ctrl+Shift+F)"""
         if not self.typing_in_progress:
             print("⚠️  No typing in progress - speed will apply to next typing session")
 
-        old_speed = self.typing_speed_multiplier
-        self.typing_speed_multiplier = min(self.typing_speed_multiplier * 2.0, 64.0)  # Max 16x speed
-
-        chars_per_sec = 200 * self.typing_speed_multiplier
-        print(
-            f"⚡ Speed increased: {old_speed:.1f}x → {self.typing_speed_multiplier:.1f}x ({chars_per_sec:.0f} chars/sec)")
+        old_cps = self.typing_target_cps
+        self.typing_target_cps = old_cps * 2.0
+        print(f"⚡ Speed increased: {old_cps:.0f} → {self.typing_target_cps:.0f} chars/sec "
+              f"({self.typing_speed_multiplier:.1f}x)")
 
-        if self.typing_speed_multiplier >= 64:
+        if self.typing_target_cps >= TypingEngine.MAX_CHARS_PER_SEC:
             print("🚀 Maximum speed reached!")
 
     def decrease_typing_speed(self):
@@ -322,25 +909,27 @@ class ClipboardGeminiTool:
         if not self.typing_in_progress:
             print("⚠️  No typing in progress - speed will apply to next typing session")
 
-        old_speed = self.typing_speed_multiplier
-        self.typing_speed_multiplier = max(self.typing_speed_multiplier / 2.0, 0.125)  # Min 1/8x speed
+        old_cps = self.typing_target_cps
+        self.typing_target_cps = old_cps / 2.0
+        print(f"🐌 Speed decreased: {old_cps:.0f} → {self.typing_target_cps:.0f} chars/sec "
+              f"({self.typing_speed_multiplier:.2f}x)")
 
-        chars_per_sec = 67 * self.typing_speed_multiplier
-        print(
-            f"🐌 Speed decreased: {old_speed:.1f}x → {self.typing_speed_multiplier:.1f}x ({chars_per_sec:.0f} chars/sec)")
-
-        if self.typing_speed_multiplier <= 0.125:
+        if self.typing_target_cps <= TypingEngine.MIN_CHARS_PER_SEC:
             print("🐌 Minimum speed reached!")
 
     def reset_typing_speed(self):
         """Reset typing speed to normal (Shift+R)"""
-        old_speed = self.typing_speed_multiplier
-        self.typing_speed_multiplier = 1.0
+        old_cps = self.typing_target_cps
+        self.typing_target_cps = TypingEngine.BASE_CHARS_PER_SEC
+
+        print(f"🔄 Speed reset: {old_cps:.0f} → {self.typing_target_cps:.0f} chars/sec (1.0x)")
 
-        print(f"🔄 Speed reset: {old_speed:.1f}x → 1.0x (67 chars/sec)")
+    def stop_typing(self, wait: float = 0.0):
+        """Stop typing completely.
 
-    def stop_typing(self):
-        """Stop typing completely"""
+        Only signals the typing thread, which stops before its next
+        character; pass wait (seconds) to also wait for it to finish.
+        """
         if not self.typing_in_progress:
             print("⚠️  No typing in progress")
             return
@@ -352,53 +941,81 @@ class ClipboardGeminiTool:
         print(f"🛑 Typing STOPPED at {progress:.1f}% ({self.current_char_index} chars)")
 
         # Wait for typing thread to finish
-        if self.typing_thread and self.typing_thread.is_alive():
-            self.typing_thread.join(timeout=1.0)
+        if wait and self.typing_thread and self.typing_thread.is_alive():
+            self.typing_thread.join(timeout=wait)
+
+    def snapshot(self) -> StateSnapshot:
+        """Consistent view of the shared fields, buffer items and typing position"""
+        return StateSnapshot(self.state.values(), self.clipboard_buffer.snapshot(), self.typing_engine.index,
+                             self.typing_engine.paused, self.state.version)
 
     def show_status(self):
         """Display current status"""
+        state = self.snapshot()
         print("\n" + "=" * 60)
         print("📊 CURRENT STATUS")
         print("=" * 60)
-        print(f"📋 Buffer items: {len(self.clipboard_buffer)}")
-        print(f"🤖 Response ready: {'Yes' if self.current_response else 'No'}")
-        print(f"🔄 Collecting mode: {'Active' if self.collecting else 'Inactive'}")
-        print(f"⌨️  Typing mode: {'Active' if self.typing_mode else 'Inactive'}")
-        print(f"📝 Typing in progress: {'Yes' if self.typing_in_progress else 'No'}")
-
-        if self.typing_in_progress:
-            progress = (self.current_char_index / len(self.current_response)) * 100 if self.current_response else 0
-            chars_per_sec = 67 * self.typing_speed_multiplier
-            print(f"📊 Typing progress: {progress:.1f}% ({self.current_char_index} chars)")
-            print(f"⚡ Typing speed: {self.typing_speed_multiplier:.1f}x ({chars_per_sec:.0f} chars/sec)")
-            print(f"⏸️  Typing paused: {'Yes' if self.typing_paused else 'No'}")
-        elif self.current_response:
-            chars_per_sec = 67 * self.typing_speed_multiplier
-            print(f"⚡ Next typing speed: {self.typing_speed_multiplier:.1f}x ({chars_per_sec:.0f} chars/sec)")
-
-        if self.clipboard_buffer:
+        print(f"📋 Buffer items: {len(state.items)} ({self.clipboard_buffer.describe()})")
+        print(f"🤖 Response ready: {'Yes' if state.current_response else 'No'}"
+              f"{' (from cache)' if state.current_response and state.last_response_cached else ''}")
+        cache_stats = self.response_cache.stats()
+        print(f"💾 Response cache: {'On' if self.use_response_cache else 'Off'} - "
+              f"{cache_stats['entries']} entries, {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        active_requests = self.requests.active()
+        if active_requests:
+            print(f"🧵 Requests in flight: {', '.join(f'#{r.id} ({r.status})' for r in active_requests)}")
+        if self.map_reduce.mode != map_reduce.MODE_AUTO or self.last_map_stage:
+            print(f"🧩 Map-reduce: {self.map_reduce.mode} mode, {self.map_reduce.max_workers} workers, "
+                  f"{self.map_reduce.on_failure} on failure"
+                  f"{f'; last {self.last_map_stage.describe()}' if self.last_map_stage else ''}")
+        counters = self.request_counters.snapshot()
+        print(f"⏱️  Model calls: {counters['timeouts']} timeouts, {counters['retries']} retries, "
+              f"{counters['cancellations']} cancellations (deadline {self.request_policy.timeout:.0f}s)")
+        if self.history and self.history.current_session is not None:
+            print(f"📜 History session: #{self.history.current_session}")
+        if self.paste_transactions.latencies:
+            print(f"📋 Paste: {self.paste_transactions.describe()}")
+        if self.hotkeys.commands:
+            print(f"🎛️  Hotkeys: {self.hotkeys.describe()}")
+        if self.history_index.built:
+            print(f"🔎 History index: {self.history_index.describe()}, "
+                  f"last query {self.history_index.last_query_ms:.2f} ms")
+        print(f"🔄 Collecting mode: {'Active' if state.collecting else 'Inactive'}")
+        print(f"⌨️  Typing mode: {'Active' if state.typing_mode else 'Inactive'}")
+        print(f"📝 Typing in progress: {'Yes' if state.typing_in_progress else 'No'}")
+
+        if state.typing_in_progress:
+            progress = (state.typing_index / len(state.current_response)) * 100 if state.current_response else 0
+            chars_per_sec = self.typing_engine.achieved_rate()
+            print(f"📊 Typing progress: {progress:.1f}% ({state.typing_index} chars)")
+            print(f"⚡ Typing speed: {chars_per_sec:.0f} chars/sec achieved, "
+                  f"target {self.typing_target_cps:.0f} ({self.typing_speed_multiplier:.1f}x)")
+            print(f"⏸️  Typing paused: {'Yes' if state.typing_paused else 'No'}")
+        elif state.current_response:
+            print(f"⚡ Next typing speed: {self.typing_target_cps:.0f} chars/sec ({self.typing_speed_multiplier:.1f}x)")
+
+        if state.items:
             print("\n📝 Buffer contents:")
-            for i, item in enumerate(self.clipboard_buffer, 1):
-                preview = item[:80] + "..." if len(item) > 80 else item
-                print(f"  {i}. {preview}")
+            for i, item in enumerate(state.items, 1):
+                print(f"  {i}. {item_preview(item, 80)}")
 
         print("\n🎯 AVAILABLE ACTIONS:")
-        if not self.collecting:
+        if not state.collecting:
             print("  🚀 Ctrl+Shift+S - Start collecting clipboard items")
         else:
             print("  📋 AUTO-COPY MODE: Just copy (Ctrl+C) anything and it will be auto-added!")
             print("  📋 Ctrl+Shift+A - Manually add current clipboard to buffer")
             print("  ⌨️  Ctrl+Shift+Q - Start typing input mode")
-            if self.typing_mode:
+            if state.typing_mode:
                 print("  🛑 Ctrl+Shift+E - Stop typing and add to buffer")
             print("  ✅ Ctrl+Enter - Finish collecting and send to Gemini")
 
-        if self.current_response:
+        if state.current_response:
             print("\n📥 OUTPUT OPTIONS:")
             print("  📋 Ctrl+L - Paste response instantly (clipboard)")
             print("  ⌨️  Ctrl+Shift+L - Type response with controls")
 
-            if self.typing_in_progress:
+            if state.typing_in_progress:
                 print("\n🎮 TYPING CONTROLS:")
                 print("  ⏸️  Ctrl+Shift+P - Pause/Resume typing")
                 print("  🛑 Ctrl+Shift+Z - Stop typing")
@@ -408,6 +1025,7 @@ class ClipboardGeminiTool:
 
         print("\n🛠️  OTHER CONTROLS:")
         print("  🗑️  Ctrl+Shift+X - Clear buffer")
+        print("  🔎 Ctrl+Shift+K - Search history for the copied words")
         print("  ❓ Ctrl+Shift+H - Show this help")
         print("  🚪 Esc - Exit program")
         print("=" * 60)
@@ -418,9 +1036,11 @@ class ClipboardGeminiTool:
         if self.typing_in_progress:
             self.stop_typing()
 
-        self.clipboard_buffer.clear()
-        self.current_response = None
-        self.collecting = False
+        # The answer would be for items that are gone
+        self.cancel_all_requests()
+
+        self._clear_items()
+        self._set_collecting(False)
         self.stop_clipboard_monitoring()
         # Also stop typing mode if active
         if self.typing_mode:
@@ -430,9 +1050,8 @@ class ClipboardGeminiTool:
 
     def start_collecting(self):
         """Start clipboard collection mode"""
-        self.collecting = True
-        self.clipboard_buffer.clear()
-        self.current_response = None
+        self._clear_items()
+        self._set_collecting(True)
 
         # Start clipboard monitoring
         self.start_clipboard_monitoring()
@@ -457,7 +1076,7 @@ class ClipboardGeminiTool:
             print("🛑 Stopping typing mode first...")
             self.stop_typing_mode()
 
-        self.collecting = False
+        self._set_collecting(False)
         self.stop_clipboard_monitoring()
         print("\n✅ Finished collecting items")
 
@@ -474,9 +1093,9 @@ class ClipboardGeminiTool:
         )
 
         # Send to Gemini
-        response = self.send_to_gemini()
+        response = self.send_to_gemini(on_chunk=lambda text: print(text, end="", flush=True))
+        print()
         if response:
-            self.current_response = response
             print("\n🎉 Ready! Choose your output method:")
             print("📋 Ctrl+L - Paste instantly")
             print("⌨️  Ctrl+Shift+L - Type with pause/stop controls")
@@ -495,13 +1114,14 @@ class ClipboardGeminiTool:
             return
 
         self.typing_mode = True
-        self.typed_input = ""
+        self.keystroke_capture.reset()
         self._blocked_keys = set()
         print("\n⌨️  TYPING MODE ACTIVATED!")
         print("=" * 50)
         print("✏️  Start typing your input now...")
         print("🛑 Press Ctrl+Shift+E when finished")
         print("📝 Everything you type will be captured")
+        print(f"🌐 Keyboard layout: {self.keystroke_capture.layout.name} (set PASS60_KEYBOARD_LAYOUT to change)")
         print("=" * 50)
 
         # Set up keyboard hook for capturing typed input
@@ -510,58 +1130,14 @@ class ClipboardGeminiTool:
     def _setup_typing_hook(self):
         """Set up keyboard hook to capture all typed input"""
 
+        capture = self.keystroke_capture
+
         def on_key_event(e):
             # If typing mode isn't active, let everything pass through
             if not self.typing_mode:
                 return True  # Allow other handlers / apps to receive the event
-
-            # Only process key down events
-            if e.event_type == keyboard.KEY_DOWN:
-                try:
-                    name = e.name
-                except Exception:
-                    name = None
-
-                if name == 'space':
-                    self.typed_input += ' '
-                elif name == 'enter':
-                    self.typed_input += '\n'
-                elif name == 'backspace':
-                    if self.typed_input:
-                        self.typed_input = self.typed_input[:-1]
-                elif name == 'tab':
-                    self.typed_input += '\t'
-                elif name and len(name) == 1 and name.isalpha():
-                    # Handle letters (consider shift for uppercase)
-                    if keyboard.is_pressed('shift'):
-                        self.typed_input += name.upper()
-                    else:
-                        self.typed_input += name.lower()
-                elif name and name.isdigit():
-                    # Handle numbers and their shifted symbols
-                    if keyboard.is_pressed('shift'):
-                        shift_map = {'1': '!', '2': '@', '3': '#', '4': '$', '5': '%',
-                                     '6': '^', '7': '&', '8': '*', '9': '(', '0': ')'}
-                        self.typed_input += shift_map.get(name, name)
-                    else:
-                        self.typed_input += name
-                elif name in ['-', '=', '[', ']', '\\', ';', "'", ',', '.', '/']:
-                    # Handle punctuation
-                    if keyboard.is_pressed('shift'):
-                        shift_punct = {'-': '_', '=': '+', '[': '{', ']': '}',
-                                       '\\': '|', ';': ':', "'": '"', ',': '<',
-                                       '.': '>', '/': '?'}
-                        self.typed_input += shift_punct.get(name, name)
-                    else:
-                        self.typed_input += name
-                elif name == '`':
-                    self.typed_input += '~' if keyboard.is_pressed('shift') else '`'
-
-                # Return False to prevent the key from reaching other applications
-                return False
-
-            # For non-key-down events just allow pass through
-            return True
+            # Key-downs are captured and kept from other applications
+            return capture.handle(e)
 
         # Add the keyboard hook
         self.typing_hook = keyboard.hook(on_key_event)
@@ -582,59 +1158,75 @@ class ClipboardGeminiTool:
         # Clear blocked keys set (no longer needed to unblock individual keys)
         self._blocked_keys.clear()
 
-        if self.typed_input.strip():
-            self.clipboard_buffer.append(self.typed_input.strip())
+        typed_input = self.keystroke_capture.text().strip()
+        if typed_input and self._append_item(typed_input) == clipboard_buffer.ADDED:
             print(f"\n✅ TYPING COMPLETE!")
             print("=" * 50)
             print(f"📝 Added typed input to buffer (item {len(self.clipboard_buffer)}):")
+            print(f"⏱️  Capture: {self.keystroke_capture.describe()}")
             print("--- Typed Content ---")
             # Show first few lines of typed content
-            lines = self.typed_input.strip().split('\n')
+            lines = typed_input.split('\n')
             for i, line in enumerate(lines[:5]):  # Show first 5 lines
                 print(f"   {line}")
             if len(lines) > 5:
                 print(f"   ... ({len(lines) - 5} more lines)")
             print("=" * 50)
-        else:
+        elif not typed_input:
             print("\n⚠️  No input was typed")
 
-        self.typed_input = ""
+        self.keystroke_capture.reset()
 
         # Show updated status
         self.show_status()
 
     def setup_hotkeys(self):
-        """Set up all keyboard hotkeys"""
-        keyboard.add_hotkey('ctrl+shift+s', self.start_collecting)
-        keyboard.add_hotkey('ctrl+shift+a', self.add_to_buffer)
-        keyboard.add_hotkey('ctrl+enter', self.finish_collecting)
+        """Set up all keyboard hotkeys.
+
+        Callbacks run on the keyboard listener thread, so each hotkey only
+        submits a command to self.hotkeys. Control commands (pause, stop,
+        speed) only set flags and have their own thread, so they never wait
+        behind a model call, the typing countdown or a status print; clear,
+        exit and typing mode share a second thread.
+        """
+        hotkeys = self.hotkeys
+
+        def bind(combo, func, **rules):
+            keyboard.add_hotkey(combo, hotkeys.register(func.__name__, func, **rules))
+
+        bind('ctrl+shift+s', self.start_collecting)
+        bind('ctrl+shift+a', self.add_to_buffer)
+        bind('ctrl+enter', self.finish_collecting, rerun=False)
 
         # Output options
-        keyboard.add_hotkey('ctrl+l', self.paste_response)  # Instant paste
-        keyboard.add_hotkey('ctrl+shift+l', self.type_response)  # Controlled typing
+        bind('ctrl+l', self.paste_response, rerun=False)  # Instant paste
+        bind('ctrl+shift+l', self.type_response, rerun=False)  # Controlled typing
 
-        # Typing controls (only work during typing)
-        keyboard.add_hotkey('ctrl+shift+p', self.pause_typing)  # Pause/resume
-        keyboard.add_hotkey('ctrl+shift+z', self.stop_typing)  # Stop typing
+        # Typing controls (only work during typing); every press counts
+        bind('ctrl+shift+p', self.pause_typing, lane=CONTROL, coalesce=False)  # Pause/resume
+        bind('ctrl+shift+z', self.stop_typing, lane=CONTROL)  # Stop typing
 
         # Speed controls (work anytime)
-        keyboard.add_hotkey('ctrl+shift+f', self.increase_typing_speed)  # Double speed
-        keyboard.add_hotkey('shift+s', self.decrease_typing_speed)  # Half speed
-        keyboard.add_hotkey('shift+r', self.reset_typing_speed)  # Reset speed
+        bind('ctrl+shift+f', self.increase_typing_speed, lane=CONTROL, coalesce=False)  # Double speed
+        bind('shift+s', self.decrease_typing_speed, lane=CONTROL, coalesce=False)  # Half speed
+        bind('shift+r', self.reset_typing_speed, lane=CONTROL)  # Reset speed
 
-        keyboard.add_hotkey('ctrl+shift+x', self.clear_buffer)
-        keyboard.add_hotkey('ctrl+shift+h', self.show_status)
-        keyboard.add_hotkey('esc', self.exit_program)
+        bind('ctrl+shift+x', self.clear_buffer, lane=STATE)
+        bind('ctrl+shift+h', self.show_status)
+        bind('ctrl+shift+k', self.search_clipboard_history)
+        bind('esc', self.exit_program, lane=STATE)
 
         # Typing input feature
-        keyboard.add_hotkey('ctrl+shift+q', self.start_typing_mode)
-        keyboard.add_hotkey('ctrl+shift+e', self.stop_typing_mode)
+        bind('ctrl+shift+q', self.start_typing_mode, lane=STATE)
+        bind('ctrl+shift+e', self.stop_typing_mode, lane=STATE)
+
+        hotkeys.start()
 
     def exit_program(self):
         """Exit the program"""
         # Stop any ongoing typing
         if self.typing_in_progress:
-            self.stop_typing()
+            self.stop_typing(wait=1.0)
 
         # Clean up typing mode if active
         if self.typing_mode:
@@ -652,6 +1244,14 @@ class ClipboardGeminiTool:
         # Stop clipboard monitoring
         self.stop_clipboard_monitoring()
 
+        # Cancel any model calls still generating
+        self.cancel_all_requests()
+
+        self.history_index.save()
+        if self.history:
+            self.history.close()
+        self.response_cache.flush()
+
         print("\n👋 Exiting Multi-Clipboard Gemini Assistant...")
         self.running = False
 
@@ -691,24 +1291,30 @@ class ClipboardGeminiTool:
                 except Exception:
                     pass
             keyboard.unhook_all_hotkeys()
+            self.hotkeys.shutdown()
+
+
+def _module_available(name: str) -> bool:
+    """Whether a module can be imported, found without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
 
 
 def main():
     """Entry point"""
     print("🔧 Initializing Multi-Clipboard Gemini Assistant...")
 
-    # Try to import required packages and give helpful error messages
-    try:
-        import pyperclip
-        import keyboard
-        import pyautogui
-        import google.generativeai
-        print("✅ All required packages found!")
-    except ImportError as e:
-        print(f"❌ Import error: {e}")
+    # Check required packages without importing them, so lazy imports stay lazy
+    missing = [name for name in ("pyperclip", "keyboard", "pyautogui", "google.generativeai")
+               if not _module_available(name)]
+    if missing:
+        print(f"❌ Missing packages: {', '.join(missing)}")
         print("📦 Please install missing packages with:")
         print("   pip install pyperclip keyboard pyautogui google-generativeai")
         sys.exit(1)
+    print("✅ All required packages found!")
 
     # Initialize and run
     tool = ClipboardGeminiTool()
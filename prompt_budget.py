@@ -0,0 +1,233 @@
+import math
+import os
+from typing import List, Optional
+
+from env_settings import env_int
+
+
+# What to do when the collected items do not fit the token budget
+TRUNCATE = "truncate"      # cut the largest items down until everything fits
+SUMMARIZE = "summarize"    # replace the oldest large items with model summaries
+MAP_REDUCE = "map_reduce"  # answer groups of items separately, then combine
+
+STRATEGIES = (TRUNCATE, SUMMARIZE, MAP_REDUCE)
+
+PROMPT_OVERHEAD_TOKENS = 40  # instructions around the items
+ITEM_OVERHEAD_TOKENS = 8     # "--- Item N ---" separator per item
+
+
+def build_items_prompt(items: List[str]) -> str:
+    """The standard prompt over a list of collected items"""
+    prompt_parts = []
+    prompt_parts.append("Please analyze and respond to the following collected items:")
+    prompt_parts.append("")
+
+    for i, item in enumerate(items, 1):
+        prompt_parts.append(f"--- Item {i} ---")
+        prompt_parts.append(item)
+        prompt_parts.append("")
+
+    prompt_parts.append("Please provide a helpful response based on these items.")
+
+    return "\n".join(prompt_parts)
+
+
+def build_summary_prompt(item: str, max_words: int) -> str:
+    return (f"Summarize the following text in at most {max_words} words. Keep names, numbers, "
+            f"error messages and code identifiers exactly as written.\n\n{item}")
+
+
+def build_map_prompt(items: List[str], part: int, parts: int) -> str:
+    lines = [f"You are reading part {part} of {parts} of a set of collected items. Extract the "
+             f"facts, questions and details needed to respond to them. Be concise.", ""]
+    for label, item in items:
+        lines.append(f"--- {label} ---")
+        lines.append(item)
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_reduce_prompt(notes: List[Optional[str]]) -> str:
+    """Combine map notes (None for parts whose map call failed) into the final prompt"""
+    lines = [f"The collected items were read in {len(notes)} separate parts. "
+             f"Here are the notes from each part:", ""]
+    for i, note in enumerate(notes, 1):
+        if note is None:
+            continue
+        lines.append(f"--- Part {i} notes ---")
+        lines.append(note)
+        lines.append("")
+    missing = [i for i, note in enumerate(notes, 1) if note is None]
+    if missing:
+        lines.append(f"Notes for part(s) {', '.join(map(str, missing))} are missing because reading "
+                     f"them failed; say so if it matters for the response.")
+        lines.append("")
+    lines.append("Please provide a helpful response to the collected items based on these notes.")
+    return "\n".join(lines)
+
+
+class PromptPlan:
+    """How a set of items will be sent within the token budget.
+
+    strategy is None when everything fits as-is. Otherwise `items` holds
+    the items as they will be sent (truncated where listed in `truncated`),
+    `summarize` lists the item indices to replace with summaries of at most
+    `summary_tokens` tokens first and `groups` holds (label, text) pieces for each map-reduce call.
+    """
+
+    def __init__(self, strategy: Optional[str], items: List[str], item_tokens: List[int], budget: int):
+        self.strategy = strategy
+        self.items = items
+        self.item_tokens = item_tokens
+        self.budget = budget
+        self.truncated: List[int] = []
+        self.summarize: List[int] = []
+        self.summary_tokens = 0
+        self.groups: List[List[tuple]] = []
+        self.estimated_tokens = PROMPT_OVERHEAD_TOKENS + sum(item_tokens)
+        self.prepare_seconds = 0.0
+
+    @property
+    def input_tokens(self) -> int:
+        """Estimated tokens of the full, unbudgeted prompt"""
+        return PROMPT_OVERHEAD_TOKENS + sum(self.item_tokens)
+
+    def describe(self) -> str:
+        head = f"~{self.input_tokens} tokens in {len(self.item_tokens)} items (budget {self.budget})"
+        if self.strategy is None:
+            return f"{head}: fits"
+        if self.strategy == MAP_REDUCE:
+            return f"{head}: map-reduce over {len(self.groups)} parallel calls"
+        steps = []
+        if self.summarize:
+            steps.append(f"summarize items {', '.join(str(i + 1) for i in self.summarize)}")
+        if self.truncated:
+            steps.append(f"truncate items {', '.join(str(i + 1) for i in self.truncated)}")
+        return f"{head}: {' and '.join(steps)} → ~{self.estimated_tokens} tokens"
+
+
+class PromptBudgeter:
+    """Estimates prompt tokens and plans how to stay within a budget.
+
+    Tokens are estimated from character counts; observe() refines the
+    characters-per-token ratio from the counts the model reports.
+    """
+
+    def __init__(self, max_tokens: int = 30000, strategy: str = TRUNCATE,
+                 chars_per_token: float = 4.0, summary_tokens: int = 256):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown budget strategy '{strategy}' (expected one of {', '.join(STRATEGIES)})")
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.chars_per_token = chars_per_token
+        self.summary_tokens = summary_tokens
+
+    @classmethod
+    def from_env(cls) -> "PromptBudgeter":
+        """PASS60_TOKEN_BUDGET and PASS60_BUDGET_STRATEGY (truncate, summarize or map_reduce)"""
+        return cls(max_tokens=env_int("PASS60_TOKEN_BUDGET", 30000),
+                   strategy=os.getenv("PASS60_BUDGET_STRATEGY", TRUNCATE).lower())
+
+    def estimate(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def observe(self, prompt_chars: int, actual_tokens: int):
+        """Blend a reported prompt token count into the chars-per-token ratio"""
+        if prompt_chars and actual_tokens:
+            ratio = prompt_chars / actual_tokens
+            self.chars_per_token = min(max(0.8 * self.chars_per_token + 0.2 * ratio, 1.0), 8.0)
+
+    def plan(self, items: List[str], strategy: Optional[str] = None) -> PromptPlan:
+        item_tokens = [self.estimate(item) + ITEM_OVERHEAD_TOKENS for item in items]
+        plan = PromptPlan(None, list(items), item_tokens, self.max_tokens)
+        if plan.input_tokens <= self.max_tokens:
+            return plan
+
+        plan.strategy = strategy or self.strategy
+        if plan.strategy == MAP_REDUCE:
+            self._plan_map_reduce(plan)
+        else:
+            sizes = list(item_tokens)
+            if plan.strategy == SUMMARIZE:
+                # Oldest first, and only items a summary would actually shrink
+                for i, size in enumerate(sizes):
+                    if PROMPT_OVERHEAD_TOKENS + sum(sizes) <= self.max_tokens:
+                        break
+                    if size > self.summary_tokens + ITEM_OVERHEAD_TOKENS:
+                        plan.summarize.append(i)
+                        sizes[i] = self.summary_tokens + ITEM_OVERHEAD_TOKENS
+                plan.summary_tokens = self.summary_tokens
+                overflow = PROMPT_OVERHEAD_TOKENS + sum(sizes) - self.max_tokens
+                if overflow > 0 and plan.summarize:
+                    # Still too big with every large item summarized: shorten the summaries
+                    shrink = math.ceil(overflow / len(plan.summarize))
+                    plan.summary_tokens = max(self.summary_tokens - shrink, 32)
+                    for i in plan.summarize:
+                        sizes[i] = plan.summary_tokens + ITEM_OVERHEAD_TOKENS
+            self._truncate(plan, sizes)
+        return plan
+
+    def plan_map_reduce(self, items: List[str], per_item: bool = False) -> PromptPlan:
+        """A map-reduce plan whatever the size: one call per item or per budget-sized group"""
+        item_tokens = [self.estimate(item) + ITEM_OVERHEAD_TOKENS for item in items]
+        plan = PromptPlan(MAP_REDUCE, list(items), item_tokens, self.max_tokens)
+        self._plan_map_reduce(plan, per_item)
+        return plan
+
+    def _truncate(self, plan: PromptPlan, sizes: List[int]):
+        """Cut the largest items not being summarized to a common cap so the total fits"""
+        available = self.max_tokens - PROMPT_OVERHEAD_TOKENS
+        free = [i for i in range(len(sizes)) if i not in plan.summarize]
+        if sum(sizes) > available and free:
+            fixed = sum(sizes) - sum(sizes[i] for i in free)
+            cap = self._water_level([sizes[i] for i in free], available - fixed)
+            for i in free:
+                if sizes[i] > cap:
+                    keep_chars = int((cap - ITEM_OVERHEAD_TOKENS) * self.chars_per_token)
+                    plan.items[i] = truncate_text(plan.items[i], keep_chars)
+                    plan.truncated.append(i)
+                    sizes[i] = cap
+        plan.estimated_tokens = PROMPT_OVERHEAD_TOKENS + sum(sizes)
+
+    @staticmethod
+    def _water_level(sizes: List[int], available: int) -> int:
+        """Largest cap such that sum(min(size, cap)) fits in available"""
+        remaining = available
+        ordered = sorted(sizes)
+        for n, size in enumerate(ordered):
+            share = remaining // (len(ordered) - n)
+            if size > share:
+                return max(share, ITEM_OVERHEAD_TOKENS + 1)
+            remaining -= size
+        return ordered[-1]
+
+    def _plan_map_reduce(self, plan: PromptPlan, per_item: bool = False):
+        """Pack items, in order, into groups that each fit the budget.
+
+        With per_item every item (or piece of an oversized item) gets its own group.
+        """
+        available = self.max_tokens - PROMPT_OVERHEAD_TOKENS
+        piece_chars = max(int((available - ITEM_OVERHEAD_TOKENS) * self.chars_per_token), 1)
+        group, group_tokens = [], 0
+        for i, item in enumerate(plan.items, 1):
+            pieces = [item[start:start + piece_chars] for start in range(0, len(item), piece_chars)] or [""]
+            for n, piece in enumerate(pieces, 1):
+                label = f"Item {i}" if len(pieces) == 1 else f"Item {i} (piece {n} of {len(pieces)})"
+                tokens = self.estimate(piece) + ITEM_OVERHEAD_TOKENS
+                if group and (per_item or group_tokens + tokens > available):
+                    plan.groups.append(group)
+                    group, group_tokens = [], 0
+                group.append((label, piece))
+                group_tokens += tokens
+        if group:
+            plan.groups.append(group)
+        plan.estimated_tokens = max(PROMPT_OVERHEAD_TOKENS + sum(self.estimate(text) + ITEM_OVERHEAD_TOKENS
+                                                                 for _, text in group)
+                                    for group in plan.groups)
+
+
+def truncate_text(text: str, keep_chars: int) -> str:
+    """Keep the start of text and note how much was cut"""
+    if len(text) <= keep_chars:
+        return text
+    return f"{text[:keep_chars]}\n[... truncated {len(text) - keep_chars} chars]"
@@ -0,0 +1,223 @@
+import asyncio
+import threading
+import time
+from typing import List, Optional
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, QObject, Qt, pyqtSignal
+
+from clipboard_buffer import SpilledItem, item_preview
+from events import ALL_EVENTS, EventBus
+
+
+class BufferListModel(QAbstractListModel):
+    """List model over ClipboardGeminiTool.clipboard_buffer for a QListView.
+
+    Previews are built once per item. sync() diffs the tool's buffer against
+    the rows already shown and only emits row inserts for appended items,
+    falling back to a full reset when the buffer was cleared or rewritten,
+    so an unchanged buffer costs nothing to refresh.
+    """
+
+    def __init__(self, tool, preview_length: int = 80, empty_text: Optional[str] = None, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.preview_length = preview_length
+        self.empty_text = empty_text
+        self._previews: List[str] = []
+        self._tail = None  # last buffer item shown, compared by identity
+        self._items = ()  # buffer snapshot the rows were last synced from
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if not self._previews and self.empty_text:
+            return 1
+        return len(self._previews)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            if not self._previews:
+                return self.empty_text
+            return self._previews[index.row()]
+        if role == Qt.ItemDataRole.ToolTipRole and self._previews:
+            if index.row() >= len(self._items):
+                return None
+            item = self._items[index.row()]
+            return f"{len(item)} chars{' (on disk)' if isinstance(item, SpilledItem) else ''}"
+        return None
+
+    def _preview(self, number: int, item: str) -> str:
+        return f"{number}. {item_preview(item, self.preview_length)}"
+
+    def sync(self):
+        """Bring the rows in line with the tool's buffer"""
+        # An immutable snapshot: the hook and hotkey threads may append while this runs
+        items = self.tool.clipboard_buffer.snapshot()
+        self._items = items
+        shown = len(self._previews)
+        total = len(items)
+
+        if total == shown and (total == 0 or items[-1] is self._tail):
+            return
+        if shown and total > shown and items[shown - 1] is self._tail:
+            self.append_items(items[shown:])
+            return
+        self.reset_items(items)
+
+    def append_items(self, new_items):
+        """Append rows for items added to the end of the buffer"""
+        if not new_items:
+            return
+        first = len(self._previews)
+        if first == 0 and self.empty_text:
+            # Replace the placeholder row
+            self.reset_items(list(new_items))
+            return
+        self.beginInsertRows(QModelIndex(), first, first + len(new_items) - 1)
+        for offset, item in enumerate(new_items):
+            self._previews.append(self._preview(first + offset + 1, item))
+        self._tail = new_items[-1]
+        self.endInsertRows()
+
+    def reset_items(self, items):
+        """Rebuild every row (buffer cleared or rewritten)"""
+        self.beginResetModel()
+        self._previews = [self._preview(i, item) for i, item in enumerate(items, 1)]
+        self._tail = items[-1] if items else None
+        self.endResetModel()
+
+
+class SearchResultsModel(QAbstractListModel):
+    """List model over history search hits, newest first"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hits = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.hits)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        hit = self.hits[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"#{hit.session}  {hit.preview}"
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return f"Session #{hit.session}, {time.strftime('%Y-%m-%d %H:%M', time.localtime(hit.timestamp))}"
+        return None
+
+    def set_hits(self, hits):
+        self.beginResetModel()
+        self.hits = list(hits)
+        self.endResetModel()
+
+
+class ToolEventBridge(QObject):
+    """Re-emits ClipboardGeminiTool events as a Qt signal.
+
+    Events may be published from any thread (clipboard watcher, keyboard
+    hook, typing thread); the signal is delivered to slots on the GUI
+    thread through Qt's queued connections.
+    """
+
+    event = pyqtSignal(object)
+
+    def __init__(self, bus: EventBus, parent=None):
+        super().__init__(parent)
+        self._bus = bus
+        self._token = bus.subscribe(ALL_EVENTS, self.event.emit)
+
+    def close(self):
+        """Stop forwarding events"""
+        if self._token is not None:
+            self._bus.unsubscribe(self._token)
+            self._token = None
+
+
+class AskBridge(QObject):
+    """Runs ClipboardGeminiTool.ask() requests for a Qt front end.
+
+    The asyncio event loop runs on a background thread, so the Qt event
+    loop is never blocked; chunk and finished are emitted from that thread
+    and delivered on the GUI thread through queued connections. Several
+    requests can be in flight at once and each can be cancelled by id.
+    """
+
+    chunk = pyqtSignal(int, str)        # request_id, text
+    finished = pyqtSignal(int, object)  # request_id, answer (None if failed or cancelled)
+
+    def __init__(self, tool, parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def ask(self, items: Optional[List[str]] = None) -> int:
+        """Start a request over items (default: a buffer snapshot); returns its id"""
+        request = self.tool.new_request(items)
+        asyncio.run_coroutine_threadsafe(self._run(request), self.loop)
+        return request.id
+
+    async def _run(self, request):
+        try:
+            answer = await self.tool.run_request(request, on_chunk=self.chunk.emit)
+        except asyncio.CancelledError:
+            answer = None
+        self.finished.emit(request.id, answer)
+
+    def cancel(self, request_id: int) -> bool:
+        return self.tool.cancel_request(request_id)
+
+    def close(self):
+        """Cancel running requests and stop the event loop"""
+        if self.loop.is_closed():
+            return
+        self.tool.cancel_all_requests()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1.0)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+
+class PasteBridge(QObject):
+    """Pastes through ClipboardGeminiTool.paste_transactions for a Qt front end.
+
+    A confirmed paste waits for its text to read back from the clipboard
+    (up to confirm_timeout), so it runs as a command on the tool's hotkey
+    dispatcher work lane instead of the GUI thread. finished is emitted
+    from the worker and delivered on the GUI thread through a queued
+    connection. Presses while a paste is queued coalesce; the latest text
+    is pasted.
+    """
+
+    finished = pyqtSignal(object, object)  # PasteResult (None if it failed), the exception (None if it worked)
+
+    def __init__(self, tool, name: str = "gui_paste", parent=None):
+        super().__init__(parent)
+        self.tool = tool
+        self._text: Optional[str] = None
+        self._lock = threading.Lock()
+        self._submit = tool.hotkeys.register(name, self._paste, rerun=False)
+        tool.hotkeys.start()
+
+    def paste(self, text: str):
+        """Queue a paste of text; returns at once"""
+        with self._lock:
+            self._text = text
+        self._submit()
+
+    def _paste(self):
+        with self._lock:
+            text, self._text = self._text, None
+        if text is None:
+            return
+        try:
+            result = self.tool.paste_transactions.paste(text)
+        except Exception as e:
+            self.finished.emit(None, e)
+            return
+        self.finished.emit(result, None)
@@ -0,0 +1,248 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pass60", "response_cache.json")
+
+
+class ResponseCache:
+    """Persistent LRU cache of model responses keyed on prompt + model name.
+
+    Entries expire after `ttl` seconds; the least recently used entries are
+    evicted once `max_entries` or `max_bytes` (total response size) is
+    exceeded. The cache is stored as a single JSON file, written atomically
+    on a timer thread `save_delay` seconds after the first change, so put()
+    never blocks the caller (or the asyncio loop) on disk. flush() writes
+    pending changes at once and runs at exit.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, max_entries: int = 256,
+                 max_bytes: int = 8 * 1024 * 1024, ttl: float = 7 * 24 * 3600, save_delay: float = 2.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.save_delay = save_delay
+        self.hits = 0
+        self.misses = 0
+        self.saves = 0
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer of the file at a time
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str) -> str:
+        """Content address for a prompt sent to a given model"""
+        digest = hashlib.sha256()
+        digest.update(model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on miss/expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if self.ttl and time.time() - entry["created"] > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["response"]
+
+    def put(self, key: str, response: str):
+        """Store a response and persist the cache"""
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {"response": response, "created": time.time(), "size": size}
+            self._total_bytes += size
+            self._evict()
+            self._schedule_save()
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            self._schedule_save()
+
+    def flush(self):
+        """Write pending changes now"""
+        with self._lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+        self._save()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry["size"]
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable response cache: {e}")
+            return
+        entries = data.get("entries") if isinstance(data, dict) else None
+        if not isinstance(entries, list):
+            print("⚠️  Ignoring response cache with an unexpected layout")
+            return
+
+        now = time.time()
+        skipped = 0
+        for pair in entries:
+            entry = self._valid_entry(pair)
+            if entry is None:
+                skipped += 1
+                continue
+            if self.ttl and now - entry["created"] > self.ttl:
+                continue
+            self._entries[pair[0]] = entry
+            self._total_bytes += entry["size"]
+        if skipped:
+            print(f"⚠️  Skipped {skipped} malformed response cache entries")
+        self._evict()
+
+    @staticmethod
+    def _valid_entry(pair) -> Optional[dict]:
+        """A stored [key, entry] pair as a clean entry, or None if it is malformed"""
+        if not (isinstance(pair, list) and len(pair) == 2 and isinstance(pair[0], str)
+                and isinstance(pair[1], dict)):
+            return None
+        response, created = pair[1].get("response"), pair[1].get("created")
+        if not isinstance(response, str) or not isinstance(created, (int, float)):
+            return None
+        return {"response": response, "created": created, "size": len(response.encode("utf-8"))}
+
+    def _schedule_save(self):
+        """Mark the cache dirty and start the save timer if none is pending (caller holds _lock)"""
+        self._dirty = True
+        if self.path and self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self._timed_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _timed_save(self):
+        with self._lock:
+            self._save_timer = None
+        self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = list(self._entries.items())
+                self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"entries": entries}, f)
+                os.replace(tmp_path, self.path)
+                self.saves += 1
+            except OSError as e:
+                with self._lock:
+                    self._dirty = True
+                print(f"⚠️  Could not save response cache: {e}")
+
+
+if __name__ == "__main__":
+    # Offline check with a stubbed model: hits skip the model, puts never wait on
+    # disk, the file survives a restart and malformed files do not crash loading
+    import tempfile
+
+    from backends import ModelBackend
+
+    class StubBackend(ModelBackend):
+        name = "stub"
+
+        def __init__(self):
+            super().__init__("stub-model")
+            self.calls = 0
+
+        def generate(self, prompt, usage=None):
+            self.calls += 1
+            return f"answer to {prompt}" * 2000  # ~30 KB responses
+
+    def ask(cache, model, prompt):
+        key = ResponseCache.make_key(prompt, model.model_name)
+        answer = cache.get(key)
+        if answer is None:
+            answer = model.generate(prompt)
+            start = time.perf_counter()
+            cache.put(key, answer)
+            put_ms.append((time.perf_counter() - start) * 1000)
+        return answer
+
+    directory = tempfile.mkdtemp(prefix="pass60-cache-")
+    path = os.path.join(directory, "response_cache.json")
+    model, put_ms = StubBackend(), []
+    cache = ResponseCache(path, save_delay=0.2)
+    prompts = [f"prompt {n}" for n in range(200)]
+    answers = [ask(cache, model, prompt) for prompt in prompts]
+    repeats = [ask(cache, model, prompt) for prompt in prompts]
+    cache.flush()
+    reloaded = ResponseCache(path)
+    reload_hits = sum(reloaded.get(ResponseCache.make_key(p, model.model_name)) is not None for p in prompts)
+
+    bad_layouts = []
+    for content in ("[1, 2, 3]", '{"entries": {"a": 1}}', '{"entries": [["k", {"response": 5}], [1], "x"]}',
+                    "not json"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        try:
+            bad_layouts.append(len(ResponseCache(path)._entries) == 0)
+        except Exception as e:
+            print(f"❌ {content!r} crashed loading: {e!r}")
+            bad_layouts.append(False)
+
+    checks = {
+        f"{model.calls} model calls for 400 asks (200 distinct)": model.calls == 200 and repeats == answers,
+        f"puts took at most {max(put_ms):.2f} ms; {cache.saves} debounced saves": max(put_ms) < 5,
+        f"{reload_hits}/{reloaded.max_entries} entries back after a restart (LRU keeps "
+        f"{reloaded.max_bytes // 1024 // 1024} MB)": reload_hits == len(reloaded._entries) > 0,
+        "malformed cache files load as empty": all(bad_layouts),
+    }
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    raise SystemExit(0 if all(checks.values()) else 1)
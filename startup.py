@@ -0,0 +1,81 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+# Enabled with --startup-report on the command line or PASS60_STARTUP_REPORT=1
+REPORT_ENABLED = "--startup-report" in sys.argv or bool(os.getenv("PASS60_STARTUP_REPORT"))
+
+_started_at = time.perf_counter()
+_timings: List[Tuple[str, str, float]] = []
+_lock = threading.Lock()
+
+
+def record(kind: str, name: str, seconds: float):
+    """Record a timing for the startup report"""
+    with _lock:
+        _timings.append((kind, name, seconds))
+
+
+@contextmanager
+def phase(name: str):
+    """Time a startup phase"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record("phase", name, time.perf_counter() - start)
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    record("import", self._name, time.perf_counter() - start)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a proxy for module `name` that is only imported when first used"""
+    return LazyModule(name)
+
+
+def print_startup_report(title: str = "STARTUP REPORT"):
+    """Print per-import and per-phase timings collected so far"""
+    with _lock:
+        timings = list(_timings)
+
+    print("\n" + "=" * 60)
+    print(f"⏱️  {title}")
+    print("=" * 60)
+    for kind in ("import", "phase"):
+        entries = [(name, seconds) for k, name, seconds in timings if k == kind]
+        if not entries:
+            continue
+        print(f"{'📦 Imports' if kind == 'import' else '🔧 Phases'}:")
+        for name, seconds in entries:
+            print(f"  {name:<28} {seconds * 1000:8.1f} ms")
+    print(f"🕒 Since startup: {(time.perf_counter() - _started_at) * 1000:.1f} ms")
+    print("=" * 60)
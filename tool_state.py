@@ -0,0 +1,157 @@
+import threading
+from typing import Any, Dict, Tuple
+
+
+# Shared ClipboardGeminiTool fields and their initial values
+DEFAULTS = {
+    "current_response": None,
+    "last_response_cached": False,
+    "response_streaming": False,
+    "collecting": False,
+    "typing_mode": False,
+    "typing_in_progress": False,
+}
+
+
+class StateSnapshot:
+    """Read-only view of the tool's shared state at one moment"""
+
+    __slots__ = tuple(DEFAULTS) + ("items", "typing_index", "typing_paused", "version")
+
+    def __init__(self, values: Dict[str, Any], items: Tuple, typing_index: int, typing_paused: bool,
+                 version: int):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "items", items)
+        object.__setattr__(self, "typing_index", typing_index)
+        object.__setattr__(self, "typing_paused", typing_paused)
+        object.__setattr__(self, "version", version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("StateSnapshot is read-only")
+
+
+class ToolState:
+    """Copy-on-write store for the fields several threads share.
+
+    Writers serialise on a lock and publish a new dict with their changes,
+    so set() updates several fields atomically. Readers take the current
+    dict without locking: a single field read or a snapshot never blocks a
+    writer and never sees half of an update.
+    """
+
+    def __init__(self, **initial):
+        self._values: Dict[str, Any] = {**DEFAULTS, **initial}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def get(self, name: str) -> Any:
+        return self._values[name]
+
+    def values(self) -> Dict[str, Any]:
+        """The current values; treat as read-only"""
+        return self._values
+
+    def set(self, **changes):
+        unknown = set(changes) - set(DEFAULTS)
+        if unknown:
+            raise KeyError(f"Unknown state field(s): {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._values = {**self._values, **changes}
+            self.version += 1
+
+    def claim(self, name: str) -> bool:
+        """Atomically set a flag that is currently False; returns False if it was already set"""
+        with self._lock:
+            if self._values[name]:
+                return False
+            self._values = {**self._values, name: True}
+            self.version += 1
+            return True
+
+
+def shared_field(name: str) -> property:
+    """Attribute on ClipboardGeminiTool stored in its ToolState"""
+    return property(lambda tool: tool.state.get(name),
+                    lambda tool, value: tool.state.set(**{name: value}),
+                    doc=f"{name} (in ToolState)")
+
+
+if __name__ == "__main__":
+    # Stress: hammer the buffer and the state from many threads and check invariants
+    import itertools
+    import random
+    import time
+
+    from clipboard_buffer import ClipboardBuffer
+
+    buffer = ClipboardBuffer(max_items=64, max_bytes=4096)
+    state = ToolState()
+    stop = threading.Event()
+    errors = []
+    counts = {"appends": 0, "snapshots": 0, "claims": 0, "sets": 0}
+    holders = [0]
+    holders_lock = threading.Lock()
+
+    def writer(n):
+        rng = random.Random(n)
+        for i in itertools.count():
+            if stop.is_set():
+                return
+            # Unique items (writer, sequence) plus frequent duplicates
+            buffer.append(f"w{n}-{i}" if rng.random() < 0.7 else f"dup-{rng.randint(0, 20)}")
+            counts["appends"] += 1
+            if rng.random() < 0.002:
+                buffer.clear()
+
+    def reader():
+        while not stop.is_set():
+            items = buffer.snapshot()
+            counts["snapshots"] += 1
+            if len(items) > buffer.max_items:
+                errors.append(f"{len(items)} items over the cap")
+            if len(set(items)) != len(items):
+                errors.append("duplicate items in a snapshot")
+            last = {}
+            for item in items:
+                if item.startswith("w"):
+                    writer_id, sequence = item[1:].split("-")
+                    if int(sequence) <= last.get(writer_id, -1):
+                        errors.append("items out of order in a snapshot")
+                    last[writer_id] = int(sequence)
+            values = state.values()
+            if values["collecting"] != values["typing_mode"]:
+                errors.append("torn multi-field update")
+
+    def toggler(n):
+        rng = random.Random(100 + n)
+        while not stop.is_set():
+            flag = rng.random() < 0.5
+            state.set(collecting=flag, typing_mode=flag)
+            counts["sets"] += 1
+            if state.claim("typing_in_progress"):
+                with holders_lock:
+                    holders[0] += 1
+                    if holders[0] > 1:
+                        errors.append("two threads hold typing_in_progress")
+                counts["claims"] += 1
+                with holders_lock:
+                    holders[0] -= 1
+                state.set(typing_in_progress=False)
+
+    threads = ([threading.Thread(target=writer, args=(n,)) for n in range(6)]
+               + [threading.Thread(target=reader) for _ in range(4)]
+               + [threading.Thread(target=toggler, args=(n,)) for n in range(4)])
+    for thread in threads:
+        thread.start()
+    time.sleep(3)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f"🧵 {counts['appends']} appends, {counts['snapshots']} snapshots, {counts['sets']} sets, "
+          f"{counts['claims']} claims on {len(threads)} threads; buffer {buffer.describe()}")
+    for error in sorted(set(errors)):
+        print(f"❌ {error} ({errors.count(error)}x)")
+    print(f"{'✅' if not errors else '❌'} invariants held")
+    raise SystemExit(1 if errors else 0)
@@ -0,0 +1,171 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from startup import lazy_import
+
+pyautogui = lazy_import("pyautogui")
+
+
+def pyautogui_inject(text: str):
+    """Type a run of characters with a single pyautogui call.
+
+    _pause=False skips pyautogui's per-call PAUSE sleep, which would
+    otherwise dominate when typing in small runs.
+    """
+    pyautogui.write(text, interval=0, _pause=False)
+
+
+class TypingEngine:
+    """Types text in runs of characters per injection call at a target rate.
+
+    The run length grows with the target rate so that the number of
+    injection calls per second stays around `injections_per_sec`. Runs are
+    scheduled against a monotonic deadline rather than a fixed sleep, so
+    injection overhead and scheduler jitter do not accumulate as drift: a
+    late run is followed by runs without sleeping until the schedule is met
+    again. If typing falls more than `max_lag` seconds behind, the backlog
+    is dropped instead of bursting. Pause and stop are checked between runs.
+    """
+
+    BASE_CHARS_PER_SEC = 1 / 0.015  # ~67 chars per second at 1x speed
+    MIN_CHARS_PER_SEC = BASE_CHARS_PER_SEC / 8
+    MAX_CHARS_PER_SEC = BASE_CHARS_PER_SEC * 64
+
+    def __init__(self, inject: Optional[Callable[[str], None]] = None,
+                 target_cps: float = BASE_CHARS_PER_SEC, injections_per_sec: float = 30.0,
+                 max_lag: float = 0.25, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.inject = inject or pyautogui_inject
+        self.target_cps = target_cps
+        self.injections_per_sec = injections_per_sec
+        self.max_lag = max_lag
+        self.clock = clock
+        self.sleep = sleep
+        self.paused = False
+        self.stopped = False
+        self.index = 0
+        self.chars_typed = 0
+        self.active_seconds = 0.0
+        self._segment_start: Optional[float] = None
+
+    @property
+    def target_cps(self) -> float:
+        return self._target_cps
+
+    @target_cps.setter
+    def target_cps(self, value: float):
+        self._target_cps = min(max(value, self.MIN_CHARS_PER_SEC), self.MAX_CHARS_PER_SEC)
+
+    def reset(self, index: int = 0):
+        """Prepare for a new typing session"""
+        self.paused = False
+        self.stopped = False
+        self.index = index
+        self.chars_typed = 0
+        self.active_seconds = 0.0
+        self._segment_start = None
+
+    def chunk_size(self, chars_per_sec: float) -> int:
+        """Characters per injection call for a target rate"""
+        return max(1, int(round(chars_per_sec / self.injections_per_sec)))
+
+    def achieved_rate(self) -> float:
+        """Characters per second actually typed, excluding paused time"""
+        active = self.active_seconds
+        if self._segment_start is not None:
+            active += self.clock() - self._segment_start
+        if active <= 0:
+            return 0.0
+        return self.chars_typed / active
+
+    def run(self, text_source: Callable[[], str],
+            streaming: Callable[[], bool] = lambda: False,
+            wake: Optional[threading.Event] = None,
+            on_progress: Optional[Callable[[int, int, float], None]] = None,
+            progress_every: int = 100) -> int:
+        """Type text_source() from self.index until done, stopped or out of text.
+
+        text_source is re-read every run so text that is still streaming in
+        gets typed as it arrives; streaming() says whether more is coming and
+        wake is set when it does. Returns the final index.
+        """
+        next_progress = (self.index // progress_every + 1) * progress_every
+        deadline = None  # None while idle (paused / waiting for text)
+
+        while not self.stopped:
+            text = text_source() or ""
+            idle = self.paused or self.index >= len(text)
+
+            if idle:
+                if deadline is not None:
+                    self._end_segment()
+                    deadline = None
+                if self.index >= len(text) and not streaming():
+                    break
+                if not self.paused and wake:
+                    wake.wait(0.05)
+                    wake.clear()
+                else:
+                    self.sleep(0.05)
+                continue
+
+            now = self.clock()
+            if deadline is None:
+                deadline = self._segment_start = now
+            elif now - deadline > self.max_lag:
+                # Too far behind (e.g. the machine stalled): drop the backlog
+                deadline = now
+
+            rate = self.target_cps
+            chunk = text[self.index:self.index + self.chunk_size(rate)]
+            self.inject(chunk)
+            self.index += len(chunk)
+            self.chars_typed += len(chunk)
+
+            deadline += len(chunk) / rate
+            delay = deadline - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+
+            if on_progress and self.index >= next_progress:
+                next_progress = (self.index // progress_every + 1) * progress_every
+                on_progress(self.index, len(text), self.achieved_rate())
+
+        if deadline is not None:
+            self._end_segment()
+        return self.index
+
+    def _end_segment(self):
+        self.active_seconds += self.clock() - self._segment_start
+        self._segment_start = None
+
+
+def measure_rate(target_cps: float, chars: int = 2000, inject_cost: float = 0.0) -> float:
+    """Type `chars` characters into a fake injector and return the achieved rate.
+
+    inject_cost simulates the time each injection call takes.
+    """
+    def fake_inject(text: str):
+        if inject_cost:
+            time.sleep(inject_cost)
+
+    engine = TypingEngine(inject=fake_inject, target_cps=target_cps)
+    engine.run(lambda: "x" * chars)
+    return engine.achieved_rate()
+
+
+if __name__ == "__main__":
+    # Rate-control harness: replays typing into a fake injector at several speeds
+    tolerance = 0.05
+    failures = 0
+    for multiplier in (0.5, 1, 4, 16, 64):
+        target = TypingEngine.BASE_CHARS_PER_SEC * multiplier
+        chars = int(min(max(target * 1.5, 100), 20000))
+        achieved = measure_rate(target, chars=chars, inject_cost=0.002)
+        error = abs(achieved - target) / target
+        ok = error <= tolerance
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {multiplier:>5}x target {target:8.0f} chars/sec, "
+              f"achieved {achieved:8.0f} ({error * 100:.1f}% off)")
+    raise SystemExit(1 if failures else 0)